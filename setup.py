@@ -22,7 +22,7 @@ setuptools.setup(
     ],
     package_dir={"": "src"},
     package_data={
-        "odootools_docker": ["templates/**/*"],
+        "odootools_docker": ["templates/**/*", "compiled/*", "scripts/*"],
     },
     packages=setuptools.find_packages(where="src"),
     python_requires=">=3.6",
@@ -30,6 +30,11 @@ setuptools.setup(
         'Jinja2',
         'click',
     ],
+    extras_require={
+        "watch": [
+            'inotify_simple',
+        ],
+    },
     entry_points={
         "odootools.command": [
             "docker = odootools_docker.cli.docker:docker",
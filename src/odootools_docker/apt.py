@@ -0,0 +1,117 @@
+from .debs import is_pinned
+
+
+def get_repo_prerequisites(repo):
+    """
+    Returns the packages needed to configure a repository.
+
+    Args:
+      repo (HashMap<str, Any>): A repository as returned by
+        `get_extra_deb_repos`.
+
+    Returns:
+        Set<Str>: The packages to install before adding the repository.
+    """
+    packages = set()
+
+    if not repo.get('key_file'):
+        if repo.get('key'):
+            packages.add('gnupg')
+
+        if repo.get('key_url'):
+            packages.update(['curl', 'ca-certificates', 'gnupg'])
+
+    if repo.get('list_url'):
+        packages.update(['curl', 'ca-certificates'])
+    elif repo.get('url', '').startswith('https:'):
+        packages.add('ca-certificates')
+
+    return packages
+
+
+def get_prerequisites(context):
+    """
+    Returns the packages needed before installing the other packages.
+
+    Returns:
+        List<Str>: The sorted list of packages to install first.
+    """
+    packages = set()
+
+    for repo in context.get('deb_repos', []):
+        packages.update(get_repo_prerequisites(repo))
+
+    # Pinned deb files are mounted from the debs stage
+    if [deb for deb in context.get('deb_files', []) if not is_pinned(deb)]:
+        packages.update(['curl', 'ca-certificates'])
+
+    return sorted(packages)
+
+
+def unique_sorted(packages):
+    """
+    Returns the packages without duplicates in a stable order.
+    """
+    return sorted(set(packages))
+
+
+def plan_apt_transactions(context):
+    """
+    Plan the apt transactions needed to install the base dependencies.
+
+    The packages of `base_packages`, of the `deb_repos` and the
+    `deb_files` are merged, deduplicated and sorted so the rendered
+    layers don't change when the same packages are listed in a
+    different order.
+
+    The packages required to configure the repositories, like gnupg or
+    curl, are installed in a first transaction. The repositories are
+    then configured and everything else is installed in a single
+    transaction. When the repositories don't need anything to be
+    configured, for example when their keys are vendored, a single
+    transaction is used.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        List<HashMap<Str, Any>>: The transactions in the order they need
+        to be executed. Each transaction has the repos to configure
+        before updating the package lists, the packages and deb files to
+        install and the environment variables to define.
+    """
+    repos = context.get('deb_repos', [])
+    deb_files = context.get('deb_files', [])
+
+    packages = list(context.get('base_packages', []))
+    environments = {}
+
+    for repo in repos:
+        packages += repo.get('packages', [])
+        environments.update(repo.get('environments') or {})
+
+    prerequisites = get_prerequisites(context)
+
+    transactions = []
+
+    if prerequisites and (repos or deb_files):
+        transactions.append({
+            "repos": [],
+            "packages": prerequisites,
+            "deb_files": [],
+            "environments": {},
+        })
+
+    transactions.append({
+        "repos": repos,
+        "packages": [
+            package
+            for package in unique_sorted(packages)
+            if package not in prerequisites
+        ],
+        "deb_files": deb_files,
+        "environments": dict(sorted(environments.items())),
+    })
+
+    return transactions
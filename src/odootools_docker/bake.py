@@ -0,0 +1,218 @@
+import os
+import copy
+import json
+
+from .debs import DEBS_STAGE
+from .fingerprint import get_stable_context, get_hash
+from .planner import INPUTS, plan_steps, get_step_config, get_step_rank
+from .renderer import get_environment, warm_environment, render
+
+
+COMMON_TARGET = "_common"
+
+# Steps depending only on these inputs are rendered in base targets
+# shared by the environments.
+BASE_INPUTS = INPUTS[:INPUTS.index("odoo")]
+
+
+def get_base_steps(context):
+    """
+    Returns the first steps of a context that don't depend on Odoo.
+
+    Returns:
+        List<Str>: The steps that can be built in a shared base image.
+    """
+    base_steps = []
+
+    for step in context['steps']:
+        config = get_step_config(context, step)
+
+        if get_step_rank(config) >= len(BASE_INPUTS):
+            break
+
+        base_steps.append(step)
+
+    return base_steps
+
+
+def split_base(context, env=None):
+    """
+    Split a context into a base context and the context built on it.
+
+    The steps are planned first so the steps that only depend on the
+    distribution and the packages come first. Those steps are rendered
+    in a base context named after the hash of its Dockerfile and
+    platforms, so the environments having the same base share it. The
+    other steps are rendered from the base image.
+
+    Returns:
+        Tuple<Str, HashMap<str, Any>, HashMap<str, Any>>: The name of
+        the base, the base context and the context of the environment.
+        The name and the base context are None when there is no step to
+        share.
+    """
+    context, _ = plan_steps(context)
+    base_steps = get_base_steps(context)
+
+    if not base_steps:
+        return None, None, context
+
+    base_context = copy.deepcopy(context)
+    base_context['steps'] = base_steps
+    # The base steps only mount the deb files from the stages
+    base_context['stages'] = [
+        stage
+        for stage in context.get('stages', [])
+        if stage == DEBS_STAGE
+    ]
+
+    dockerfile = render(get_stable_context(base_context), env=env)
+    platforms = ",".join(get_platforms(context))
+    name = "base-{}".format(get_hash(platforms + dockerfile)[:12])
+
+    context['steps'] = context['steps'][len(base_steps):]
+    context['stages'] = [
+        stage
+        for stage in context.get('stages', [])
+        if stage not in base_context['stages']
+    ]
+    context['base_image'] = name
+
+    return name, base_context, context
+
+
+def get_platforms(context):
+    """
+    Returns the buildx platforms of a context.
+
+    Returns:
+        List<Str>: Platforms like linux/amd64.
+    """
+    multi_arch = context.get('multi_arch')
+
+    if multi_arch:
+        arches = multi_arch['arches']
+    else:
+        arches = [context['os_arch']]
+
+    return ["linux/{}".format(arch) for arch in arches]
+
+
+def get_cache_config(target, cache_ref=None, cache_dir=".buildx-cache"):
+    """
+    Returns the cache-from and cache-to entries of a target.
+
+    When a cache reference is provided, the cache is stored in the
+    registry as `<cache_ref>:<target>`. Otherwise it's stored in a
+    local directory per target.
+
+    Returns:
+        HashMap<Str, List<Str>>: The cache entries of the target.
+    """
+    if cache_ref:
+        ref = "{}:{}".format(cache_ref, target)
+        return {
+            "cache-from": ["type=registry,ref={}".format(ref)],
+            "cache-to": ["type=registry,ref={},mode=max".format(ref)],
+        }
+
+    path = os.path.join(cache_dir, target)
+
+    return {
+        "cache-from": ["type=local,src={}".format(path)],
+        "cache-to": ["type=local,dest={},mode=max".format(path)],
+    }
+
+
+def write_dockerfile(context, output, name, env=None):
+    """
+    Render the Dockerfile of a target in `<output>/<name>/Dockerfile`.
+
+    Returns:
+        Str: The path of the Dockerfile.
+    """
+    target_dir = os.path.join(output, name)
+    os.makedirs(target_dir, exist_ok=True)
+
+    filename = os.path.join(target_dir, "Dockerfile")
+
+    with open(filename, "w") as fout:
+        fout.write(render(context, env=env))
+
+    return filename
+
+
+def make_bake(contexts, output, image="odoo", cache_ref=None):
+    """
+    Render the Dockerfiles of environments and their bake file.
+
+    Each environment has a target tagged `<image>:<environment>`. The
+    steps shared by the environments are built by base targets passed
+    as named contexts, buildx builds them once and builds all the
+    environments in parallel. All targets inherit the common target
+    defining the build context.
+
+    Args:
+      contexts (HashMap<Str, HashMap<str, Any>>): The context of each
+        environment.
+      output (Str): The directory in which Dockerfiles are rendered.
+      image (Str): The name of the images.
+      cache_ref (Str): The registry reference used as cache.
+
+    Returns:
+        HashMap<Str, Any>: The content of a docker-bake.json file.
+    """
+    env = get_environment()
+    warm_environment(env)
+
+    targets = {
+        COMMON_TARGET: {
+            "context": ".",
+        }
+    }
+
+    for name, context in sorted(contexts.items()):
+        platforms = get_platforms(context)
+
+        base_name, base_context, context = split_base(context, env=env)
+
+        target = {
+            "inherits": [COMMON_TARGET],
+            "dockerfile": write_dockerfile(context, output, name, env=env),
+            "platforms": platforms,
+            "tags": ["{}:{}".format(image, name)],
+        }
+        target.update(get_cache_config(name, cache_ref))
+
+        if base_name:
+            target['contexts'] = {base_name: "target:{}".format(base_name)}
+
+        if base_name and base_name not in targets:
+            base_target = {
+                "inherits": [COMMON_TARGET],
+                "dockerfile": write_dockerfile(
+                    base_context, output, base_name, env=env
+                ),
+                "platforms": platforms,
+            }
+            base_target.update(get_cache_config(base_name, cache_ref))
+            targets[base_name] = base_target
+
+        targets[name] = target
+
+    return {
+        "group": {
+            "default": {
+                "targets": sorted(contexts),
+            }
+        },
+        "target": targets,
+    }
+
+
+def write_bake(bake, filename):
+    """
+    Write a bake file as JSON.
+    """
+    with open(filename, "w") as fout:
+        json.dump(bake, fout, indent=2, sort_keys=True)
@@ -0,0 +1,474 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+from .renderer import (
+    get_environment,
+    get_odoo_context,
+    make_context,
+    make_environment,
+    render,
+    warm_environment,
+)
+
+
+# Versions of Odoo supported by `renderer.get_host_config`.
+SUPPORTED_VERSIONS = [
+    "10.0",
+    "11.0",
+    "12.0",
+    "13.0",
+    "14.0",
+    "15.0",
+]
+
+BENCHMARKS = [
+    "context",
+    "render",
+    "memory",
+    "synthetic",
+    "startup",
+    "pipeline",
+    "cold_start",
+]
+
+# Benchmarks building docker images, only run when they're selected.
+SLOW_BENCHMARKS = [
+    "cold_start",
+]
+
+SYNTHETIC_PACKAGES = 2000
+SYNTHETIC_TEMPLATE_DIRS = 24
+
+
+def measure(func, repeat=5):
+    """
+    Measure the time needed to call a function.
+
+    The fastest of `repeat` calls is kept to reduce the noise.
+
+    Returns:
+        float: The time in milliseconds.
+    """
+    timings = []
+
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings) * 1000.0
+
+
+def measure_peak_memory(func):
+    """
+    Measure the memory allocated at the peak of a function call.
+
+    Returns:
+        int: The peak of memory allocated by python in bytes.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def make_version_context(version):
+    return make_context({"odoo": get_odoo_context(version)})
+
+
+def render_cold(context):
+    """
+    Render a context with a new environment without any cache.
+    """
+    env = make_environment(context.get('template_dirs'))
+    return render(context, env=env)
+
+
+def render_warm(context):
+    """
+    Render a context with the shared environment already compiled.
+    """
+    return render(context, env=get_environment(context.get('template_dirs')))
+
+
+def make_synthetic_context(
+    template_root,
+    packages=SYNTHETIC_PACKAGES,
+    template_dirs=SYNTHETIC_TEMPLATE_DIRS
+):
+    """
+    Returns a large context to render.
+
+    The context has thousands of base packages and dozens of template
+    directories. Each directory has its own template so the loaders
+    have to look up every directory before falling back to the
+    templates of this package.
+
+    Args:
+      template_root (Str): Directory in which template dirs are created.
+      packages (int): Number of packages added.
+      template_dirs (int): Number of template directories.
+
+    Returns:
+        HashMap<str, Any>: The context.
+    """
+    dirs = []
+
+    for index in range(template_dirs):
+        dirname = os.path.join(template_root, "templates-{}".format(index))
+        os.makedirs(dirname, exist_ok=True)
+
+        filename = os.path.join(dirname, "custom_{}.jinja".format(index))
+
+        with open(filename, "w") as fout:
+            fout.write("RUN echo {}\n".format(index))
+
+        dirs.append(dirname)
+
+    context = make_version_context(SUPPORTED_VERSIONS[-1])
+    context['template_dirs'] = dirs
+    context['base_packages'] += [
+        "synthetic-package-{}".format(index)
+        for index in range(packages)
+    ]
+    context['steps'] = context['steps'] + [
+        "custom_{}".format(index)
+        for index in range(template_dirs)
+    ]
+
+    return context
+
+
+def measure_pipeline(version, repeat=3):
+    """
+    Measure the `context | wkhtmltopdf | render` pipeline of the CLI.
+
+    The time includes the startup of each process.
+
+    Returns:
+        float: The time in milliseconds or None if the `odootools`
+        command isn't installed.
+    """
+    odootools = shutil.which("odootools")
+
+    if odootools is None:
+        return None
+
+    commands = [
+        [odootools, "docker", "context", "-v", version],
+        [odootools, "docker", "wkhtmltopdf"],
+        [odootools, "docker", "render"],
+    ]
+
+    def run():
+        procs = []
+        stdin = None
+
+        for command in commands:
+            proc = subprocess.Popen(
+                command,
+                stdin=stdin,
+                stdout=subprocess.PIPE,
+            )
+
+            if stdin is not None:
+                stdin.close()
+
+            stdin = proc.stdout
+            procs.append(proc)
+
+        procs[-1].communicate()
+
+        for proc in procs:
+            if proc.wait() != 0:
+                raise RuntimeError(
+                    "Command failed: {}".format(" ".join(proc.args))
+                )
+
+    return measure(run, repeat=repeat)
+
+
+def docker_available():
+    """
+    Returns True when the docker command can reach a docker daemon.
+    """
+    docker = shutil.which("docker")
+
+    if docker is None:
+        return False
+
+    return subprocess.run(
+        [docker, "info"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    ).returncode == 0
+
+
+def measure_cold_start(version, repeat=3):
+    """
+    Measure the cold start of Odoo with and without the precompile step.
+
+    An image is built for each case and `odoo --stop-after-init` is
+    timed in new containers, so the python files not precompiled are
+    compiled on each run as they would be on every autoscale event.
+
+    Returns:
+        HashMap<Str, float>: The time in milliseconds of the `default`
+        and `precompile` images or None if docker isn't available.
+    """
+    if not docker_available():
+        return None
+
+    docker = shutil.which("docker")
+    results = {}
+
+    for name, precompile in [("default", False), ("precompile", True)]:
+        context = make_context({
+            "odoo": get_odoo_context(version),
+            "precompile": precompile,
+        })
+        tag = "odootools-docker-bench:{}-{}".format(version, name)
+
+        with tempfile.TemporaryDirectory() as build_dir:
+            with open(os.path.join(build_dir, "Dockerfile"), "w") as fout:
+                fout.write(render(context))
+
+            subprocess.run(
+                [docker, "build", "-q", "-t", tag, build_dir],
+                check=True,
+                stdout=subprocess.DEVNULL
+            )
+
+        def run():
+            subprocess.run(
+                [docker, "run", "--rm", tag, "odoo", "--stop-after-init"],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+        try:
+            results[name] = measure(run, repeat=repeat)
+        finally:
+            subprocess.run(
+                [docker, "rmi", "-f", tag],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+    return results
+
+
+def measure_startup(repeat=3):
+    """
+    Measure the import time of each command of the CLI.
+
+    Returns:
+        HashMap<Str, float>: The import time in milliseconds by command.
+    """
+    from .startup import measure_imports
+    from .cli.docker import commands
+
+    results = {}
+
+    for name, path in sorted(commands.items()):
+        module = "odootools_docker.cli{}".format(path.split(':', 1)[0])
+
+        results[name] = min(
+            measure_imports(["odootools_docker.cli.docker", module])['total']
+            for _ in range(max(repeat, 1))
+        )
+
+    return results
+
+
+def run_benchmarks(versions=None, benchmarks=None, repeat=5):
+    """
+    Run the benchmarks.
+
+    Args:
+      versions (List<Str>): Versions of Odoo to benchmark, all the
+        supported versions by default.
+      benchmarks (List<Str>): Benchmarks to run, see `BENCHMARKS`. All
+        the benchmarks but the `SLOW_BENCHMARKS` by default.
+      repeat (int): Number of measurements of each benchmark.
+
+    Returns:
+        HashMap<Str, HashMap<Str, Any>>: The value and unit of each
+        benchmark by name like `render.warm[15.0]`.
+    """
+    versions = versions or SUPPORTED_VERSIONS
+    benchmarks = benchmarks or [
+        name
+        for name in BENCHMARKS
+        if name not in SLOW_BENCHMARKS
+    ]
+
+    results = {}
+
+    def add(name, value, unit="ms"):
+        if value is not None:
+            results[name] = {"value": value, "unit": unit}
+
+    warm_environment(get_environment())
+
+    for version in versions:
+        context = make_version_context(version)
+
+        if "context" in benchmarks:
+            add(
+                "make_context[{}]".format(version),
+                measure(lambda: make_version_context(version), repeat)
+            )
+
+        if "render" in benchmarks:
+            add(
+                "render.cold[{}]".format(version),
+                measure(lambda: render_cold(context), repeat)
+            )
+            add(
+                "render.warm[{}]".format(version),
+                measure(lambda: render_warm(context), repeat)
+            )
+
+        if "memory" in benchmarks:
+            add(
+                "peak_memory[{}]".format(version),
+                measure_peak_memory(
+                    lambda: render_cold(make_version_context(version))
+                ),
+                "bytes"
+            )
+
+        if "pipeline" in benchmarks:
+            add(
+                "pipeline[{}]".format(version),
+                measure_pipeline(version, min(repeat, 3))
+            )
+
+        if "cold_start" in benchmarks:
+            cold_start = measure_cold_start(version, min(repeat, 3)) or {}
+
+            for name, value in cold_start.items():
+                add("cold_start.{}[{}]".format(name, version), value)
+
+    if "synthetic" in benchmarks:
+        template_root = tempfile.mkdtemp()
+
+        try:
+            context = make_synthetic_context(template_root)
+
+            add(
+                "synthetic.render.cold",
+                measure(lambda: render_cold(context), repeat)
+            )
+            warm_environment(get_environment(context['template_dirs']))
+            add(
+                "synthetic.render.warm",
+                measure(lambda: render_warm(context), repeat)
+            )
+            add(
+                "synthetic.peak_memory",
+                measure_peak_memory(lambda: render_cold(context)),
+                "bytes"
+            )
+        finally:
+            shutil.rmtree(template_root)
+
+    if "startup" in benchmarks:
+        for name, value in measure_startup(min(repeat, 3)).items():
+            add("startup[{}]".format(name), value)
+
+    return {
+        "python": "{}.{}".format(*sys.version_info[:2]),
+        "benchmarks": results,
+    }
+
+
+def compare_results(old, new, threshold=0.2, min_delta=1.0):
+    """
+    Find the benchmarks that got worse between two results.
+
+    Args:
+      old (HashMap<Str, Any>): The baseline of `run_benchmarks`.
+      new (HashMap<Str, Any>): The results to check.
+      threshold (float): The relative increase tolerated.
+      min_delta (float): The increase in milliseconds ignored as noise.
+        It's only used by the benchmarks measuring time.
+
+    Returns:
+        List<HashMap<Str, Any>>: The regressions found.
+    """
+    regressions = []
+
+    for name, result in sorted(new['benchmarks'].items()):
+        baseline = old['benchmarks'].get(name)
+
+        if baseline is None or baseline['unit'] != result['unit']:
+            continue
+
+        delta = result['value'] - baseline['value']
+
+        if result['unit'] == "ms" and delta < min_delta:
+            continue
+
+        if result['value'] <= baseline['value'] * (1 + threshold):
+            continue
+
+        regressions.append({
+            "name": name,
+            "unit": result['unit'],
+            "old": baseline['value'],
+            "new": result['value'],
+            "delta": delta,
+        })
+
+    return regressions
+
+
+def format_value(value, unit):
+    if unit == "bytes":
+        return "{:>10.1f}KB".format(value / 1024.0)
+
+    return "{:>10.2f}ms".format(value)
+
+
+def format_results(results):
+    """
+    Format the results of `run_benchmarks` as text.
+
+    Returns:
+        Str: One line per benchmark.
+    """
+    return "\n".join(
+        "{:<40} {}".format(name, format_value(result['value'], result['unit']))
+        for name, result in sorted(results['benchmarks'].items())
+    )
+
+
+def format_regressions(regressions):
+    """
+    Format the regressions found by `compare_results` as text.
+
+    Returns:
+        Str: One line per regression.
+    """
+    return "\n".join(
+        "{:<40} {} -> {}".format(
+            regression['name'],
+            format_value(regression['old'], regression['unit']),
+            format_value(regression['new'], regression['unit']),
+        )
+        for regression in regressions
+    )
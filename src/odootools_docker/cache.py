@@ -0,0 +1,84 @@
+import os
+import fnmatch
+from jinja2 import FileSystemBytecodeCache
+from .renderer import DEFAULT_CACHE_SIZE
+
+
+class BoundedBytecodeCache(FileSystemBytecodeCache):
+    """
+    Bytecode cache stored on disk with a size limit.
+
+    Entries are keyed by jinja using the name and path of the template
+    and they are invalidated when the checksum of the template source
+    changes. So editing a template in a custom template directory will
+    recompile it on the next render.
+
+    When the size of the cache grows over max_size, the least recently
+    used entries are removed.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_CACHE_SIZE):
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        super().__init__(directory)
+        self.max_size = max_size
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+
+        if bucket.code is not None:
+            try:
+                os.utime(self._get_cache_filename(bucket))
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket):
+        super().dump_bytecode(bucket)
+        self.evict()
+
+    def entries(self):
+        """
+        Returns the entries of the cache.
+
+        Returns:
+            List<Tuple<float, int, Str>>: The access time, size and path
+            of each entry.
+        """
+        entries = []
+
+        for filename in os.listdir(self.directory):
+            if not fnmatch.fnmatch(filename, self.pattern % ("*",)):
+                continue
+
+            path = os.path.join(self.directory, filename)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def evict(self):
+        """
+        Remove the oldest entries until the cache fits in max_size.
+        """
+        if not self.max_size:
+            return
+
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total -= size
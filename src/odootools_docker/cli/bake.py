@@ -0,0 +1,105 @@
+import subprocess
+import click
+from .context import add_context_options, apply_context_options
+from ..bake import make_bake, write_bake
+from ..services import load_services, get_service_odoo_context
+from ..transformers import apply_transformers
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@add_context_options
+@click.option(
+    '-t',
+    '--transform',
+    'transforms',
+    multiple=True,
+    help=(
+        "Transformer to apply to each environment as NAME or "
+        "NAME:key=value,key=value. Can be repeated."
+    )
+)
+@click.option(
+    '-o',
+    '--output',
+    default="dockerfiles",
+    help="Directory in which a directory per target is created"
+)
+@click.option(
+    '--bake-file',
+    default="docker-bake.json",
+    help="Bake file to write"
+)
+@click.option(
+    '--image',
+    default="odoo",
+    help="Name of the images, they're tagged with their environment"
+)
+@click.option(
+    '--cache-ref',
+    help=(
+        "Registry reference used as cache, a local cache directory is "
+        "used by default"
+    )
+)
+def bake(transforms, output, bake_file, image, cache_ref, **options):
+    """
+    Render the Dockerfiles of all the environments of a service file.
+
+    The bake file builds every environment with `docker buildx bake`.
+    All the environments are rendered when no environment is passed.
+    """
+    service_file = options.pop('service_file')
+    env = options.pop('env')
+    repo = options.pop('repo')
+    languages = options.pop('languages')
+    resolve = options.pop('resolve')
+
+    for key in ('version', 'ref', 'release', 'stdin'):
+        options.pop(key)
+
+    if not service_file:
+        return exit_err({"error": "A service file is required"})
+
+    manifests = load_services(service_file)
+
+    names = [env] if env else sorted(manifests.services)
+
+    contexts = {}
+
+    for name in names:
+        service = manifests.services[name].resolved
+
+        base_context = {
+            "odoo": get_service_odoo_context(service, repo, languages)
+        }
+
+        try:
+            # Resolved below with the other environments
+            context = apply_context_options(
+                base_context,
+                resolve=False,
+                **options
+            )
+            contexts[name] = apply_transformers(context, transforms)
+        except (OSError, ValueError, subprocess.CalledProcessError) as exc:
+            return exit_err({"error": str(exc)})
+
+    # The environments are resolved together so the fetches they share
+    # are done once and the others concurrently.
+    if resolve:
+        from ..renderer import get_resolve_config
+        from ..resolver import resolve_contexts
+
+        try:
+            resolve_contexts(
+                list(contexts.values()),
+                **get_resolve_config({"resolve": True})
+            )
+        except (OSError, ValueError) as exc:
+            return exit_err({"error": str(exc)})
+
+    result = make_bake(contexts, output, image=image, cache_ref=cache_ref)
+    write_bake(result, bake_file)
+
+    return exit_ok(result)
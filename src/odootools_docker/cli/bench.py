@@ -0,0 +1,114 @@
+import json
+import click
+from ..bench import (
+    BENCHMARKS,
+    SUPPORTED_VERSIONS,
+    run_benchmarks,
+    compare_results,
+    format_results,
+    format_regressions,
+)
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@click.option(
+    '-v',
+    '--version',
+    'versions',
+    multiple=True,
+    type=click.Choice(SUPPORTED_VERSIONS),
+    help="Odoo version to benchmark, all supported versions by default"
+)
+@click.option(
+    '-b',
+    '--benchmark',
+    'benchmarks',
+    multiple=True,
+    type=click.Choice(BENCHMARKS),
+    help="Benchmark to run, all benchmarks but cold_start by default"
+)
+@click.option(
+    '--repeat',
+    type=int,
+    default=5,
+    help="Number of measurements of each benchmark"
+)
+@click.option(
+    '--format',
+    'output_format',
+    type=click.Choice(['json', 'text']),
+    default='json',
+    help="Format of the results"
+)
+@click.option(
+    '--save',
+    type=click.File('w'),
+    help="Store the results as a baseline in this file"
+)
+@click.option(
+    '--compare',
+    type=click.File('r'),
+    help="Baseline to compare the results with"
+)
+@click.option(
+    '--threshold',
+    type=float,
+    default=0.2,
+    help="Relative increase tolerated when comparing"
+)
+@click.option(
+    '--min-delta',
+    type=float,
+    default=1.0,
+    help="Increase in milliseconds ignored when comparing"
+)
+def bench(
+    versions,
+    benchmarks,
+    repeat,
+    output_format,
+    save,
+    compare,
+    threshold,
+    min_delta
+):
+    """
+    Benchmark building contexts, rendering and the CLI.
+    """
+    results = run_benchmarks(
+        versions=list(versions),
+        benchmarks=list(benchmarks),
+        repeat=repeat
+    )
+
+    if save:
+        json.dump(results, save, indent=2, sort_keys=True)
+
+    regressions = []
+
+    if compare:
+        regressions = compare_results(
+            json.load(compare),
+            results,
+            threshold=threshold,
+            min_delta=min_delta
+        )
+
+    if output_format == 'text':
+        click.echo(format_results(results))
+
+        if regressions:
+            click.echo("\nRegressions:")
+            click.echo(format_regressions(regressions))
+            raise click.exceptions.Exit(1)
+
+        return
+
+    if compare:
+        results = {"results": results, "regressions": regressions}
+
+    if regressions:
+        return exit_err(results)
+
+    return exit_ok(results)
@@ -1,8 +1,112 @@
+import json
 import click
 from .. import renderer
+from ..tools import get_context
 
 
 @click.command()
-def render():
-    print(renderer.render())
+@click.option(
+    '--manifest',
+    help="Write the fingerprints of the rendered steps in this file"
+)
+@click.option(
+    '-c',
+    '--context',
+    'context_file',
+    help="File of the context, it's read from stdin by default"
+)
+@click.option(
+    '-o',
+    '--output',
+    help="Write the Dockerfile in this file instead of stdout"
+)
+@click.option(
+    '--watch',
+    help=(
+        "Render again when the context file or the template dirs change, "
+        "print the steps changed by each render"
+    ),
+    is_flag=True,
+    default=False
+)
+@click.option(
+    '--poll',
+    help="Poll the files instead of using inotify",
+    is_flag=True,
+    default=False
+)
+@click.option(
+    '--interval',
+    type=float,
+    default=0.2,
+    help="Seconds between two polls"
+)
+def render(manifest, context_file, output, watch, poll, interval):
+    if watch:
+        if not output:
+            raise click.UsageError("--watch needs an --output file")
+
+        return watch_render(context_file, output, poll, interval)
+
+    if context_file:
+        with open(context_file) as fin:
+            context = json.load(fin)
+    else:
+        context = get_context()
+
+    dockerfile = renderer.render(context)
+
+    if output:
+        with open(output, 'w') as fout:
+            fout.write(dockerfile)
+    else:
+        print(dockerfile)
+
+    if manifest:
+        from ..fingerprint import get_fingerprints
+
+        with open(manifest, 'w') as fout:
+            json.dump(get_fingerprints(context), fout, indent=2)
+
+    return True
+
+
+def watch_render(context_file, output, poll, interval):
+    """
+    Render the context in the output on every change until interrupted.
+
+    A JSON line with the result of `watch.Renderer.update` is printed
+    after each render.
+    """
+    from ..watch import Renderer
+
+    watched = Renderer(
+        context=None if context_file else get_context(),
+        context_file=context_file,
+        output=output
+    )
+
+    def report(result):
+        click.echo(json.dumps(result))
+
+    try:
+        watched.watch(report, polling=poll, interval=interval)
+    except KeyboardInterrupt:
+        pass
+
+    return True
+
+
+@click.command('compile-templates')
+@click.option(
+    '-o',
+    '--output',
+    default=renderer.COMPILED_TEMPLATES_DIR,
+    help="Directory in which the package templates are compiled"
+)
+def compile_templates(output):
+    """
+    Precompile the package templates into python modules.
+    """
+    renderer.compile_templates(output)
     return True
@@ -1,93 +1,277 @@
-import toml
 import click
 
-from odoo_tools.services.objects import ServiceManifests
+from ..renderer import make_context, get_odoo_context, PROFILES, INSTALLERS
+from ..source import SOURCE_STRATEGIES
+from ..services import load_services, get_service_odoo_context
+from ..tools import exit_ok, exit_err, get_context
 
-from argparse import ArgumentParser
-from ..renderer import make_context
-from ..tools import exit_ok, get_context
 
+context_options = [
+    click.option(
+        '-v',
+        '--version',
+        help="Odoo Version"
+    ),
+    click.option(
+        '--ref',
+        help="Git comment referencence",
+        default=""
+    ),
+    click.option(
+        '--release',
+        help="Odoo official release from https://github.com/odoo/odoo.git .",
+        default=""
+    ),
+    click.option(
+        '--repo',
+        default="https://github.com/odoo/odoo.git"
+    ),
+    click.option(
+        '--languages',
+        default="all",
+        help="Languages to keep when setting odoo as a csv value",
+    ),
+    click.option(
+        '--service-file',
+        help="Service file"
+    ),
+    click.option(
+        '-e',
+        '--env',
+        help="Environment of service file to use"
+    ),
+    click.option(
+        '--stdin',
+        help="If set, tries to read a context from stdin",
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--cache-mounts',
+        help="Use BuildKit cache mounts for apt and pip",
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--multi-stage',
+        help="Build Odoo in a separate builder stage",
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--step-markers',
+        help="Mark the layers of each step in the image history",
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--instrument',
+        help="Print timing markers of the steps in the build log",
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--arch',
+        'arches',
+        multiple=True,
+        help=(
+            "Docker architecture of the image, the one of the host by "
+            "default. When repeated, a single Dockerfile builds every "
+            "architecture with TARGETARCH."
+        )
+    ),
+    click.option(
+        '--profile',
+        help="Profile setting default values of the context",
+        type=click.Choice(sorted(PROFILES)),
+        default="default"
+    ),
+    click.option(
+        '--precompile',
+        help=(
+            "Compile python files during the build with the optimization "
+            "levels as a csv value like 0,1"
+        ),
+        default=""
+    ),
+    click.option(
+        '--runtime-tuning',
+        help=(
+            "Preload jemalloc and size the workers of Odoo with the limits "
+            "of the container when it starts"
+        ),
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--installer',
+        help=(
+            "Installer of the python packages, pip is used when the python "
+            "of the image isn't supported"
+        ),
+        type=click.Choice(sorted(INSTALLERS)),
+        default="pip"
+    ),
+    click.option(
+        '--proxy',
+        help=(
+            "Download packages through the apt proxy and python index "
+            "passed as BuildKit secrets, see the proxy command"
+        ),
+        is_flag=True,
+        default=False
+    ),
+    click.option(
+        '--source-strategy',
+        help=(
+            "How the sources of Odoo are fetched: a shallow git fetch, the "
+            "archive of the release or a repository prefetched locally"
+        ),
+        type=click.Choice(SOURCE_STRATEGIES),
+        default="git"
+    ),
+    click.option(
+        '--source-checksum',
+        help="Sha256 of the archive of the release",
+        default=""
+    ),
+    click.option(
+        '--resolve',
+        help=(
+            "Resolve the ref to a commit, the release, the checksums of "
+            "the deb files and archives and fetch the keys of the repositories"
+        ),
+        is_flag=True,
+        default=False
+    ),
+]
+
+
+def add_context_options(func):
+    """
+    Add the options used to build a context to a command.
+    """
+    for option in reversed(context_options):
+        func = option(func)
+
+    return func
 
-@click.command()
-@click.option(
-    '-v',
-    '--version',
-    help="Odoo Version"
-)
-@click.option(
-    '--ref',
-    help="Git comment referencence",
-    default=""
-)
-@click.option(
-    '--release',
-    help="Odoo official release from https://github.com/odoo/odoo.git .",
-    default=""
-)
-@click.option(
-    '--repo',
-    default="https://github.com/odoo/odoo.git"
-)
-@click.option(
-    '--languages',
-    default="all",
-    help="Languages to keep when setting odoo as a csv value",
-)
-@click.option(
-    '--service-file',
-    help="Service file"
-)
-@click.option(
-    '-e',
-    '--env',
-    help="Environment of service file to use"
-)
-@click.option(
-    '--stdin',
-    help="If set, tries to read a context from stdin",
-    is_flag=True,
-    default=False
-)
-def context(version, ref, release, repo, languages, service_file, env, stdin):
-    if not release and not ref and version:
-        ref = version
 
+def build_context(
+    version,
+    ref,
+    release,
+    repo,
+    languages,
+    service_file,
+    env,
+    stdin,
+    **options
+):
+    """
+    Build a context from the options of the context command.
+
+    Returns:
+        HashMap<str, Any>: The context returned by `make_context`.
+    """
     if not service_file:
         base_context = {
-            "odoo": {
-                "version": version,
-                "ref": ref,
-                "repo": repo,
-                "release": release,
-                "languages": languages
-            }
+            "odoo": get_odoo_context(
+                version,
+                ref=ref,
+                release=release,
+                repo=repo,
+                languages=languages
+            )
         }
     elif service_file:
-        filename = service_file
-
-        services = toml.load(filename)
-
-        manifests = ServiceManifests.parse(services)
+        manifests = load_services(service_file)
 
         service = manifests.services[env].resolved
 
-        odoo_version = service.odoo.version
-
-        odoo_config = service.odoo
-        repo_config = odoo_config.repo
-
         base_context = {
-            "odoo": {
-                "version": odoo_version,
-                "ref": repo_config.ref,
-                "repo": repo_config.url or repo,
-                "release": "",
-                "languages": odoo_config.languages or languages
-            }
+            "odoo": get_service_odoo_context(service, repo, languages)
         }
     elif stdin:
         base_context = get_context()
 
-    context = make_context(base_context)
+    return apply_context_options(base_context, **options)
+
+
+def apply_context_options(
+    base_context,
+    cache_mounts,
+    multi_stage,
+    step_markers,
+    instrument,
+    arches,
+    profile,
+    precompile,
+    runtime_tuning,
+    installer,
+    proxy,
+    source_strategy,
+    source_checksum,
+    resolve
+):
+    """
+    Apply the options of the context command to a base context.
+
+    Returns:
+        HashMap<str, Any>: The context returned by `make_context`.
+    """
+    if cache_mounts:
+        base_context['buildkit'] = {"cache_mounts": True}
+
+    if multi_stage:
+        base_context['multi_stage'] = True
+
+    if step_markers:
+        base_context['step_markers'] = True
+
+    if instrument:
+        base_context['instrument'] = True
+
+    if len(arches) == 1:
+        base_context['os_arch'] = arches[0]
+    elif arches:
+        base_context['multi_arch'] = {"arches": list(arches)}
+
+    if profile != "default":
+        base_context['profile'] = profile
+
+    if precompile:
+        base_context['precompile'] = {
+            "optimize": [int(level) for level in precompile.split(',')]
+        }
+
+    if runtime_tuning:
+        base_context['runtime_tuning'] = True
+
+    if installer != "pip":
+        base_context['installer'] = installer
+
+    if proxy:
+        base_context['proxy'] = True
+
+    if source_strategy != "git":
+        base_context['odoo_source'] = {
+            "strategy": source_strategy,
+            "checksum": source_checksum,
+        }
+
+    if resolve:
+        base_context['resolve'] = True
+
+    return make_context(base_context)
+
+
+@click.command()
+@add_context_options
+def context(**options):
+    try:
+        context = build_context(**options)
+    except (OSError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
 
     return exit_ok(context)
@@ -0,0 +1,43 @@
+import click
+from .. import transformers
+from ..debs import DEB_MODES
+from ..tools import exit_ok, exit_err, get_context
+
+
+@click.command()
+@click.option(
+    '-o',
+    '--output',
+    default="debs",
+    help="Directory of the build context in which deb files are stored"
+)
+@click.option(
+    '--mode',
+    type=click.Choice(DEB_MODES),
+    default="copy",
+    help=(
+        "copy the deb files from the build context or "
+        "add them from their url with their checksum"
+    )
+)
+@click.option(
+    '--cache-dir',
+    help="Root of the local cache"
+)
+def debs(output, mode, cache_dir):
+    """
+    Pin the deb files of a context with their sha256.
+    """
+    context = get_context()
+
+    try:
+        transformers.debs(
+            context,
+            output,
+            mode=mode,
+            cache_dir=cache_dir
+        )
+    except (OSError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok(context)
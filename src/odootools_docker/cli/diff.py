@@ -0,0 +1,28 @@
+import json
+import click
+from ..fingerprint import get_fingerprints, diff_fingerprints
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@click.argument('old', type=click.File('r'))
+@click.argument('new', type=click.File('r'))
+@click.option(
+    '--exit-code',
+    help="Exit with an error code when the Dockerfile changed",
+    is_flag=True,
+    default=False
+)
+def diff(old, new, exit_code):
+    """
+    Compare two contexts and find the first invalidated step.
+    """
+    result = diff_fingerprints(
+        get_fingerprints(json.load(old)),
+        get_fingerprints(json.load(new))
+    )
+
+    if exit_code and result['changed']:
+        return exit_err(result)
+
+    return exit_ok(result)
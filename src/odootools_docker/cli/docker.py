@@ -1,16 +1,62 @@
 import click
-from .wkhtmltopdf import wkhtmltopdf
-from .context import context
-from .build import render
+from importlib import import_module
 
 
-@click.group()
-def docker():
+class LazyGroup(click.Group):
     """
-    Main docker group of commands.
+    Group of commands loaded only when they are invoked.
+
+    Commands are registered with a path in the form `module:attribute`.
+    The module of a command is imported only when the command is
+    requested so running one command doesn't import the others.
     """
 
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        commands = set(super().list_commands(ctx))
+        commands.update(self.lazy_commands)
+        return sorted(commands)
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands:
+            return self.load_command(cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+    def load_command(self, cmd_name):
+        module_name, attr = self.lazy_commands[cmd_name].split(':', 1)
+        module = import_module(module_name, __package__)
+        return getattr(module, attr)
 
-docker.add_command(wkhtmltopdf)
-docker.add_command(context)
-docker.add_command(render)
+
+commands = {
+    "wkhtmltopdf": ".wkhtmltopdf:wkhtmltopdf",
+    "keys": ".keys:keys",
+    "debs": ".debs:debs",
+    "wheelhouse": ".wheelhouse:wheelhouse",
+    "context": ".context:context",
+    "render": ".build:render",
+    "compile-templates": ".build:compile_templates",
+    "matrix": ".matrix:matrix",
+    "pipeline": ".pipeline:pipeline",
+    "bake": ".bake:bake",
+    "check-startup": ".startup:check_startup",
+    "plan": ".plan:plan",
+    "diff": ".diff:diff",
+    "inspect-layers": ".layers:inspect_layers",
+    "timing": ".timing:timing",
+    "proxy": ".proxy:proxy",
+    "bench": ".bench:bench",
+    "prefetch": ".prefetch:prefetch",
+    "resolve": ".resolve:resolve",
+}
+
+
+@click.group(cls=LazyGroup, lazy_commands=commands)
+def docker():
+    """
+    Main docker group of commands.
+    """
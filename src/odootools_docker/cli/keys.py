@@ -0,0 +1,39 @@
+import click
+from .. import transformers
+from ..keys import DEFAULT_KEYSERVER
+from ..tools import exit_ok, exit_err, get_context
+
+
+@click.command()
+@click.option(
+    '-o',
+    '--output',
+    default="keys",
+    help="Directory of the build context in which keys are stored"
+)
+@click.option(
+    '--keyserver',
+    default=DEFAULT_KEYSERVER,
+    help="Keyserver used to fetch keys defined by fingerprint"
+)
+@click.option(
+    '--cache-dir',
+    help="Root of the local cache"
+)
+def keys(output, keyserver, cache_dir):
+    """
+    Store the signing keys of the deb repositories in the build context.
+    """
+    context = get_context()
+
+    try:
+        transformers.keys(
+            context,
+            output,
+            keyserver=keyserver,
+            cache_dir=cache_dir
+        )
+    except (OSError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok(context)
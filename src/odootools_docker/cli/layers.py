@@ -0,0 +1,26 @@
+import click
+from ..layers import inspect_image
+from ..tools import exit_ok, exit_err
+
+
+@click.command('inspect-layers')
+@click.argument('image', type=click.File('rb'))
+@click.option(
+    '--top',
+    type=int,
+    default=10,
+    help="Number of largest files listed per layer"
+)
+def inspect_layers(image, top):
+    """
+    Report the size of each layer of an image saved with `docker save`.
+
+    Layers are attributed to the steps of the Dockerfile when it was
+    rendered with `--step-markers`. Use `-` to read the image from stdin.
+    """
+    try:
+        report = inspect_image(image, top=top)
+    except ValueError as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok(report)
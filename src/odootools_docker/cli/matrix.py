@@ -0,0 +1,72 @@
+import click
+from ..matrix import parse_variant, render_matrix
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@click.option(
+    '-v',
+    '--version',
+    'versions',
+    multiple=True,
+    required=True,
+    help="Odoo Version as VERSION or VERSION@REF. Can be repeated."
+)
+@click.option(
+    '--arch',
+    'arches',
+    multiple=True,
+    default=["amd64"],
+    help="Docker architecture. Can be repeated."
+)
+@click.option(
+    '--repo',
+    default="https://github.com/odoo/odoo.git"
+)
+@click.option(
+    '--languages',
+    default="all",
+    help="Languages to keep when setting odoo as a csv value",
+)
+@click.option(
+    '-o',
+    '--output',
+    default="dockerfiles",
+    help="Directory in which a directory per variant is created"
+)
+@click.option(
+    '-j',
+    '--jobs',
+    type=int,
+    default=None,
+    help="Number of processes used to render, defaults to the cpu count"
+)
+@click.option(
+    '--resolve',
+    is_flag=True,
+    default=False,
+    help="Resolve the refs and checksums of all the variants concurrently"
+)
+def matrix(versions, arches, repo, languages, output, jobs, resolve):
+    """
+    Render a Dockerfile for each version and architecture.
+    """
+    variants = [
+        parse_variant(version, arch)
+        for version in versions
+        for arch in arches
+    ]
+
+    try:
+        files = render_matrix(
+            variants,
+            repo,
+            languages,
+            output,
+            jobs=jobs,
+            resolve=resolve
+        )
+    except (OSError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok(files)
@@ -0,0 +1,63 @@
+import json
+import subprocess
+import click
+from .context import add_context_options, build_context
+from .. import renderer
+from ..transformers import apply_transformers
+from ..tools import exit_err
+
+
+@click.command()
+@add_context_options
+@click.option(
+    '-t',
+    '--transform',
+    'transforms',
+    multiple=True,
+    help=(
+        "Transformer to apply as NAME or NAME:key=value,key=value. "
+        "Can be repeated, transformers are applied in order."
+    )
+)
+@click.option(
+    '-o',
+    '--output',
+    help="Write the Dockerfile in this file instead of stdout"
+)
+@click.option(
+    '--manifest',
+    help="Write the fingerprints of the rendered steps in this file"
+)
+@click.option(
+    '--dump-context',
+    help="Write the transformed context in this file"
+)
+def pipeline(transforms, output, manifest, dump_context, **options):
+    """
+    Build, transform and render a context in a single process.
+    """
+    try:
+        context = build_context(**options)
+        context = apply_transformers(context, transforms)
+    except (OSError, ValueError, subprocess.CalledProcessError) as exc:
+        return exit_err({"error": str(exc)})
+
+    if dump_context:
+        with open(dump_context, 'w') as fout:
+            json.dump(context, fout)
+
+    dockerfile = renderer.render(context)
+
+    if output:
+        with open(output, 'w') as fout:
+            fout.write(dockerfile)
+    else:
+        print(dockerfile)
+
+    if manifest:
+        from ..fingerprint import get_fingerprints
+
+        with open(manifest, 'w') as fout:
+            json.dump(get_fingerprints(context), fout, indent=2)
+
+    return True
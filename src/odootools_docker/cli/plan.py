@@ -0,0 +1,22 @@
+import click
+from ..planner import plan_steps, format_report
+from ..tools import exit_ok, get_context
+
+
+@click.command()
+@click.option(
+    '--report',
+    help="Print the predicted cache boundaries to stderr",
+    is_flag=True,
+    default=False
+)
+def plan(report):
+    """
+    Reorder the steps of a context to maximize cache hits.
+    """
+    context, plan_report = plan_steps(get_context())
+
+    if report:
+        click.echo(format_report(plan_report), err=True)
+
+    exit_ok(context)
@@ -0,0 +1,58 @@
+import click
+from ..source import prefetch_repo, prefetch_archive
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@click.option(
+    '-v',
+    '--version',
+    help="Odoo Version"
+)
+@click.option(
+    '--ref',
+    help="Git reference to fetch, the version by default",
+    default=""
+)
+@click.option(
+    '--release',
+    help="Nightly release to fetch instead of a git reference",
+    default=""
+)
+@click.option(
+    '--repo',
+    default="https://github.com/odoo/odoo.git"
+)
+@click.option(
+    '-o',
+    '--output',
+    default="odoo-source",
+    help="Bare repository in which git references are fetched"
+)
+@click.option(
+    '--cache-dir',
+    help="Root of the local cache of the release archives"
+)
+def prefetch(version, ref, release, repo, output, cache_dir):
+    """
+    Fetch the sources of Odoo before the build.
+
+    Git references are fetched into a local bare repository to pass
+    to the build with `--build-context odoo-source=<output>` and the
+    prefetch source strategy. Releases are fetched into the local cache
+    and their sha256 is returned for the archive source strategy.
+    """
+    try:
+        if release:
+            path, checksum = prefetch_archive(
+                version,
+                release,
+                cache_dir=cache_dir
+            )
+            return exit_ok({"path": path, "checksum": checksum})
+
+        commit = prefetch_repo(repo, ref or version, output)
+    except (OSError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok({"path": output, "commit": commit})
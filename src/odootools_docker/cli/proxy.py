@@ -0,0 +1,38 @@
+import click
+from ..proxy import write_secrets, get_secret_args
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@click.option(
+    '-o',
+    '--output',
+    default=".odootools-secrets",
+    help="Directory of the secrets, it shouldn't be in the build context"
+)
+@click.option(
+    '--apt-proxy',
+    envvar="ODOOTOOLS_APT_PROXY",
+    help="Url of the caching proxy of apt like http://localhost:3142"
+)
+@click.option(
+    '--index-url',
+    envvar="ODOOTOOLS_INDEX_URL",
+    help="Url of the python index mirror"
+)
+def proxy(output, apt_proxy, index_url):
+    """
+    Write the secrets configuring the proxies of a build.
+
+    The Dockerfile must be rendered with `--proxy`. The arguments
+    returned pass the secrets to `docker build`.
+    """
+    if not apt_proxy and not index_url:
+        return exit_err({"error": "No proxy to configure"})
+
+    secrets = write_secrets(output, apt_proxy=apt_proxy, index_url=index_url)
+
+    return exit_ok({
+        "secrets": secrets,
+        "args": get_secret_args(secrets),
+    })
@@ -0,0 +1,45 @@
+import click
+from .. import transformers
+from ..tools import exit_ok, exit_err, get_context
+
+
+@click.command()
+@click.option(
+    '--ttl',
+    type=int,
+    default=3600,
+    help="Seconds during which cached http responses aren't revalidated"
+)
+@click.option(
+    '--concurrency',
+    type=int,
+    default=8,
+    help="Number of fetches run at the same time"
+)
+@click.option(
+    '--cache-dir',
+    help="Root of the local cache"
+)
+@click.option(
+    '--checksums/--no-checksums',
+    default=True,
+    help="Download the deb files and archives to compute their checksum"
+)
+def resolve(ttl, concurrency, cache_dir, checksums):
+    """
+    Resolve the refs, releases, checksums and keys of a context.
+    """
+    context = get_context()
+
+    try:
+        transformers.resolve(
+            context,
+            ttl=ttl,
+            concurrency=concurrency,
+            cache_dir=cache_dir,
+            checksums=checksums
+        )
+    except (OSError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok(context)
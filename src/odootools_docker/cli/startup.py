@@ -0,0 +1,48 @@
+import click
+from ..startup import check_budget, DEFAULT_BUDGET
+from ..tools import exit_ok, exit_err
+
+
+@click.command('check-startup')
+@click.option(
+    '--budget',
+    type=float,
+    default=DEFAULT_BUDGET,
+    help="Maximum import time of a command in milliseconds"
+)
+@click.option(
+    '--repeat',
+    type=int,
+    default=3,
+    help="Number of measurements per command"
+)
+@click.option(
+    '-c',
+    '--command',
+    'names',
+    multiple=True,
+    help="Command to check, all commands are checked by default"
+)
+def check_startup(budget, repeat, names):
+    """
+    Fail when importing a command goes over the startup budget.
+    """
+    from .docker import commands
+
+    if names:
+        commands = {
+            name: commands[name]
+            for name in names
+        }
+
+    commands = {
+        name: "odootools_docker.cli{}".format(path)
+        for name, path in commands.items()
+    }
+
+    results = check_budget(commands, budget=budget, repeat=repeat)
+
+    if all(result['ok'] for result in results.values()):
+        return exit_ok(results)
+    else:
+        return exit_err(results)
@@ -0,0 +1,84 @@
+import json
+import click
+from ..timing import (
+    parse_log,
+    get_timings,
+    compare_timings,
+    format_timings,
+    format_regressions,
+)
+from ..tools import exit_ok, exit_err
+
+
+@click.command()
+@click.argument('log', type=click.File('r'))
+@click.option(
+    '--format',
+    'output_format',
+    type=click.Choice(['json', 'text']),
+    default='json',
+    help="Format of the report"
+)
+@click.option(
+    '--save',
+    type=click.File('w'),
+    help="Store the report as a baseline in this file"
+)
+@click.option(
+    '--compare',
+    type=click.File('r'),
+    help="JSON report of a previous build to compare with"
+)
+@click.option(
+    '--threshold',
+    type=float,
+    default=0.2,
+    help="Relative slowdown tolerated when comparing"
+)
+@click.option(
+    '--min-delta',
+    type=float,
+    default=1.0,
+    help="Slowdown in seconds ignored when comparing"
+)
+def timing(log, output_format, save, compare, threshold, min_delta):
+    """
+    Report the time spent in each step from a build log.
+
+    The Dockerfile must be rendered with `--instrument` and built with
+    `--progress=plain`. Use `-` to read the log from stdin.
+    """
+    report = get_timings(parse_log(log))
+
+    if save:
+        json.dump(report, save, indent=2, sort_keys=True)
+
+    regressions = []
+
+    if compare:
+        regressions = compare_timings(
+            json.load(compare),
+            report,
+            threshold=threshold,
+            min_delta=min_delta
+        )
+
+    if output_format == 'text':
+        click.echo(format_timings(report))
+
+        if regressions:
+            click.echo("\nRegressions:")
+            click.echo(format_regressions(regressions))
+            raise click.exceptions.Exit(1)
+
+        return
+
+    if compare:
+        result = {"report": report, "regressions": regressions}
+    else:
+        result = report
+
+    if regressions:
+        return exit_err(result)
+
+    return exit_ok(result)
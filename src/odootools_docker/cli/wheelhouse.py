@@ -0,0 +1,49 @@
+import subprocess
+import click
+from .. import transformers
+from ..tools import exit_ok, exit_err, get_context
+
+
+@click.command()
+@click.option(
+    '-o',
+    '--output',
+    default="wheelhouse",
+    help="Directory of the build context in which wheels are stored"
+)
+@click.option(
+    '-r',
+    '--requirement',
+    'requirements',
+    multiple=True,
+    help="Additional requirement file. Can be repeated."
+)
+@click.option(
+    '--python',
+    help=(
+        "Build wheels with this interpreter instead of downloading "
+        "binary wheels for the platform of the image"
+    )
+)
+@click.option(
+    '--index-url',
+    help="Index used instead of PyPI"
+)
+def wheelhouse(output, requirements, python, index_url):
+    """
+    Collect the wheels of a context into a local wheelhouse.
+    """
+    context = get_context()
+
+    try:
+        transformers.wheelhouse(
+            context,
+            output,
+            requirements=requirements,
+            python=python,
+            index_url=index_url
+        )
+    except (subprocess.CalledProcessError, ValueError) as exc:
+        return exit_err({"error": str(exc)})
+
+    return exit_ok(context)
@@ -0,0 +1,190 @@
+import os
+import json
+import tempfile
+import threading
+
+
+# Stage providing the deb files with a checksum and the directory in
+# which it's mounted while installing the base dependencies.
+DEBS_STAGE = "stage_debs"
+DEBS_MOUNT = "/tmp/deb-files"
+
+DEB_MODES = [
+    "copy",
+    "add",
+]
+
+# Serializes the updates of the index of the cache, deb files are
+# fetched from many threads by the resolver.
+index_lock = threading.Lock()
+
+
+def is_pinned(deb):
+    """
+    Returns True when a deb file is provided by the debs stage.
+
+    Deb files with a sha256 are fetched by BuildKit with
+    `ADD --checksum` and deb files stored in the build context are
+    copied. The other deb files are downloaded with curl.
+    """
+    return bool(deb.get('sha256') or deb.get('file'))
+
+
+def ensure_debs_stage(context):
+    """
+    Add the debs stage to a context having pinned deb files.
+
+    Returns:
+        HashMap<str, Any>: The updated context.
+    """
+    stages = context.setdefault('stages', [])
+
+    pinned = any(is_pinned(deb) for deb in context.get('deb_files', []))
+
+    if pinned and DEBS_STAGE not in stages:
+        stages.insert(0, DEBS_STAGE)
+
+    return context
+
+
+def load_cache_index(cache_path):
+    try:
+        with open(os.path.join(cache_path, "index.json")) as fin:
+            return json.load(fin)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_cache_index(cache_path, url, checksum):
+    """
+    Add the checksum of a url to the index of the cache.
+
+    The index is read again under the lock so the entries added by
+    other threads are kept, and written through a temporary file of
+    its own so concurrent processes never replace each other's file.
+    """
+    filename = os.path.join(cache_path, "index.json")
+
+    with index_lock:
+        index = load_cache_index(cache_path)
+        index[url] = checksum
+
+        fd, tmp_filename = tempfile.mkstemp(dir=cache_path, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "w") as fout:
+                json.dump(index, fout, indent=2, sort_keys=True)
+
+            os.replace(tmp_filename, filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+
+def fetch_deb(url, sha256=None, cache_dir=None):
+    """
+    Fetch a deb file through a content addressed cache.
+
+    Files are stored by sha256 in the `debs` directory of the local
+    cache. An index maps urls to their sha256 so each url is
+    downloaded once, even when its checksum isn't known yet.
+
+    Args:
+      url (Str): The url of the deb file.
+      sha256 (Str): The expected sha256 of the file.
+      cache_dir (Str): The root of the local cache.
+
+    Returns:
+        Tuple<Str, Str>: The path of the file in the cache and its
+        sha256.
+
+    Raises:
+        ValueError: When the file doesn't match the expected sha256.
+    """
+    from .fetch import get_cache_dir, download
+
+    cache_path = get_cache_dir('debs', cache_dir)
+    index = load_cache_index(cache_path)
+
+    checksum = sha256 or index.get(url)
+
+    if checksum:
+        path = os.path.join(cache_path, "{}.deb".format(checksum))
+
+        if os.path.exists(path):
+            return path, checksum
+
+    fd, partial = tempfile.mkstemp(dir=cache_path, suffix=".partial")
+    os.close(fd)
+
+    try:
+        checksum = download(url, partial, sha256=sha256)
+        path = os.path.join(cache_path, "{}.deb".format(checksum))
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    update_cache_index(cache_path, url, checksum)
+
+    return path, checksum
+
+
+def vendor_debs(context, output="debs", mode="copy", cache_dir=None):
+    """
+    Pin the deb files of a context with their sha256.
+
+    Each deb file is fetched once in the local cache to get its sha256.
+    In copy mode, the file is also copied in the output directory of
+    the build context and the debs stage copies it. In add mode, the
+    debs stage downloads it with `ADD --checksum`. In both modes the
+    deb files are mounted in the step installing the base dependencies
+    instead of being downloaded by curl in it. Deb files with build
+    arguments in their url are left as is. In copy mode, the output
+    must be in the build context, the current directory.
+
+    Args:
+      context (HashMap<str, Any>): The context to update.
+      output (Str): Directory in the build context where debs are stored.
+      mode (Str): `copy` or `add`.
+      cache_dir (Str): The root of the local cache.
+
+    Returns:
+        HashMap<str, Any>: The updated context.
+
+    Raises:
+        ValueError: When a deb file doesn't match its sha256, the mode
+        doesn't exist or the output is outside the build context.
+    """
+    from .fetch import copy_file, get_context_path
+
+    if mode not in DEB_MODES:
+        raise ValueError("Unknown mode {}".format(mode))
+
+    if mode == "copy":
+        get_context_path(output)
+
+    for deb in context.get('deb_files', []):
+        # Urls expanded during the build, like the ones of the multi
+        # arch mode, can't be fetched ahead of the build.
+        if "${" in deb['url']:
+            continue
+
+        cached, checksum = fetch_deb(
+            deb['url'],
+            sha256=deb.get('sha256'),
+            cache_dir=cache_dir
+        )
+
+        deb['sha256'] = checksum
+
+        if mode == "copy":
+            path = os.path.join(output, "{}.deb".format(deb['name']))
+            copy_file(cached, path)
+
+            deb['file'] = {
+                "path": get_context_path(path),
+                "sha256": checksum,
+            }
+
+    return ensure_debs_stage(context)
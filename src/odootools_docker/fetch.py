@@ -0,0 +1,165 @@
+import os
+import shutil
+import hashlib
+import tempfile
+from urllib.request import urlopen
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get(
+        'XDG_CACHE_HOME',
+        os.path.join(os.path.expanduser('~'), '.cache')
+    ),
+    'odootools_docker'
+)
+
+
+def get_cache_dir(name, cache_dir=None):
+    """
+    Returns a directory of the local cache.
+
+    The cache is located in `ODOOTOOLS_DOCKER_FETCH_CACHE` or in
+    `~/.cache/odootools_docker` by default.
+
+    Args:
+      name (Str): The name of the directory in the cache.
+      cache_dir (Str): The root of the cache.
+
+    Returns:
+        Str: The path of the directory.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get(
+            'ODOOTOOLS_DOCKER_FETCH_CACHE',
+            DEFAULT_CACHE_DIR
+        )
+
+    path = os.path.join(cache_dir, name)
+    os.makedirs(path, exist_ok=True)
+
+    return path
+
+
+def sha256_file(filename):
+    """
+    Returns the sha256 hex digest of a file.
+    """
+    digest = hashlib.sha256()
+
+    with open(filename, 'rb') as fin:
+        for chunk in iter(lambda: fin.read(65536), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def download(url, filename, sha256=None, timeout=60):
+    """
+    Download a url into a file.
+
+    The file is written in a temporary file first and moved into
+    place once the download is complete.
+
+    Args:
+      url (Str): The url to download.
+      filename (Str): The destination of the file.
+      sha256 (Str): The expected sha256 of the file.
+      timeout (int): Timeout in seconds.
+
+    Returns:
+        Str: The sha256 of the downloaded file.
+
+    Raises:
+        ValueError: When the checksum doesn't match the expected one.
+    """
+    dirname = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(dirname, exist_ok=True)
+
+    digest = hashlib.sha256()
+
+    fd, tmp_filename = tempfile.mkstemp(dir=dirname)
+
+    try:
+        with os.fdopen(fd, 'wb') as fout:
+            with urlopen(url, timeout=timeout) as response:
+                for chunk in iter(lambda: response.read(65536), b''):
+                    digest.update(chunk)
+                    fout.write(chunk)
+
+        checksum = digest.hexdigest()
+
+        if sha256 and checksum != sha256:
+            raise ValueError(
+                "Checksum mismatch for {}: expected {} got {}".format(
+                    url, sha256, checksum
+                )
+            )
+
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+    return checksum
+
+
+def fetch_cached(url, cache_name, filename, cache_dir=None):
+    """
+    Fetch a url through the local cache.
+
+    Args:
+      url (Str): The url to fetch.
+      cache_name (Str): The directory of the cache to use.
+      filename (Str): The name of the file in the cache.
+      cache_dir (Str): The root of the cache.
+
+    Returns:
+        Str: The path of the file in the cache.
+    """
+    path = os.path.join(get_cache_dir(cache_name, cache_dir), filename)
+
+    if not os.path.exists(path):
+        download(url, path)
+
+    return path
+
+
+def copy_file(source, target):
+    """
+    Copy a file unless the target has the same content.
+
+    Returns:
+        Str: The sha256 of the file.
+    """
+    checksum = sha256_file(source)
+
+    if os.path.exists(target) and sha256_file(target) == checksum:
+        return checksum
+
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    shutil.copyfile(source, target)
+
+    return checksum
+
+
+def get_context_path(path):
+    """
+    Returns the path of a file relative to the build context.
+
+    The Dockerfile is built from the current directory, so files
+    copied by the Dockerfile must be stored under it.
+
+    Returns:
+        Str: The relative path to use in a COPY instruction.
+
+    Raises:
+        ValueError: When the path is outside the build context.
+    """
+    relpath = os.path.relpath(os.path.abspath(path), os.getcwd())
+
+    if relpath == os.pardir or relpath.startswith(os.pardir + os.sep):
+        raise ValueError(
+            "{} is outside the build context {}".format(path, os.getcwd())
+        )
+
+    return relpath.replace(os.sep, '/')
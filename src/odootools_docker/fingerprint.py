@@ -0,0 +1,138 @@
+import copy
+import hashlib
+
+from .planner import VOLATILE_LABELS
+from .renderer import get_environment, render
+
+
+def get_stable_context(context):
+    """
+    Returns a copy of the context without volatile values.
+
+    The labels in VOLATILE_LABELS change on every build without
+    changing the content of the image. They're blanked so they don't
+    change the fingerprints.
+
+    Returns:
+        HashMap<str, Any>: The stable context.
+    """
+    context = copy.deepcopy(context)
+
+    for key in ('labels', 'volatile_labels'):
+        labels = context.get(key) or {}
+
+        for label in VOLATILE_LABELS:
+            if label in labels:
+                labels[label] = ""
+
+    return context
+
+
+def get_hash(data):
+    """
+    Returns the sha256 hex digest of a string.
+    """
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def get_fingerprints(context, env=None):
+    """
+    Compute the fingerprints of a context.
+
+    Each stage and step is rendered on its own and hashed. The chain
+    hash of a step combines the hash of the step with the chain hash
+    of the previous one the same way the docker cache does. When the
+    chain hash of a step changes, the step and all the steps after it
+    have to be rebuilt.
+
+    Args:
+      context (HashMap<str, Any>): The context to fingerprint.
+      env (Environment): The jinja environment used to render.
+
+    Returns:
+        HashMap<Str, Any>: The hash of the Dockerfile and the name,
+        hash and chain hash of each rendered part.
+    """
+    context = get_stable_context(context)
+
+    if env is None:
+        env = get_environment(context.get('template_dirs', []))
+
+    parts = [
+        (stage, "stage")
+        for stage in context.get('stages', [])
+    ]
+    parts.append(("header", "header"))
+    parts += [
+        (step, "step")
+        for step in context['steps']
+    ]
+
+    chain = ""
+    steps = []
+
+    for name, kind in parts:
+        template = env.get_template("{}.jinja".format(name))
+        step_hash = get_hash(template.render(**context))
+
+        chain = get_hash(chain + step_hash)
+
+        steps.append({
+            "name": name,
+            "kind": kind,
+            "hash": step_hash,
+            "chain": chain,
+        })
+
+    return {
+        "dockerfile": get_hash(render(context, env=env)),
+        "steps": steps,
+    }
+
+
+def diff_fingerprints(old, new):
+    """
+    Compare the fingerprints of two contexts.
+
+    Returns:
+        HashMap<Str, Any>: Whether the Dockerfile changed, the first
+        invalidated step and the steps that changed.
+    """
+    old_steps = old['steps']
+    new_steps = new['steps']
+
+    first = None
+
+    for index, step in enumerate(new_steps):
+        if (
+            index >= len(old_steps) or
+            old_steps[index]['chain'] != step['chain']
+        ):
+            first = step['name']
+            break
+
+    old_hashes = {
+        step['name']: step['hash']
+        for step in old_steps
+    }
+
+    changed = [
+        step['name']
+        for step in new_steps
+        if old_hashes.get(step['name']) != step['hash']
+    ]
+
+    new_names = set(step['name'] for step in new_steps)
+
+    removed = [
+        step['name']
+        for step in old_steps
+        if step['name'] not in new_names
+    ]
+
+    return {
+        "changed": old['dockerfile'] != new['dockerfile'],
+        "first_invalidated": first,
+        "steps": changed,
+        "removed": removed,
+    }
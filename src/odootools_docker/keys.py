@@ -0,0 +1,107 @@
+import os
+import hashlib
+
+from .fetch import fetch_cached, copy_file, get_context_path
+
+
+DEFAULT_KEYSERVER = "https://keyserver.ubuntu.com"
+
+PGP_HEADER = b"-----BEGIN PGP PUBLIC KEY BLOCK-----"
+
+
+def get_key_url(repo, keyserver=DEFAULT_KEYSERVER):
+    """
+    Returns the url of the signing key of a repository.
+
+    Repositories with a `key` fingerprint are fetched from the
+    keyserver. Repositories with a `key_url` are fetched from it.
+
+    Returns:
+        Str: The url of the key or None if the repository has no key.
+    """
+    if repo.get('key_url'):
+        return repo['key_url']
+
+    if repo.get('key'):
+        url_format = "{keyserver}/pks/lookup?op=get&options=mr&search=0x{key}"
+
+        return url_format.format(
+            keyserver=keyserver.rstrip('/'),
+            key=repo['key']
+        )
+
+    return None
+
+
+def fetch_key(url, cache_dir=None):
+    """
+    Fetch a signing key in the local cache.
+
+    Returns:
+        Str: The path of the key in the cache.
+
+    Raises:
+        ValueError: When the url didn't return an armored PGP key.
+    """
+    cache_name = "{}.asc".format(
+        hashlib.sha256(url.encode('utf-8')).hexdigest()
+    )
+
+    cached = fetch_cached(url, 'keys', cache_name, cache_dir)
+
+    with open(cached, 'rb') as fin:
+        if PGP_HEADER not in fin.read():
+            os.remove(cached)
+            raise ValueError(
+                "{} didn't return an armored public key".format(url)
+            )
+
+    return cached
+
+
+def vendor_keys(
+    context,
+    output,
+    keyserver=DEFAULT_KEYSERVER,
+    cache_dir=None
+):
+    """
+    Store the signing keys of the deb_repos in the build context.
+
+    Each key is fetched once in the local cache and copied in the
+    output directory. The repository gets a `key_file` with the path
+    and checksum of the key, the rendered Dockerfile then copies the
+    key instead of contacting a keyserver. The path is relative to the
+    build context, the current directory.
+
+    Args:
+      context (HashMap<str, Any>): The context to update.
+      output (Str): Directory in the build context where keys are stored.
+      keyserver (Str): Url of the keyserver for keys defined by fingerprint.
+      cache_dir (Str): The root of the local cache.
+
+    Returns:
+        HashMap<str, Any>: The updated context.
+
+    Raises:
+        ValueError: When a downloaded key isn't an armored PGP key or
+        the output is outside the build context.
+    """
+    for repo in context.get('deb_repos', []):
+        url = get_key_url(repo, keyserver)
+
+        if not url:
+            continue
+
+        path = os.path.join(output, "{}.asc".format(repo['name']))
+        context_path = get_context_path(path)
+
+        cached = fetch_key(url, cache_dir)
+        checksum = copy_file(cached, path)
+
+        repo['key_file'] = {
+            "path": context_path,
+            "sha256": checksum,
+        }
+
+    return context
@@ -0,0 +1,247 @@
+import re
+import json
+import heapq
+import zlib
+import tarfile
+
+
+STEP_MARKER = "ODOOTOOLS_STEP"
+
+STEP_MARKER_RE = re.compile(r"{}=([\w.-]+)".format(STEP_MARKER))
+
+# Blobs smaller than this are read in memory to check if they are
+# json documents like the manifest or the image config.
+SMALL_BLOB_SIZE = 16 * 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class CountingReader(object):
+    """
+    File object wrapper counting the bytes read.
+
+    When compress is set, the bytes read are also compressed with zlib
+    to estimate the size of the data once compressed.
+    """
+
+    def __init__(self, fileobj, prefix=b"", compress=False):
+        self.fileobj = fileobj
+        self.prefix = prefix
+        self.size = 0
+        self.compressed = 0
+        self.compressor = zlib.compressobj(6) if compress else None
+
+    def read(self, size=-1):
+        if self.prefix:
+            if size is None or size < 0:
+                data = self.prefix + self.fileobj.read()
+                self.prefix = b""
+            else:
+                data = self.prefix[:size]
+                self.prefix = self.prefix[size:]
+                if len(data) < size:
+                    data += self.fileobj.read(size - len(data))
+        else:
+            data = self.fileobj.read(size)
+
+        self.size += len(data)
+
+        if self.compressor is not None:
+            self.compressed += len(self.compressor.compress(data))
+
+        return data
+
+    def drain(self):
+        """
+        Read the remaining bytes and finish the compression.
+        """
+        while self.read(65536):
+            pass
+
+        if self.compressor is not None:
+            self.compressed += len(self.compressor.flush())
+            self.compressor = None
+
+
+def inspect_layer(fileobj, size, top=10):
+    """
+    Read a layer archive without extracting it.
+
+    Args:
+      fileobj (File): The layer archive, it can be compressed with gzip.
+      size (int): The size of the archive as stored in the image.
+      top (int): The number of largest files to keep.
+
+    Returns:
+        HashMap<Str, Any>: The compressed and uncompressed size of the
+        layer and its largest files.
+    """
+    magic = fileobj.read(2)
+    gzipped = magic == GZIP_MAGIC
+
+    reader = CountingReader(fileobj, prefix=magic, compress=not gzipped)
+
+    files = []
+    count = 0
+
+    with tarfile.open(fileobj=reader, mode='r|*') as layer:
+        for member in layer:
+            if not member.isfile():
+                continue
+
+            count += 1
+            item = (member.size, member.name)
+
+            if len(files) < top:
+                heapq.heappush(files, item)
+            else:
+                heapq.heappushpop(files, item)
+
+        # Position in the decompressed stream once all members are read
+        offset = layer.offset
+
+    reader.drain()
+
+    if gzipped:
+        compressed = size
+        uncompressed = offset
+    else:
+        compressed = reader.compressed
+        uncompressed = size
+
+    return {
+        "compressed": compressed,
+        "uncompressed": uncompressed,
+        "files_count": count,
+        "files": [
+            {"path": name, "size": file_size}
+            for file_size, name in sorted(files, reverse=True)
+        ]
+    }
+
+
+def read_image(fileobj, top=10):
+    """
+    Read a `docker save` archive as a stream.
+
+    The archive is read sequentially so it can be read from a pipe.
+    Small json blobs are kept in memory and layers are inspected with
+    `inspect_layer` as they are found.
+
+    Returns:
+        Tuple<HashMap<Str, Any>, HashMap<Str, HashMap<Str, Any>>>: The
+        json documents and the inspected layers by path in the archive.
+    """
+    documents = {}
+    layers = {}
+
+    with tarfile.open(fileobj=fileobj, mode='r|*') as image:
+        for member in image:
+            if not member.isfile():
+                continue
+
+            blob = image.extractfile(member)
+
+            if member.size <= SMALL_BLOB_SIZE:
+                data = blob.read()
+
+                try:
+                    documents[member.name] = json.loads(data.decode('utf-8'))
+                    continue
+                except ValueError:
+                    pass
+
+                from io import BytesIO
+                blob = BytesIO(data)
+
+            try:
+                layers[member.name] = inspect_layer(blob, member.size, top)
+            except tarfile.TarError:
+                continue
+
+    return documents, layers
+
+
+def get_layer_steps(config):
+    """
+    Attribute the layers of an image to the steps that produced them.
+
+    The steps are found with the `ARG ODOOTOOLS_STEP=<step>` markers
+    rendered before each step when `step_markers` is enabled. Every
+    instruction following a marker belongs to its step until the next
+    marker.
+
+    Returns:
+        List<HashMap<Str, Str>>: The step and instruction of each layer.
+    """
+    step = None
+    result = []
+
+    for entry in config.get('history', []):
+        created_by = entry.get('created_by', '')
+        match = STEP_MARKER_RE.search(created_by)
+
+        if match:
+            step = match.group(1)
+
+        if entry.get('empty_layer'):
+            continue
+
+        result.append({
+            "step": step,
+            "created_by": created_by,
+        })
+
+    return result
+
+
+def inspect_image(fileobj, top=10):
+    """
+    Report the size of each layer of a `docker save` archive.
+
+    Args:
+      fileobj (File): The archive.
+      top (int): The number of largest files to list per layer.
+
+    Returns:
+        HashMap<Str, Any>: The layers with their step, size and largest
+        files and the total size of each step.
+    """
+    documents, layers = read_image(fileobj, top)
+
+    manifest = documents.get('manifest.json')
+
+    if not manifest:
+        raise ValueError("manifest.json not found in the archive")
+
+    manifest = manifest[0]
+    config = documents.get(manifest['Config'], {})
+
+    steps = get_layer_steps(config)
+
+    result = []
+    totals = {}
+
+    for index, path in enumerate(manifest['Layers']):
+        layer = dict(layers.get(path, {}))
+        layer['path'] = path
+
+        if index < len(steps):
+            layer.update(steps[index])
+        else:
+            layer.update({"step": None, "created_by": ""})
+
+        result.append(layer)
+
+        step_total = totals.setdefault(
+            layer['step'] or "",
+            {"compressed": 0, "uncompressed": 0}
+        )
+
+        for key in ("compressed", "uncompressed"):
+            step_total[key] += layer.get(key) or 0
+
+    return {
+        "layers": result,
+        "steps": totals,
+    }
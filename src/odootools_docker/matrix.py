@@ -0,0 +1,155 @@
+import os
+
+from .renderer import (
+    get_environment,
+    get_odoo_context,
+    get_resolve_config,
+    make_context,
+    render,
+    warm_environment,
+)
+
+
+def parse_variant(spec, arch):
+    """
+    Parse a variant specification.
+
+    A variant is defined as `VERSION` or `VERSION@REF`.
+
+    Args:
+      spec (Str): The variant specification.
+      arch (Str): The docker architecture of the variant.
+
+    Returns:
+        HashMap<Str, Str>: The version, ref, arch and name of the variant.
+    """
+    if '@' in spec:
+        version, ref = spec.split('@', 1)
+    else:
+        version, ref = spec, ""
+
+    parts = [version]
+
+    if ref:
+        parts.append(ref.replace('/', '-'))
+
+    parts.append(arch)
+
+    return {
+        "version": version,
+        "ref": ref,
+        "arch": arch,
+        "name": "-".join(parts)
+    }
+
+
+def make_variant_context(variant, repo, languages):
+    """
+    Returns the context of a variant.
+
+    Returns:
+        HashMap<str, Any>: A context that can be rendered.
+    """
+    odoo = get_odoo_context(
+        variant['version'],
+        ref=variant['ref'],
+        repo=repo,
+        languages=languages
+    )
+
+    context = make_context({"odoo": odoo, "os_arch": variant['arch']})
+
+    return context
+
+
+def render_variant(variant, repo, languages, output, context=None):
+    """
+    Render the Dockerfile of a variant in the output directory.
+
+    Each variant is written in its own directory so it can be used
+    as a build context. The context of the variant is built unless
+    it's passed.
+
+    Returns:
+        Str: The path of the rendered Dockerfile.
+    """
+    if context is None:
+        context = make_variant_context(variant, repo, languages)
+
+    target_dir = os.path.join(output, variant['name'])
+    os.makedirs(target_dir, exist_ok=True)
+
+    filename = os.path.join(target_dir, "Dockerfile")
+
+    with open(filename, "w") as fout:
+        fout.write(render(context))
+
+    return filename
+
+
+def render_matrix(
+    variants,
+    repo,
+    languages,
+    output,
+    jobs=None,
+    resolve=False
+):
+    """
+    Render all the variants of a matrix.
+
+    The shared environment is compiled once before the process pool
+    is started. Workers forked from this process inherit the compiled
+    templates and don't have to compile them again.
+
+    With `resolve`, the contexts of all the variants are built and
+    resolved together by `resolver.resolve_contexts` before being
+    rendered, so the refs shared by the variants are resolved once.
+
+    Args:
+      variants (List<HashMap<Str, Str>>): Variants returned by
+        `parse_variant`.
+      repo (Str): The odoo repository.
+      languages (Str): The languages to keep.
+      output (Str): The output directory.
+      jobs (int): The number of processes to use. Variants are rendered
+        in the current process when set to 1.
+      resolve (bool): Resolve the metadata of the contexts.
+
+    Returns:
+        List<Str>: The paths of the rendered Dockerfiles.
+    """
+    warm_environment(get_environment())
+
+    contexts = [None] * len(variants)
+
+    if resolve:
+        from .resolver import resolve_contexts
+
+        contexts = [
+            make_variant_context(variant, repo, languages)
+            for variant in variants
+        ]
+        resolve_contexts(contexts, **get_resolve_config({"resolve": True}))
+
+    if jobs == 1 or len(variants) < 2:
+        return [
+            render_variant(variant, repo, languages, output, context)
+            for variant, context in zip(variants, contexts)
+        ]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                render_variant,
+                variant,
+                repo,
+                languages,
+                output,
+                context
+            )
+            for variant, context in zip(variants, contexts)
+        ]
+        return [future.result() for future in futures]
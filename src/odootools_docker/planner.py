@@ -0,0 +1,356 @@
+import copy
+
+
+# Inputs of a step ordered from the one changing the least often to
+# the one changing the most often.
+INPUTS = [
+    "os",
+    "user",
+    "packages",
+    "odoo",
+    "date",
+]
+
+# Known steps with the inputs they depend on and the steps that
+# must be rendered before them. Steps flagged as metadata only
+# define metadata like ENV or LABEL and don't run anything in the
+# image.
+STEPS = {
+    "setup_env": {
+        "inputs": ["os"],
+        "after": [],
+        "metadata": True,
+    },
+    "setup_volatile_env": {
+        "inputs": ["odoo"],
+        "after": [],
+        "metadata": True,
+    },
+    "setup_base_dependencies": {
+        "inputs": ["os", "packages"],
+        "after": ["setup_env"],
+    },
+    "setup_odoo": {
+        "inputs": ["os", "packages", "odoo"],
+        "after": ["setup_base_dependencies"],
+    },
+    "setup_odoo_prebuilt": {
+        "inputs": ["os", "odoo"],
+        "after": ["setup_base_dependencies"],
+    },
+    "precompile": {
+        "inputs": ["os", "packages", "odoo"],
+        "after": ["setup_odoo", "setup_odoo_prebuilt"],
+    },
+    "runtime_tuning": {
+        "inputs": ["os", "packages"],
+        "after": ["setup_base_dependencies"],
+    },
+    "prepare_user": {
+        "inputs": ["os", "user"],
+        "after": ["setup_base_dependencies"],
+    },
+    "setup_labels": {
+        "inputs": ["odoo"],
+        "after": [],
+        "metadata": True,
+    },
+    "setup_volatile_labels": {
+        "inputs": ["date"],
+        "after": [],
+        "metadata": True,
+    },
+    "setup_command": {
+        "inputs": ["os"],
+        "after": ["*"],
+        "metadata": True,
+    },
+}
+
+VOLATILE_ENVIRONMENTS = [
+    "ODOO_VERSION",
+    "ODOO_RELEASE",
+]
+
+VOLATILE_LABELS = [
+    "org.opencontainers.image.created",
+]
+
+# Values that can be split out of a step with the input they depend on.
+SPLITS = [
+    {
+        "source": "environments",
+        "target": "volatile_environments",
+        "step": "setup_env",
+        "volatile_step": "setup_volatile_env",
+        "keys": VOLATILE_ENVIRONMENTS,
+        "input": "odoo",
+    },
+    {
+        "source": "labels",
+        "target": "volatile_labels",
+        "step": "setup_labels",
+        "volatile_step": "setup_volatile_labels",
+        "keys": VOLATILE_LABELS,
+        "input": "date",
+    },
+]
+
+
+def get_step_config(context, step):
+    """
+    Returns the configuration of a step.
+
+    Steps can be described in the context with the key
+    `step_dependencies` to override the known steps or describe custom
+    steps.
+
+    Returns:
+        HashMap<Str, Any>: The inputs and previous steps of a step or None
+        if the step is unknown.
+    """
+    config = context.get('step_dependencies', {}).get(step)
+
+    if config is not None:
+        return config
+
+    config = STEPS.get(step)
+
+    for split in SPLITS:
+        values = context.get(split['source'], {})
+        volatile = any(key in values for key in split['keys'])
+
+        if split['step'] == step and volatile:
+            config = dict(config, inputs=config['inputs'] + [split['input']])
+
+    return config
+
+
+def get_step_rank(config):
+    """
+    Returns the rank of a step.
+
+    The rank of a step is the rank of its most volatile input.
+
+    Returns:
+        int: The rank of the step, unknown steps have the highest rank.
+    """
+    if config is None:
+        return len(INPUTS)
+
+    return max(
+        [INPUTS.index(name) for name in config['inputs'] if name in INPUTS]
+        or [0]
+    )
+
+
+def split_volatile(context):
+    """
+    Move volatile environment variables and labels into their own steps.
+
+    The variables in VOLATILE_ENVIRONMENTS are moved into
+    `volatile_environments` and the labels in VOLATILE_LABELS into
+    `volatile_labels`. The steps rendering them are added right after
+    the steps they were split from.
+
+    Returns:
+        HashMap<str, Any>: The updated context.
+    """
+    for split in SPLITS:
+        values = context.get(split['source'], {})
+        volatile = context.setdefault(split['target'], {})
+
+        for key in split['keys']:
+            if key in values:
+                volatile[key] = values.pop(key)
+
+        steps = context['steps']
+        step = split['step']
+
+        if volatile and step in steps and split['volatile_step'] not in steps:
+            steps.insert(steps.index(step) + 1, split['volatile_step'])
+
+    return context
+
+
+def get_constraints(context, steps):
+    """
+    Returns the steps that must be rendered before each step.
+
+    Unknown steps act as barriers. They stay after all the steps that
+    were before them and before all the steps that were after them.
+
+    Returns:
+        HashMap<Str, Set<Str>>: The steps required before each step.
+    """
+    constraints = {}
+
+    for index, step in enumerate(steps):
+        config = get_step_config(context, step)
+        required = set()
+
+        if config is None:
+            required.update(steps[:index])
+        else:
+            for name in config['after']:
+                if name == '*':
+                    required.update(
+                        other
+                        for other in steps
+                        if other != step
+                        and not (get_step_config(context, other) or {}).get(
+                            'metadata'
+                        )
+                    )
+                elif name in steps:
+                    required.add(name)
+
+            required.update(
+                other
+                for other in steps[:index]
+                if get_step_config(context, other) is None
+            )
+
+        constraints[step] = required
+
+    return constraints
+
+
+def order_steps(context, steps):
+    """
+    Order the steps from the least volatile to the most volatile.
+
+    Steps are placed as soon as their constraints are satisfied. When
+    multiple steps can be placed, the one with the lowest rank is
+    placed first and the original order is kept between steps of the
+    same rank.
+
+    Returns:
+        List<Str>: The ordered steps.
+    """
+    constraints = get_constraints(context, steps)
+    ordered = []
+    remaining = list(steps)
+
+    while remaining:
+        ready = [
+            step
+            for step in remaining
+            if constraints[step].issubset(ordered)
+        ]
+
+        if not ready:
+            # Cyclic constraints, keep the original order
+            ready = remaining[:1]
+
+        step = min(
+            ready,
+            key=lambda name: (
+                get_step_rank(get_step_config(context, name)),
+                remaining.index(name)
+            )
+        )
+
+        ordered.append(step)
+        remaining.remove(step)
+
+    return ordered
+
+
+def get_cache_boundaries(context, steps):
+    """
+    Returns the first step invalidated when an input changes.
+
+    Docker invalidates the cache of all the steps following the first
+    step that changed. So every step before the boundary is expected
+    to be reused from the cache.
+
+    Returns:
+        HashMap<Str, HashMap<Str, Any>>: For each input, the first
+        invalidated step and the number of cached steps.
+    """
+    boundaries = {}
+
+    for name in INPUTS:
+        boundary = None
+
+        for index, step in enumerate(steps):
+            config = get_step_config(context, step)
+            if config is None or name in config['inputs']:
+                boundary = index
+                break
+
+        if boundary is None:
+            boundaries[name] = {
+                "step": None,
+                "cached": len(steps),
+                "total": len(steps),
+            }
+        else:
+            boundaries[name] = {
+                "step": steps[boundary],
+                "cached": boundary,
+                "total": len(steps),
+            }
+
+    return boundaries
+
+
+def plan_steps(context):
+    """
+    Reorder the steps of a context to maximize cache hits.
+
+    Volatile environment variables and labels are split into their own
+    steps and the steps are sorted so the slow steps that rarely change
+    are rendered first.
+
+    Returns:
+        Tuple<HashMap<str, Any>, HashMap<Str, Any>>: The planned context
+        and a report with the cache boundaries before and after planning.
+    """
+    context = copy.deepcopy(context)
+
+    before = {
+        "steps": list(context['steps']),
+        "boundaries": get_cache_boundaries(context, context['steps']),
+    }
+
+    split_volatile(context)
+    context['steps'] = order_steps(context, context['steps'])
+
+    report = {
+        "before": before,
+        "after": {
+            "steps": context['steps'],
+            "boundaries": get_cache_boundaries(context, context['steps']),
+        }
+    }
+
+    return context, report
+
+
+def format_report(report):
+    """
+    Format a planning report as text.
+
+    Returns:
+        Str: The report.
+    """
+    lines = []
+
+    for name in ("before", "after"):
+        section = report[name]
+        lines.append("{}: {}".format(name, ", ".join(section['steps'])))
+
+        for input_name in INPUTS:
+            boundary = section['boundaries'][input_name]
+            lines.append(
+                "  {:<10} invalidates {:<24} cached {}/{}".format(
+                    input_name,
+                    boundary['step'] or "nothing",
+                    boundary['cached'],
+                    boundary['total']
+                )
+            )
+
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+import os
+from urllib.parse import urlsplit
+
+
+# BuildKit secrets mounted in the RUN instructions downloading packages.
+# The secrets are optional, the files are only mounted when the secret
+# is passed to the build, so the Dockerfile is the same with or without
+# a proxy and the settings are never written in a layer.
+PROXY_SECRETS = {
+    "apt": {
+        "id": "apt-proxy",
+        "target": "/etc/apt/apt.conf.d/99odootools-proxy",
+        "filename": "apt-proxy.conf",
+    },
+    "pip": {
+        "id": "pip-index",
+        "target": "/etc/pip.conf",
+        "filename": "pip.conf",
+    },
+    "uv": {
+        "id": "uv-index",
+        "target": "/etc/uv/uv.toml",
+        "filename": "uv.toml",
+    },
+}
+
+
+def get_proxy_mounts(config, installer="pip"):
+    """
+    Returns the secret mounts of the proxies enabled.
+
+    The index of uv is mounted with the one of pip when uv is the
+    installer.
+
+    Args:
+      config (HashMap<Str, bool>): The `apt` and `pip` flags.
+      installer (Str): The installer of the python packages.
+
+    Returns:
+        List<Str>: The mounts in the format of `RUN --mount`.
+    """
+    names = []
+
+    if config.get('apt'):
+        names.append("apt")
+
+    if config.get('pip'):
+        names.append("pip")
+
+        if installer == "uv":
+            names.append("uv")
+
+    return [
+        "type=secret,id={id},target={target}".format(**PROXY_SECRETS[name])
+        for name in names
+    ]
+
+
+def get_apt_config(proxy_url):
+    """
+    Returns the apt configuration using a proxy for http repositories.
+
+    Caching proxies like apt-cacher-ng can't cache https repositories,
+    those are still fetched directly.
+    """
+    return 'Acquire::http::Proxy "{}";\n'.format(proxy_url)
+
+
+def get_pip_config(index_url):
+    """
+    Returns the pip configuration using an index mirror.
+
+    Mirrors served over http are added to the trusted hosts.
+    """
+    lines = [
+        "[global]",
+        "index-url = {}".format(index_url),
+    ]
+
+    parts = urlsplit(index_url)
+
+    if parts.scheme == "http":
+        lines.append("trusted-host = {}".format(parts.hostname))
+
+    return "\n".join(lines) + "\n"
+
+
+def get_uv_config(index_url):
+    """
+    Returns the uv configuration using an index mirror.
+    """
+    return '[pip]\nindex-url = "{}"\n'.format(index_url)
+
+
+def write_secrets(output, apt_proxy=None, index_url=None):
+    """
+    Write the files of the proxy secrets in a directory.
+
+    The directory shouldn't be in the build context as the files may
+    contain credentials.
+
+    Args:
+      output (Str): The directory of the secrets.
+      apt_proxy (Str): The url of the apt proxy.
+      index_url (Str): The url of the python index mirror.
+
+    Returns:
+        HashMap<Str, Str>: The path of each secret by id.
+    """
+    configs = {}
+
+    if apt_proxy:
+        configs['apt'] = get_apt_config(apt_proxy)
+
+    if index_url:
+        configs['pip'] = get_pip_config(index_url)
+        configs['uv'] = get_uv_config(index_url)
+
+    os.makedirs(output, exist_ok=True)
+
+    secrets = {}
+
+    for name, config in configs.items():
+        secret = PROXY_SECRETS[name]
+        filename = os.path.abspath(os.path.join(output, secret['filename']))
+
+        with open(filename, "w") as fout:
+            fout.write(config)
+
+        os.chmod(filename, 0o600)
+        secrets[secret['id']] = filename
+
+    return secrets
+
+
+def get_secret_args(secrets):
+    """
+    Returns the arguments of docker build passing the secrets.
+
+    Returns:
+        List<Str>: The `--secret` arguments.
+    """
+    args = []
+
+    for secret_id, filename in sorted(secrets.items()):
+        args += ["--secret", "id={},src={}".format(secret_id, filename)]
+
+    return args
@@ -1,15 +1,93 @@
 import os
 from datetime import datetime
-from jinja2 import (
-    Environment,
-    PackageLoader,
-    ChoiceLoader,
-    select_autoescape,
-    FileSystemLoader,
-)
 from .tools import get_context
 
 
+DEFAULT_CACHE_SIZE = 32 * 1024 * 1024
+
+
+COMPILED_TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "compiled")
+
+# File of the compiled dir storing the hash of the templates compiled.
+COMPILED_HASH_FILE = "templates.sha256"
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "scripts")
+
+
+# Docker architecture of the machines returned by platform.machine()
+MACHINE_ARCHES = {
+    "x86_64": "amd64",
+    "amd64": "amd64",
+    "aarch64": "arm64",
+    "arm64": "arm64",
+    "armv7l": "arm",
+    "ppc64le": "ppc64le",
+    "s390x": "s390x",
+}
+
+# Debian architecture of the docker architectures named differently,
+# used in the name of deb files.
+DEB_ARCHES = {
+    "arm": "armhf",
+    "ppc64le": "ppc64el",
+}
+
+
+# Value of os_arch in multi arch mode, it's expanded by the shell
+# during the build with the architecture of the image being built.
+TARGETARCH = "${TARGETARCH}"
+
+
+# Values of the context set by each profile. They can still be
+# overridden by the context passed to make_context.
+PROFILES = {
+    "default": {},
+    "slim": {
+        "slim": True,
+    },
+}
+
+
+# Installers of the python packages with the oldest python they support.
+# The other installers fall back to pip on older python versions.
+INSTALLERS = {
+    "pip": 2.7,
+    "uv": 3.8,
+}
+
+
+# Package of jemalloc in each distribution
+JEMALLOC_PACKAGES = {
+    "bionic": "libjemalloc1",
+    "focal": "libjemalloc2",
+}
+
+
+# Files of the requirements of Odoo written for the other major version
+# of python, compileall fails on them. Matched with `compileall -x`.
+PRECOMPILE_EXCLUDE = {
+    2: [
+        r"/gevent/_(socket3|ssl3)\.py",
+        r"/jinja2/async(support|filters)\.py",
+    ],
+    3: [
+        r"/gevent/_(socket2|ssl2|sslgte279|util_py2)\.py",
+    ],
+}
+
+
+SLIM_CATEGORIES = [
+    "languages",
+    "tests",
+    "sourcemaps",
+    "docs",
+    "duplicates",
+]
+
+
 def get_base_packages(context):
     """
     Returns a list of native libraries to install based
@@ -128,13 +206,42 @@ def get_python_packages(context):
 
 
 def get_setup_steps(context):
+    """
+    Returns the list of steps rendered in the final image.
+
+    In multi stage mode, Odoo is installed from the builder stage
+    instead of being built in the final image. When `precompile` is
+    enabled, python files are compiled right after Odoo is installed.
+    When `runtime_tuning` is enabled, the entrypoint tuning Odoo is
+    installed.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        List<Str>: The name of the templates of each step.
+    """
+    if context.get('multi_stage'):
+        setup_odoo = "setup_odoo_prebuilt"
+    else:
+        setup_odoo = "setup_odoo"
 
     steps = [
         "setup_env",
         "setup_base_dependencies",
         # "setup_repos",
         # "setup_postgres",
-        "setup_odoo",
+        setup_odoo,
+    ]
+
+    if context.get('precompile'):
+        steps.append("precompile")
+
+    if context.get('runtime_tuning'):
+        steps.append("runtime_tuning")
+
+    steps += [
         "prepare_user",
         "setup_labels",
         "setup_command",
@@ -143,6 +250,422 @@ def get_setup_steps(context):
     return steps
 
 
+def get_precompile_config(context):
+    """
+    Returns the configuration of the precompile step.
+
+    The precompile step compiles the python files of Odoo and of the
+    site-packages of `python_bin` during the build so the image doesn't
+    have to compile them when it starts. The `precompile` value of the
+    context can be `True` or a hashmap overriding the defaults.
+
+    - optimize: Optimization levels to compile, 0 is the default level
+      used by python, 1 and 2 are the levels used with -O and -OO.
+    - workers: Number of processes used by compileall, 0 uses all cpus.
+      Python 2 always compiles in a single process.
+    - paths: Directories to compile.
+    - exclude: Regular expressions of the files not compiled, files
+      that can't be compiled by `python_bin` make the build fail. See
+      `PRECOMPILE_EXCLUDE`.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The configuration or False if disabled.
+    """
+    precompile = context.get('precompile')
+
+    if not precompile:
+        return False
+
+    if precompile is True:
+        precompile = {}
+
+    python_bin = context['python_bin']
+    python_version = get_python_version(context)
+
+    if python_version >= 3:
+        system_packages = "/usr/lib/python3/dist-packages"
+    else:
+        system_packages = "/usr/lib/{}/dist-packages".format(python_bin)
+
+    config = {
+        "optimize": [0],
+        "workers": 0,
+        "paths": [
+            "/usr/local/lib/{}/dist-packages".format(python_bin),
+            system_packages,
+        ],
+        "exclude": list(PRECOMPILE_EXCLUDE[int(python_version)]),
+    }
+    config.update(precompile)
+
+    return config
+
+
+def get_profile(name):
+    """
+    Returns the values of the context set by a profile.
+
+    Raises:
+        ValueError: When the profile doesn't exist.
+    """
+    if name not in PROFILES:
+        raise ValueError("Unknown profile {}".format(name))
+
+    return PROFILES[name]
+
+
+def get_slim_config(context):
+    """
+    Returns the configuration of the pruning of the Odoo installation.
+
+    When `slim` is enabled, the files not needed at runtime are removed
+    by `scripts/slim.py` in the same layer as the one installing Odoo.
+    Removing them in a later layer wouldn't make the image smaller. The
+    `slim` value of the context can be `True` or a hashmap overriding the
+    defaults.
+
+    - languages: Translations to keep, defaults to `odoo.languages`.
+    - categories: Files to prune, translations of other languages, tests
+      and docs of addons, source maps and duplicated files replaced by
+      hardlinks. See `SLIM_CATEGORIES`.
+    - paths: Directories to prune.
+
+    The bytes saved by category are printed in the build log.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The configuration or False if disabled.
+    """
+    slim = context.get('slim')
+
+    if not slim:
+        return False
+
+    if slim is True:
+        slim = {}
+
+    config = {
+        "languages": context['odoo'].get('languages') or "all",
+        "categories": list(SLIM_CATEGORIES),
+        "paths": [
+            "/usr/local/lib/{}/dist-packages".format(context['python_bin']),
+        ]
+    }
+    config.update(slim)
+
+    return config
+
+
+def get_installer_config(context):
+    """
+    Returns the configuration of the installer of the python packages.
+
+    The `installer` of the context is `pip` or `uv`. With `uv`, the
+    packages of `odoo_pip_packages` and the requirements of Odoo are
+    installed with a single resolve by `uv pip install`, so
+    `odootools manage setup` finds them already installed. The
+    requirements are the ones shipped by the local odoo-tools, see
+    `wheelhouse.get_odoo_requirements`. uv doesn't support python older
+    than 3.8, pip is used instead for those images.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The name of the installer and the requirements
+        it installs.
+
+    Raises:
+        ValueError: When the installer doesn't exist.
+    """
+    name = context.get('installer') or "pip"
+
+    if isinstance(name, dict):
+        name = name['name']
+
+    if name not in INSTALLERS:
+        raise ValueError("Unknown installer {}".format(name))
+
+    if get_python_version(context) < INSTALLERS[name]:
+        name = "pip"
+
+    if name == "pip":
+        return {"name": name}
+
+    from .wheelhouse import get_odoo_requirements
+
+    filename = get_odoo_requirements(context)
+    requirements = []
+
+    if filename:
+        with open(filename) as fin:
+            for line in fin:
+                requirement = line.split('#', 1)[0].strip()
+
+                if requirement and not requirement.startswith('-'):
+                    requirements.append(requirement)
+
+    return {
+        "name": name,
+        "requirements": requirements,
+    }
+
+
+def get_odoo_source_config(context):
+    """
+    Returns the configuration of the fetch of the sources of Odoo.
+
+    The `strategy` of `odoo_source` defines how the sources are fetched.
+
+    - git: `odootools manage setup` fetches the commit of the ref only
+      with a shallow fetch during the build.
+    - archive: The nightly release is added with `ADD --checksum` in the
+      `odoo-source` stage and mounted as the cache of
+      `odootools manage setup`, the archive is never stored in a layer.
+      The `checksum` is the sha256 of the archive.
+    - prefetch: The ref is fetched from a bare repository prefetched in
+      a local directory and passed as the `odoo-source` build context.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The configuration of the strategy.
+
+    Raises:
+        ValueError: When the strategy doesn't exist or the archive
+        strategy is used without release.
+    """
+    from .source import (
+        SOURCE_STRATEGIES,
+        SOURCE_CONTEXT,
+        SOURCE_MOUNT,
+        get_release_archive,
+    )
+
+    config = {
+        "strategy": "git",
+    }
+    config.update(context.get('odoo_source') or {})
+
+    strategy = config['strategy']
+
+    if strategy not in SOURCE_STRATEGIES:
+        raise ValueError("Unknown source strategy {}".format(strategy))
+
+    if strategy == "git":
+        return config
+
+    config['mounts'] = [
+        "type=bind,from={},target={}".format(SOURCE_CONTEXT, SOURCE_MOUNT)
+    ]
+
+    if strategy == "archive":
+        odoo = context['odoo']
+
+        if not odoo.get('release'):
+            raise ValueError("The archive source strategy needs a release")
+
+        url, filename = get_release_archive(odoo['version'], odoo['release'])
+
+        config.setdefault('checksum', "")
+        config['url'] = url
+        config['filename'] = filename
+        config['cache'] = SOURCE_MOUNT
+    else:
+        config['repo'] = "file://{}".format(SOURCE_MOUNT)
+
+    return config
+
+
+def get_resolve_config(context):
+    """
+    Returns the configuration of the resolution of the metadata.
+
+    When `resolve` is enabled, the refs, releases, checksums and keys
+    of the context are resolved by `resolver.resolve_contexts` once the
+    context is built. The `resolve` value of the context can be `True`
+    or a hashmap overriding the defaults.
+
+    - ttl: Time in seconds during which the http responses cached are
+      used without being revalidated.
+    - concurrency: Number of fetches run at the same time.
+    - cache_dir: The root of the local cache.
+    - checksums: Download the deb files and archives to compute their
+      checksum.
+    - github_api: Url of the github api resolving the refs of the
+      repositories on github.
+    - nightly_url: Url of the nightly builds of Odoo.
+    - keyserver: Url of the keyserver of the keys defined by fingerprint.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The configuration or False if disabled.
+    """
+    resolve = context.get('resolve')
+
+    if not resolve:
+        return False
+
+    if resolve is True:
+        resolve = {}
+
+    from .resolver import GITHUB_API, NIGHTLY_URL, DEFAULT_KEYSERVER
+
+    config = {
+        "ttl": 3600,
+        "concurrency": 8,
+        "cache_dir": None,
+        "checksums": True,
+        "github_api": GITHUB_API,
+        "nightly_url": NIGHTLY_URL,
+        "keyserver": DEFAULT_KEYSERVER,
+    }
+    config.update(resolve)
+
+    return config
+
+
+def get_proxy_config(context):
+    """
+    Returns the configuration of the download proxies.
+
+    When `proxy` is enabled, the RUN instructions downloading packages
+    mount optional BuildKit secrets configuring apt to use a caching
+    proxy and pip to use an index mirror, see `proxy.PROXY_SECRETS`.
+    The settings are only passed to the build with `--secret`, so they
+    are never written in the layers or the environment and the
+    Dockerfile stays the same with or without a proxy. The `proxy` value
+    of the context can be `True` or a hashmap overriding the defaults.
+
+    - apt: Mount the apt configuration.
+    - pip: Mount the configuration of pip and uv.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The configuration or False if disabled.
+    """
+    from .proxy import get_proxy_mounts
+
+    proxy = context.get('proxy')
+
+    if not proxy:
+        return False
+
+    if proxy is True:
+        proxy = {}
+
+    config = {
+        "apt": True,
+        "pip": True,
+    }
+    config.update(proxy)
+    config['mounts'] = get_proxy_mounts(config, context['installer']['name'])
+
+    return config
+
+
+def get_runtime_tuning_config(context):
+    """
+    Returns the configuration of the runtime tuning of Odoo.
+
+    When `runtime_tuning` is enabled, `scripts/tune.py` is installed as
+    the entrypoint of the image. When the container starts, it sets the
+    workers, the memory limits and the database connections of Odoo from
+    the cpu and memory limits of its cgroup. The options already set in
+    the environment are kept and `ODOO_TUNE=0` disables it. The
+    `runtime_tuning` value of the context can be `True` or a hashmap
+    overriding the defaults.
+
+    - jemalloc: Install jemalloc and preload it instead of using the
+      allocator of the libc.
+    - malloc_conf: Options of jemalloc set in `MALLOC_CONF`.
+    - min_worker_memory: Memory in MB each worker needs at least, the
+      workers are reduced to stay under the memory limit.
+    - db_connections: Connections to the database shared by all the
+      processes.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        HashMap<Str, Any>: The configuration or False if disabled.
+    """
+    runtime_tuning = context.get('runtime_tuning')
+
+    if not runtime_tuning:
+        return False
+
+    if runtime_tuning is True:
+        runtime_tuning = {}
+
+    config = {
+        "jemalloc": True,
+        "malloc_conf": "",
+        "min_worker_memory": 384,
+        "db_connections": 100,
+    }
+    config.update(runtime_tuning)
+
+    return config
+
+
+def get_stages(context):
+    """
+    Returns the list of stages rendered before the final image.
+
+    In multi stage mode, a builder stage installs the packages in
+    `odoo_packages` and installs Odoo with the packages in
+    `odoo_pip_packages` in `/usr/local`. The final image copies the
+    installed python packages from the builder stage so the build toolchain
+    is never installed in the final image. It also let BuildKit build
+    the builder stage and the base dependencies in parallel.
+
+    With the archive source strategy, the `odoo-source` stage adds the
+    release archive of Odoo.
+
+    The `debs` stage provides the deb files pinned by sha256, see
+    `debs.vendor_debs`.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        List<Str>: The name of the templates of each stage.
+    """
+    from .debs import DEBS_STAGE, is_pinned
+
+    stages = []
+
+    if context['odoo_source']['strategy'] == "archive":
+        stages.append("stage_odoo_source")
+
+    if any(is_pinned(deb) for deb in context.get('deb_files', [])):
+        stages.append(DEBS_STAGE)
+
+    if context.get('multi_stage'):
+        stages.append("stage_builder")
+
+    return stages
+
+
 def get_extra_deb_repos(context):
     """
     Returns a list of RepositoryObject.
@@ -157,6 +680,10 @@ def get_extra_deb_repos(context):
 
     Those with a key already available and one with a key url and list url.
 
+    Repositories only available for some architectures list them in
+    `arches`. They're only used when they're available for all the
+    architectures of the image.
+
     Returns:
         List<HashMap<str, Any>>: Returns a list of repository that can be
         prepared when installing native libraries.
@@ -174,7 +701,8 @@ def get_extra_deb_repos(context):
         },
         "packages": [
             "msodbcsql18"
-        ]
+        ],
+        "arches": ["amd64"],
     }
 
     postgres_repo = {
@@ -185,18 +713,22 @@ def get_extra_deb_repos(context):
         "packages": [
             "postgresql-client"
         ],
+        "arches": ["amd64", "arm64", "ppc64le"],
     }
 
     deb_repos = []
     deb_repos.append(postgres_repo)
     # deb_repos.append(odbc_repo)
 
+    arches = get_target_arches(context)
+
     return [
         {
             key: value.format(**context) if isinstance(value, str) else value
             for key, value in config.items()
         }
         for config in deb_repos
+        if all(arch in config.get('arches', arches) for arch in arches)
     ]
 
 
@@ -280,6 +812,18 @@ def get_default_environment(context):
         "ODOO_RELEASE": "{odoo[release]}",
     }
 
+    if context.get('runtime_tuning'):
+        envs.update({
+            "ODOO_TUNE": "1",
+            "ODOO_TUNE_MIN_WORKER_MEMORY": (
+                "{runtime_tuning[min_worker_memory]}"
+            ),
+            "ODOO_TUNE_DB_CONNECTIONS": "{runtime_tuning[db_connections]}",
+        })
+
+        if context['runtime_tuning']['malloc_conf']:
+            envs["MALLOC_CONF"] = "{runtime_tuning[malloc_conf]}"
+
     return {
         key: value.format(**context)
         for key, value in envs.items()
@@ -315,6 +859,52 @@ def make_context(override_context=None):
 
     Let say you want to build an image with more dependencies without having to
     add any extra layer to a common image.
+
+    When `buildkit.cache_mounts` is enabled, the apt and pip steps are
+    rendered with `RUN --mount=type=cache` so downloaded packages are kept
+    in the cache of the builder instead of being downloaded on every build.
+    This requires BuildKit.
+
+    With `apt_planner` enabled, the base dependencies are installed with
+    the transactions planned by `apt.plan_apt_transactions` in a single
+    layer instead of installing each set of packages separately.
+
+    With `step_markers` enabled, an `ARG ODOOTOOLS_STEP=<step>` is rendered
+    before each step. The marker is kept in the history of the image so its
+    layers can be attributed to the steps with `layers.inspect_image`.
+
+    With `instrument` enabled, the sub-phases of the steps print timing
+    markers in the build log that can be parsed with `timing.parse_log`.
+
+    With `precompile` enabled, python files are compiled during the build.
+    See `get_precompile_config`.
+
+    A `profile` sets default values of the context, see `PROFILES`. The
+    `slim` profile prunes the files of Odoo not needed at runtime, see
+    `get_slim_config`.
+
+    The `installer` installs the python packages, see
+    `get_installer_config`.
+
+    The sources of Odoo are fetched with the strategy of `odoo_source`,
+    see `get_odoo_source_config`.
+
+    With `proxy` enabled, packages are downloaded through the proxies
+    passed as BuildKit secrets, see `get_proxy_config`.
+
+    With `runtime_tuning` enabled, Odoo is tuned for the limits of the
+    container when it starts, see `get_runtime_tuning_config`.
+
+    With `resolve` enabled, the refs, releases and checksums of the
+    context are resolved once it's built, see `get_resolve_config`.
+
+    The image is built for the architecture in `os_arch`, the one of the
+    host by default. With `multi_arch.arches`, a single Dockerfile builds
+    all the architectures listed with `docker buildx build --platform`.
+    `os_arch` is then `${TARGETARCH}` and expanded during the build.
+
+    The image is built from the distribution unless `base_image` names
+    another image, like the shared base targets of `bake.make_bake`.
     """
     if override_context is None:
         override_context = {}
@@ -326,22 +916,60 @@ def make_context(override_context=None):
         "user": {
             "gid": "1000",
             "uid": "1000"
-        }
+        },
+        "buildkit": {
+            "cache_mounts": False
+        },
+        "multi_stage": False,
+        "apt_planner": True,
+        "step_markers": False,
+        "instrument": False,
+        "precompile": False,
+        "slim": False,
+        "runtime_tuning": False,
+        "installer": "pip",
+        "proxy": False,
+        "resolve": False,
+        "odoo_source": {
+            "strategy": "git"
+        },
+        "profile": "default",
+        "multi_arch": False
     }
 
+    context.update(get_profile(override_context.get('profile', 'default')))
     context.update(override_context)
     context.update(get_host_config(context))
+    context['precompile'] = get_precompile_config(context)
+    context['slim'] = get_slim_config(context)
+    context['runtime_tuning'] = get_runtime_tuning_config(context)
+    context['installer'] = get_installer_config(context)
+    context['proxy'] = get_proxy_config(context)
+    context['odoo_source'] = get_odoo_source_config(context)
 
     deb_repos = get_extra_deb_repos(context)
 
     context['deb_repos'] = deb_repos
     context['base_packages'] = get_base_packages(context)
     context['base_packages'] += get_python_packages(context)
+
+    if context['runtime_tuning'] and context['runtime_tuning']['jemalloc']:
+        context['base_packages'].append(
+            JEMALLOC_PACKAGES[context['os_version']]
+        )
+
+    context['stages'] = get_stages(context)
     context['steps'] = get_setup_steps(context)
     context['odoo_pip_packages'] = get_odoo_pip_packages(context)
     context['odoo_packages'] = get_odoo_packages(context)
     context['labels'] = default_labels(context)
     context['environments'] = get_default_environment(context)
+    context['resolve'] = get_resolve_config(context)
+
+    if context['resolve']:
+        from .resolver import resolve_contexts
+
+        resolve_contexts([context], **context['resolve'])
 
     return context
 
@@ -391,7 +1019,8 @@ def default_labels(context):
         "org.opencontainers.image.vendor": "LLacroix",
         "org.opencontainers.image.ref.name": "{odoo[ref]}",
         "org.opencontainers.image.title": "Odoo {odoo[version]}",
-        "org.opencontainers.image.description": description
+        "org.opencontainers.image.description": description,
+        "org.odoo-plus.source.strategy": "{odoo_source[strategy]}",
     }
 
     return {
@@ -400,6 +1029,54 @@ def default_labels(context):
     }
 
 
+def get_arch(machine=None):
+    """
+    Returns the docker architecture of a machine.
+
+    Args:
+      machine (Str): The machine as returned by `platform.machine()`,
+        defaults to the machine running this process.
+
+    Returns:
+        Str: The docker architecture like amd64 or arm64.
+    """
+    if machine is None:
+        import platform
+        machine = platform.machine()
+
+    machine = machine.lower()
+
+    return MACHINE_ARCHES.get(machine, machine)
+
+
+def get_deb_arch(arch):
+    """
+    Returns the Debian architecture of a docker architecture.
+
+    Returns:
+        Str: The Debian architecture like amd64 or armhf.
+    """
+    return DEB_ARCHES.get(arch, arch)
+
+
+def get_target_arches(context):
+    """
+    Returns the architectures the image is built for.
+
+    In multi arch mode, the architectures are listed in
+    `multi_arch.arches`. Otherwise the image is built for `os_arch`.
+
+    Returns:
+        List<Str>: The docker architectures.
+    """
+    multi_arch = context.get('multi_arch')
+
+    if multi_arch:
+        return list(multi_arch['arches'])
+
+    return [context.get('os_arch') or get_arch()]
+
+
 def get_host_config(context):
     """
     Define the host config on which Odoo will run.
@@ -432,6 +1109,11 @@ def get_host_config(context):
     #     os_version = "foca"
     #     os_release = "22.04"
 
+    if context.get('multi_arch'):
+        os_arch = TARGETARCH
+    else:
+        os_arch = context.get('os_arch') or get_arch()
+
     if odoo_version <= 10:
         python_bin = "python2.7"
     elif odoo_version <= 12:
@@ -444,42 +1126,373 @@ def get_host_config(context):
         "os_name": os_name,
         "os_version": os_version,
         "os_release": os_release,
-        "os_arch": "amd64"
+        "os_arch": os_arch
     }
 
 
-def render(context=None):
+def get_odoo_context(
+    version,
+    ref="",
+    release="",
+    repo="https://github.com/odoo/odoo.git",
+    languages="all"
+):
     """
-    Main method that render a context.
+    Returns the `odoo` section of a context.
 
-    This method will generate a list of loaders based on the
-    template_dirs properties defined in the context. These directories
-    can be added in the context to add more steps to your docker file
-    or to extend the existing steps by overshadowing them in your
-    own templates.
+    When neither a release nor a ref is provided, the version is used
+    as the git reference to fetch.
 
     Returns:
-        Str: A rendered Dockerfile.
+        HashMap<Str, Str>: The odoo configuration used by `make_context`.
     """
-    if context is None:
-        context = get_context()
+    if not release and not ref and version:
+        ref = version
+
+    return {
+        "version": version,
+        "ref": ref,
+        "repo": repo,
+        "release": release,
+        "languages": languages
+    }
+
+
+def get_cache_config():
+    """
+    Returns the configuration of the template cache.
+
+    The bytecode cache is enabled by setting the environment variable
+    `ODOOTOOLS_DOCKER_CACHE_DIR`. Its size in bytes can be limited with
+    `ODOOTOOLS_DOCKER_CACHE_SIZE`. Package templates compiled with the
+    `compile-templates` command are loaded from
+    `ODOOTOOLS_DOCKER_COMPILED_DIR` or from the `compiled` directory of
+    this package when it exists.
+
+    Returns:
+        HashMap<Str, Any>: The cache_dir, cache_size and compiled_dir.
+    """
+    cache_dir = os.environ.get('ODOOTOOLS_DOCKER_CACHE_DIR') or None
+    cache_size = int(
+        os.environ.get('ODOOTOOLS_DOCKER_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+    )
+    compiled_dir = os.environ.get('ODOOTOOLS_DOCKER_COMPILED_DIR') or None
+
+    if compiled_dir is None and os.path.isdir(COMPILED_TEMPLATES_DIR):
+        compiled_dir = COMPILED_TEMPLATES_DIR
+
+    return {
+        "cache_dir": cache_dir,
+        "cache_size": cache_size,
+        "compiled_dir": compiled_dir,
+    }
+
+
+def make_environment(
+    template_dirs=None,
+    cache_dir=None,
+    cache_size=DEFAULT_CACHE_SIZE,
+    compiled_dir=None
+):
+    """
+    Create a new jinja environment.
+
+    The loaders are built from the template_dirs passed. These
+    directories are looked up first and the templates of this package
+    are used as a fallback. When compiled_dir is defined, precompiled
+    package templates are loaded from it before falling back to the
+    package sources, as long as they were compiled from the current
+    package templates.
+
+    Args:
+      template_dirs (List<Str>): Custom template directories.
+      cache_dir (Str): Directory of the on-disk bytecode cache.
+      cache_size (int): Maximum size in bytes of the bytecode cache.
+      compiled_dir (Str): Directory of precompiled package templates.
+
+    Returns:
+        Environment: A jinja environment to render templates.
+    """
+    from jinja2 import (
+        Environment,
+        PackageLoader,
+        ChoiceLoader,
+        select_autoescape,
+        FileSystemLoader,
+        ModuleLoader,
+    )
 
     loaders = [
         FileSystemLoader(dirname)
-        for dirname in context.get('template_dirs', [])
+        for dirname in template_dirs or []
     ]
 
+    if compiled_dir and is_compiled_uptodate(compiled_dir):
+        loaders.append(ModuleLoader(compiled_dir))
+
     loaders.append(
         PackageLoader("odootools_docker", "templates")
     )
 
     loader = ChoiceLoader(loaders)
 
+    bytecode_cache = None
+
+    if cache_dir:
+        from .cache import BoundedBytecodeCache
+
+        bytecode_cache = BoundedBytecodeCache(cache_dir, max_size=cache_size)
+
     env = Environment(
         loader=loader,
+        autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache
+    )
+
+    env.globals.update(get_template_globals())
+
+    return env
+
+
+def requires_buildkit(context):
+    """
+    Returns True when the rendered Dockerfile needs BuildKit.
+
+    It's the case when cache mounts are enabled, when the packages
+    are installed from a wheelhouse mounted in the build, when proxies
+    are passed as secrets, when the sources of Odoo are mounted from
+    the `odoo-source` stage or build context, when deb files are
+    mounted from the `debs` stage, when the slim or tuning scripts
+    are passed in a heredoc or in multi arch mode that relies on the
+    TARGETARCH argument of BuildKit.
+
+    Args:
+      context (HashMap<str, Any>): An hashmap of JSON serializable
+        values used to define a rendering context for the docker image.
+
+    Returns:
+        bool: True if BuildKit features are used.
+    """
+    from .debs import DEBS_STAGE
+
+    buildkit = context.get('buildkit') or {}
+
+    return bool(
+        buildkit.get('cache_mounts') or
+        context.get('wheelhouse') or
+        context.get('proxy') or
+        (context.get('odoo_source') or {}).get('mounts') or
+        DEBS_STAGE in context.get('stages', []) or
+        context.get('slim') or
+        context.get('runtime_tuning') or
+        context.get('multi_arch')
+    )
+
+
+def get_template_globals():
+    """
+    Returns the functions available in the templates.
+
+    Those functions receive the context of the template being rendered
+    so they always see the context after all the transformations.
+
+    Returns:
+        HashMap<Str, Callable>: The functions by name.
+    """
+    try:
+        from jinja2 import pass_context
+    except ImportError:
+        from jinja2 import contextfunction as pass_context
+
+    from .apt import plan_apt_transactions
+
+    @pass_context
+    def apt_transactions(context):
+        return plan_apt_transactions(context)
+
+    @pass_context
+    def buildkit_required(context):
+        return requires_buildkit(context)
+
+    return {
+        "apt_transactions": apt_transactions,
+        "requires_buildkit": buildkit_required,
+        "read_script": read_script,
+    }
+
+
+def read_script(name):
+    """
+    Returns a script of the `scripts` directory.
+
+    Scripts are passed in a heredoc of the RUN instruction using them,
+    so the Dockerfile doesn't need any file in the build context. The
+    body of the heredoc follows the last line of the instruction, see
+    the `prune` and `prune_script` macros.
+
+    Returns:
+        Str: The content of the script.
+    """
+    with open(os.path.join(SCRIPTS_DIR, name)) as fin:
+        return fin.read()
+
+
+environments = {}
+
+
+def get_environment(template_dirs=None):
+    """
+    Returns a shared jinja environment for the template_dirs.
+
+    Environments are kept in memory for the lifetime of the process
+    so templates compiled once can be reused by subsequent renders.
+    The cache configuration is read with `get_cache_config`.
+
+    Args:
+      template_dirs (List<Str>): Custom template directories.
+
+    Returns:
+        Environment: A jinja environment to render templates.
+    """
+    config = get_cache_config()
+
+    key = (
+        tuple(template_dirs or []),
+        config['cache_dir'],
+        config['cache_size'],
+        config['compiled_dir'],
+    )
+
+    if key not in environments:
+        environments[key] = make_environment(key[0], **config)
+
+    return environments[key]
+
+
+def get_templates_hash():
+    """
+    Returns a hash of the package templates and of the jinja version.
+
+    Returns:
+        Str: The hex digest of the sha256.
+    """
+    import hashlib
+    import jinja2
+
+    digest = hashlib.sha256(jinja2.__version__.encode('utf-8'))
+
+    for root, dirnames, filenames in os.walk(TEMPLATES_DIR):
+        dirnames.sort()
+
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, TEMPLATES_DIR).replace(os.sep, '/')
+
+            digest.update(b"\0" + name.encode('utf-8') + b"\0")
+
+            with open(path, 'rb') as fin:
+                digest.update(fin.read())
+
+    return digest.hexdigest()
+
+
+def is_compiled_uptodate(compiled_dir):
+    """
+    Returns True when the templates of compiled_dir match the package.
+
+    Compiled templates are ignored when the package templates changed
+    since they were compiled, the hash of the templates is stored next
+    to the compiled modules by `compile_templates`.
+    """
+    try:
+        with open(os.path.join(compiled_dir, COMPILED_HASH_FILE)) as fin:
+            return fin.read().strip() == get_templates_hash()
+    except OSError:
+        return False
+
+
+def compile_templates(target):
+    """
+    Compile the templates of this package into python modules.
+
+    The compiled templates can be loaded by pointing
+    `ODOOTOOLS_DOCKER_COMPILED_DIR` to the target directory or
+    by compiling them in the `compiled` directory of this package.
+    They are only used until the package templates change.
+
+    Args:
+      target (Str): Directory in which templates are compiled.
+    """
+    from jinja2 import Environment, PackageLoader, select_autoescape
+
+    env = Environment(
+        loader=PackageLoader("odootools_docker", "templates"),
         autoescape=select_autoescape()
     )
 
+    env.compile_templates(
+        target,
+        extensions=["jinja"],
+        zip=None,
+        ignore_errors=False
+    )
+
+    with open(os.path.join(target, COMPILED_HASH_FILE), "w") as fout:
+        fout.write(get_templates_hash())
+
+
+def warm_environment(env):
+    """
+    Compile all the templates that can be loaded by the environment.
+
+    Templates are listed from the loaders able to list them, the
+    compiled templates are loaded through the names of the package
+    templates.
+
+    Returns:
+        Environment: The environment passed as parameter.
+    """
+    names = set()
+
+    for loader in getattr(env.loader, 'loaders', [env.loader]):
+        try:
+            names.update(loader.list_templates())
+        except TypeError:
+            # ModuleLoader can't list the templates it contains
+            continue
+
+    for name in sorted(names):
+        if name.endswith(".jinja"):
+            env.get_template(name)
+
+    return env
+
+
+def render(context=None, env=None):
+    """
+    Main method that render a context.
+
+    This method will generate a list of loaders based on the
+    template_dirs properties defined in the context. These directories
+    can be added in the context to add more steps to your docker file
+    or to extend the existing steps by overshadowing them in your
+    own templates.
+
+    Args:
+      context (HashMap<str, Any>): The context to render. It is read
+        from stdin when not provided.
+      env (Environment): The jinja environment to use. The shared
+        environment of the context's template_dirs is used by default.
+
+    Returns:
+        Str: A rendered Dockerfile.
+    """
+    if context is None:
+        context = get_context()
+
+    if env is None:
+        env = get_environment(context.get('template_dirs', []))
+
     template = env.get_template("main.jinja")
 
     return template.render(**context)
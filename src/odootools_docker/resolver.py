@@ -0,0 +1,454 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from .debs import ensure_debs_stage, fetch_deb
+from .fetch import get_cache_dir, fetch_cached, sha256_file
+from .keys import DEFAULT_KEYSERVER, get_key_url, fetch_key
+from .source import COMMIT_RE, NIGHTLY_URL, get_release_archive
+
+
+DEFAULT_TTL = 3600
+DEFAULT_CONCURRENCY = 8
+
+GITHUB_API = "https://api.github.com"
+
+GITHUB_RE = re.compile(r'^https://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$')
+
+
+def cached_get(url, headers=None, ttl=DEFAULT_TTL, cache_dir=None, timeout=60):
+    """
+    Get the body of a url through the on-disk http cache.
+
+    Responses younger than `ttl` seconds are returned without any
+    request. Older responses are revalidated with their ETag or
+    Last-Modified date and only downloaded again when they changed.
+
+    Args:
+      url (Str): The url to get.
+      headers (HashMap<Str, Str>): Headers of the request, they are part
+        of the cache key.
+      ttl (int): Time in seconds during which a response is fresh.
+      cache_dir (Str): The root of the local cache.
+      timeout (int): Timeout in seconds.
+
+    Returns:
+        bytes: The body of the response.
+    """
+    headers = dict(headers or {})
+
+    key = hashlib.sha256(
+        json.dumps([url, headers], sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+    cache_path = get_cache_dir('http', cache_dir)
+    meta_filename = os.path.join(cache_path, "{}.json".format(key))
+    body_filename = os.path.join(cache_path, "{}.body".format(key))
+
+    try:
+        with open(meta_filename) as fin:
+            meta = json.load(fin)
+        with open(body_filename, 'rb') as fin:
+            body = fin.read()
+    except (OSError, ValueError):
+        meta, body = None, None
+
+    if meta and time.time() - meta['time'] < ttl:
+        return body
+
+    if meta and meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+
+    if meta and meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as resp:
+            body = resp.read()
+            meta = {
+                "url": url,
+                "etag": resp.headers.get('ETag'),
+                "last_modified": resp.headers.get('Last-Modified'),
+            }
+    except HTTPError as exc:
+        if exc.code != 304 or meta is None:
+            raise
+
+    meta['time'] = time.time()
+
+    with open(body_filename + ".tmp", 'wb') as fout:
+        fout.write(body)
+
+    with open(meta_filename + ".tmp", 'w') as fout:
+        json.dump(meta, fout)
+
+    os.replace(body_filename + ".tmp", body_filename)
+    os.replace(meta_filename + ".tmp", meta_filename)
+
+    return body
+
+
+def parse_refs(data):
+    """
+    Parse the refs advertised by a git server over http.
+
+    Args:
+      data (bytes): The body of `info/refs?service=git-upload-pack`.
+
+    Returns:
+        HashMap<Str, Str>: The commit of each ref by name.
+    """
+    refs = {}
+    pos = 0
+
+    while pos + 4 <= len(data):
+        length = int(data[pos:pos + 4], 16)
+
+        if length == 0:
+            pos += 4
+            continue
+
+        line = data[pos + 4:pos + length].rstrip(b'\n')
+        pos += length
+
+        if line.startswith(b'#'):
+            continue
+
+        sha, _, name = line.split(b'\0', 1)[0].decode('utf-8').partition(' ')
+        refs[name] = sha
+
+    return refs
+
+
+def find_ref(refs, ref):
+    """
+    Returns the commit of a branch, tag or full ref name or None.
+
+    Annotated tags are peeled to the commit they point to.
+    """
+    for name in [
+        ref,
+        "refs/heads/{}".format(ref),
+        "refs/tags/{}^{{}}".format(ref),
+        "refs/tags/{}".format(ref),
+    ]:
+        if name in refs:
+            return refs[name]
+
+    return None
+
+
+async def gather(*tasks):
+    """
+    Wait for all the tasks and raise the first error.
+
+    Unlike `asyncio.gather`, the other tasks are done when the error is
+    raised, no task is left pending when the loop is closed.
+    """
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    return results
+
+
+class Resolver(object):
+    """
+    Run the blocking fetches of the resolution concurrently.
+
+    Fetches are run in a thread pool from an event loop. Identical
+    fetches share the same future so the refs, releases and files
+    shared by many contexts are only fetched once.
+    """
+
+    def __init__(
+        self,
+        ttl=DEFAULT_TTL,
+        concurrency=DEFAULT_CONCURRENCY,
+        cache_dir=None,
+        github_api=GITHUB_API,
+        nightly_url=NIGHTLY_URL,
+        keyserver=DEFAULT_KEYSERVER,
+        checksums=True
+    ):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.cache_dir = cache_dir
+        self.github_api = github_api
+        self.nightly_url = nightly_url
+        self.keyserver = keyserver
+        self.checksums = checksums
+        self.futures = {}
+        self.loop = None
+        self.executor = None
+        self.semaphore = None
+
+    def run(self, coroutine):
+        """
+        Run a coroutine in a new event loop.
+
+        A new loop is used instead of `asyncio.run` that doesn't exist
+        in python 3.6.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.futures = {}
+
+        try:
+            asyncio.set_event_loop(self.loop)
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            return self.loop.run_until_complete(coroutine)
+        finally:
+            asyncio.set_event_loop(None)
+            self.executor.shutdown(wait=True)
+            self.loop.close()
+
+    async def call(self, func, *args):
+        key = (func.__name__,) + args
+
+        if key not in self.futures:
+            self.futures[key] = asyncio.ensure_future(
+                self.run_in_executor(func, *args)
+            )
+
+        return await self.futures[key]
+
+    async def run_in_executor(self, func, *args):
+        async with self.semaphore:
+            return await self.loop.run_in_executor(self.executor, func, *args)
+
+    async def get(self, url, headers=None):
+        headers = tuple(sorted((headers or {}).items()))
+
+        return await self.call(self.get_url, url, headers)
+
+    def get_url(self, url, headers):
+        return cached_get(
+            url,
+            dict(headers),
+            ttl=self.ttl,
+            cache_dir=self.cache_dir
+        )
+
+    async def resolve_ref(self, repo, ref):
+        """
+        Returns the commit of a ref of a repository.
+
+        Repositories on github are resolved with the commits api that
+        returns the commit alone, other repositories with the refs
+        advertised by the git server. Repositories not served over http
+        aren't resolved.
+
+        Returns:
+            Str: The commit or None.
+
+        Raises:
+            ValueError: When the ref doesn't exist.
+        """
+        if COMMIT_RE.match(ref):
+            return ref
+
+        match = GITHUB_RE.match(repo)
+
+        if match:
+            url = "{api}/repos/{owner}/{name}/commits/{ref}".format(
+                api=self.github_api.rstrip('/'),
+                owner=match.group(1),
+                name=match.group(2),
+                ref=ref
+            )
+
+            try:
+                body = await self.get(
+                    url,
+                    {"Accept": "application/vnd.github.sha"}
+                )
+            except HTTPError as exc:
+                if exc.code in (404, 422):
+                    raise ValueError(
+                        "Ref {} not found in {}".format(ref, repo)
+                    )
+                raise
+
+            return body.decode('utf-8').strip()
+
+        if not repo.startswith(('http://', 'https://')):
+            return None
+
+        body = await self.get(
+            "{}/info/refs?service=git-upload-pack".format(repo.rstrip('/'))
+        )
+
+        commit = find_ref(parse_refs(body), ref)
+
+        if commit is None:
+            raise ValueError("Ref {} not found in {}".format(ref, repo))
+
+        return commit
+
+    async def resolve_release(self, version, release):
+        """
+        Returns the nightly release matching a release of Odoo.
+
+        The `latest` release is resolved to the most recent dated
+        release. Other releases are checked in the listing of the
+        nightly builds.
+
+        Raises:
+            ValueError: When the release doesn't exist.
+        """
+        url, filename = get_release_archive(
+            version,
+            release,
+            base=self.nightly_url
+        )
+
+        listing = await self.get(url.rsplit('/', 1)[0] + '/')
+        listing = listing.decode('utf-8', 'replace')
+
+        if release == "latest":
+            releases = re.findall(
+                r'odoo_{}\.(\d{{8}})\.tar\.gz'.format(re.escape(version)),
+                listing
+            )
+
+            if not releases:
+                raise ValueError(
+                    "No nightly release found for {}".format(version)
+                )
+
+            return max(releases)
+
+        if filename not in listing:
+            raise ValueError(
+                "Release {} not found for {}".format(release, version)
+            )
+
+        return release
+
+    def get_file_checksum(self, url, cache_name, filename):
+        path = fetch_cached(url, cache_name, filename, self.cache_dir)
+
+        return sha256_file(path)
+
+    def get_deb_checksum(self, url):
+        return fetch_deb(url, cache_dir=self.cache_dir)[1]
+
+    def fetch_key(self, url):
+        return fetch_key(url, self.cache_dir)
+
+    async def resolve_odoo(self, context):
+        odoo = context['odoo']
+
+        if odoo.get('release'):
+            odoo['release'] = await self.resolve_release(
+                odoo['version'],
+                odoo['release']
+            )
+        elif odoo.get('ref') and not odoo.get('commit'):
+            odoo['commit'] = await self.resolve_ref(odoo['repo'], odoo['ref'])
+
+        source = context.get('odoo_source') or {}
+
+        if source.get('strategy') != "archive":
+            return
+
+        url, filename = get_release_archive(
+            odoo['version'],
+            odoo['release'],
+            base=self.nightly_url
+        )
+
+        source['url'] = url
+        source['filename'] = filename
+
+        if self.checksums and not source.get('checksum'):
+            source['checksum'] = await self.call(
+                self.get_file_checksum,
+                url,
+                "odoo",
+                filename
+            )
+
+    async def resolve_deb(self, deb):
+        deb['sha256'] = await self.call(self.get_deb_checksum, deb['url'])
+
+    async def resolve_context(self, context):
+        """
+        Resolve the metadata of a context.
+
+        - The ref of Odoo is resolved to the `commit` fetched by the
+          build and set as the revision label.
+        - The release of Odoo is checked and the `latest` release is
+          resolved to a dated release. With the archive strategy, the
+          checksum of the archive is computed.
+        - The deb files get their sha256 and are added by the debs stage.
+        - The signing keys of the deb repositories are fetched in the
+          cache used by the `keys` command.
+
+        Checksums need the files to be downloaded, in the content
+        addressed caches, they aren't computed without `checksums`.
+        """
+        tasks = [self.resolve_odoo(context)]
+
+        if self.checksums:
+            tasks += [
+                self.resolve_deb(deb)
+                for deb in context.get('deb_files', [])
+                if not deb.get('sha256') and "${" not in deb['url']
+            ]
+
+        for repo in context.get('deb_repos', []):
+            url = get_key_url(repo, self.keyserver)
+
+            if url and not repo.get('key_file'):
+                tasks.append(self.call(self.fetch_key, url))
+
+        await gather(*tasks)
+
+        if context['odoo'].get('commit') and 'labels' in context:
+            context['labels']['org.opencontainers.image.revision'] = (
+                context['odoo']['commit']
+            )
+
+        if 'stages' in context:
+            ensure_debs_stage(context)
+
+        return context
+
+    async def resolve_all(self, contexts):
+        return await gather(*[
+            self.resolve_context(context)
+            for context in contexts
+        ])
+
+
+def resolve_contexts(contexts, **options):
+    """
+    Resolve the metadata of many contexts concurrently.
+
+    The contexts are updated in place, see `Resolver.resolve_context`.
+
+    Args:
+      contexts (List<HashMap<str, Any>>): Contexts returned by
+        `make_context`.
+      options: The options of `Resolver`.
+
+    Returns:
+        List<HashMap<str, Any>>: The resolved contexts.
+
+    Raises:
+        ValueError: When a ref or a release doesn't exist or a file
+        doesn't match its checksum.
+    """
+    resolver = Resolver(**options)
+
+    return resolver.run(resolver.resolve_all(contexts))
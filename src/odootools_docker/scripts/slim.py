@@ -0,0 +1,283 @@
+"""
+Remove the files of an Odoo installation that aren't needed at runtime.
+
+This script is embedded in the rendered Dockerfiles and runs with the
+python of the image, it must work with python 2.7 and python 3 and only
+use the standard library.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+
+
+CATEGORIES = [
+    "languages",
+    "tests",
+    "sourcemaps",
+    "docs",
+    "duplicates",
+]
+
+MANIFESTS = ["__manifest__.py", "__openerp__.py"]
+
+DOC_DIRECTORIES = ["doc", "docs"]
+
+DOC_FILES = ["README", "CHANGELOG", "HISTORY"]
+
+# Identical files smaller than this aren't worth a hardlink.
+MIN_DUPLICATE_SIZE = 1024
+
+
+def is_addon(path):
+    return any(
+        os.path.exists(os.path.join(path, manifest))
+        for manifest in MANIFESTS
+    )
+
+
+def get_kept_languages(languages):
+    """
+    Returns the translation files to keep.
+
+    A language like fr_BE also needs the translations of fr that are
+    loaded before its own translations.
+    """
+    if not languages or languages == "all":
+        return None
+
+    kept = set()
+
+    for language in languages.split(','):
+        language = language.strip()
+        kept.add(language)
+        kept.add(language.split('_')[0])
+
+    return kept
+
+
+def is_unused_translation(path, name, kept):
+    if kept is None:
+        return False
+
+    if os.path.basename(path) not in ("i18n", "i18n_extra"):
+        return False
+
+    base, ext = os.path.splitext(name)
+
+    if ext == ".pot":
+        return True
+
+    return ext == ".po" and base not in kept
+
+
+def is_doc_file(name):
+    base = os.path.splitext(name)[0].upper()
+    return base in DOC_FILES
+
+
+def get_digest(path):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as fin:
+        for chunk in iter(lambda: fin.read(65536), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def get_size(path):
+    if os.path.islink(path):
+        return 0
+
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    total = 0
+
+    for root, _, files in os.walk(path):
+        for name in files:
+            filename = os.path.join(root, name)
+
+            if not os.path.islink(filename):
+                total += os.path.getsize(filename)
+
+    return total
+
+
+class Pruner(object):
+
+    def __init__(self, categories, languages, dry_run=False):
+        self.categories = categories
+        self.kept = get_kept_languages(languages)
+        self.dry_run = dry_run
+        self.removed = set()
+        self.report = dict(
+            (category, {"files": 0, "bytes": 0})
+            for category in categories
+        )
+
+    def remove(self, category, path):
+        stats = self.report[category]
+        stats["bytes"] += get_size(path)
+        stats["files"] += 1
+
+        if self.dry_run:
+            self.removed.add(path)
+            return
+
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    def prune(self, top):
+        for root, dirs, files in os.walk(top):
+            addon = is_addon(root)
+
+            for name in list(dirs):
+                path = os.path.join(root, name)
+
+                if not addon:
+                    continue
+
+                if "tests" in self.categories and name == "tests":
+                    self.remove("tests", path)
+                    dirs.remove(name)
+                elif "docs" in self.categories and name in DOC_DIRECTORIES:
+                    self.remove("docs", path)
+                    dirs.remove(name)
+
+            for name in files:
+                path = os.path.join(root, name)
+                category = self.get_category(root, name, addon)
+
+                if category:
+                    self.remove(category, path)
+
+    def get_category(self, root, name, addon):
+        """
+        Returns the category of a file to prune or None to keep it.
+        """
+        categories = self.categories
+
+        if (
+            "languages" in categories and
+            is_unused_translation(root, name, self.kept)
+        ):
+            return "languages"
+
+        if "sourcemaps" in categories and name.endswith(".map"):
+            return "sourcemaps"
+
+        if "docs" in categories and addon and is_doc_file(name):
+            return "docs"
+
+        return None
+
+    def deduplicate(self, tops):
+        """
+        Replace identical files by hardlinks to a single copy.
+        """
+        by_size = {}
+
+        for top in tops:
+            for root, dirs, files in os.walk(top):
+                dirs[:] = [
+                    name
+                    for name in dirs
+                    if os.path.join(root, name) not in self.removed
+                ]
+
+                for name in files:
+                    path = os.path.join(root, name)
+
+                    if os.path.islink(path) or path in self.removed:
+                        continue
+
+                    size = os.path.getsize(path)
+
+                    if size >= MIN_DUPLICATE_SIZE:
+                        by_size.setdefault(size, []).append(path)
+
+        stats = self.report["duplicates"]
+
+        for size, paths in by_size.items():
+            if len(paths) < 2:
+                continue
+
+            originals = {}
+
+            for path in paths:
+                original = originals.setdefault(get_digest(path), path)
+
+                if original == path:
+                    continue
+
+                if os.stat(original).st_ino == os.stat(path).st_ino:
+                    continue
+
+                stats["files"] += 1
+                stats["bytes"] += size
+
+                if not self.dry_run:
+                    temp = path + ".slim"
+                    os.link(original, temp)
+                    os.rename(temp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--languages",
+        default="all",
+        help="Languages to keep as a csv value"
+    )
+    parser.add_argument(
+        "--categories",
+        default=",".join(CATEGORIES),
+        help="Categories of files to prune as a csv value"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report the files to prune without removing them"
+    )
+    parser.add_argument("paths", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    categories = [
+        category
+        for category in args.categories.split(',')
+        if category in CATEGORIES
+    ]
+
+    pruner = Pruner(categories, args.languages, args.dry_run)
+    paths = [path for path in args.paths if os.path.isdir(path)]
+
+    for path in paths:
+        pruner.prune(path)
+
+    if "duplicates" in categories:
+        pruner.deduplicate(paths)
+
+    total = 0
+
+    for category in categories:
+        stats = pruner.report[category]
+        total += stats["bytes"]
+        print("{0:<12} {1:>8} files {2:>14} bytes".format(
+            category, stats["files"], stats["bytes"]
+        ))
+
+    print("{0:<12} {1:>29} bytes".format("total", total))
+    print("##odootools-slim " + json.dumps(pruner.report, sort_keys=True))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
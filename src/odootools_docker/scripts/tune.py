@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Size the Odoo workers with the cpu and memory limits of the container.
+
+This script is embedded in the rendered Dockerfiles and installed as the
+entrypoint of the image. It reads the limits of the cgroup of the
+container, sets the environment variables of the options of Odoo that
+aren't already set and executes the command passed. It must work with
+python 2.7 and python 3 and only use the standard library.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import argparse
+import multiprocessing
+
+
+MB = 1024 * 1024
+
+# Default limits of Odoo, the memory limits of a worker are never set
+# higher than them.
+DEFAULT_LIMIT_MEMORY_SOFT = 2048 * MB
+DEFAULT_LIMIT_MEMORY_HARD = 2560 * MB
+
+DEFAULT_MIN_WORKER_MEMORY = 384 * MB
+DEFAULT_DB_CONNECTIONS = 100
+DEFAULT_MAX_CRON_THREADS = 2
+
+# cgroup v1 reports a huge number instead of max when there's no limit.
+UNLIMITED = 2 ** 60
+
+
+def read_file(root, path):
+    try:
+        with open(os.path.join(root, path.lstrip('/'))) as fin:
+            return fin.read().strip()
+    except (IOError, OSError):
+        return None
+
+
+def read_cpu_limit(root="/"):
+    """
+    Returns the number of cpus allowed by the cgroup or None.
+    """
+    cpu_max = read_file(root, "/sys/fs/cgroup/cpu.max")
+
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+
+        if quota == "max":
+            return None
+
+        return float(quota) / float(period or 100000)
+
+    quota = read_file(root, "/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = read_file(root, "/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+    if quota and period and int(quota) > 0:
+        return float(quota) / float(period)
+
+    return None
+
+
+def read_memory_limit(root="/"):
+    """
+    Returns the memory in bytes allowed by the cgroup or None.
+    """
+    memory_max = read_file(root, "/sys/fs/cgroup/memory.max")
+
+    if memory_max:
+        return None if memory_max == "max" else int(memory_max)
+
+    limit = read_file(root, "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+    if limit and int(limit) < UNLIMITED:
+        return int(limit)
+
+    return None
+
+
+def read_total_memory(root="/"):
+    """
+    Returns the memory of the host in bytes or None.
+    """
+    meminfo = read_file(root, "/proc/meminfo") or ""
+
+    for line in meminfo.splitlines():
+        if line.startswith("MemTotal:"):
+            return int(line.split()[1]) * 1024
+
+    return None
+
+
+def get_cpu_count(root="/"):
+    cpus = read_cpu_limit(root)
+
+    if cpus is None:
+        cpus = multiprocessing.cpu_count()
+
+    return max(cpus, 1)
+
+
+def get_memory(root="/"):
+    return read_memory_limit(root) or read_total_memory(root)
+
+
+def get_tuning(
+    cpus,
+    memory,
+    min_worker_memory=DEFAULT_MIN_WORKER_MEMORY,
+    db_connections=DEFAULT_DB_CONNECTIONS,
+    max_cron_threads=DEFAULT_MAX_CRON_THREADS,
+    workers=None
+):
+    """
+    Derive the options of Odoo from the cpus and memory available.
+
+    Odoo recommends 2 workers per cpu plus one. The workers are reduced
+    when the memory can't give each worker and cron thread at least
+    `min_worker_memory`. The memory is then shared between the workers
+    and cron threads to set their limits. The database connections are
+    shared between all the processes. When `workers` is passed, only the
+    limits are derived.
+
+    Returns:
+        HashMap<Str, int>: The workers, limit_memory_soft,
+        limit_memory_hard and db_maxconn.
+    """
+    if workers is None:
+        workers = int(round(cpus * 2)) + 1
+
+        if memory:
+            max_processes = memory // min_worker_memory
+            workers = min(workers, max_processes - max_cron_threads)
+
+        workers = max(workers, 1)
+
+    processes = workers + max_cron_threads
+
+    if memory:
+        limit_memory_hard = min(
+            memory // processes,
+            DEFAULT_LIMIT_MEMORY_HARD
+        )
+    else:
+        limit_memory_hard = DEFAULT_LIMIT_MEMORY_HARD
+
+    limit_memory_soft = min(
+        limit_memory_hard * 4 // 5,
+        DEFAULT_LIMIT_MEMORY_SOFT
+    )
+
+    # One more process for the gevent worker
+    db_maxconn = max(db_connections // (processes + 1), 2)
+
+    return {
+        "workers": workers,
+        "limit_memory_soft": limit_memory_soft,
+        "limit_memory_hard": limit_memory_hard,
+        "db_maxconn": db_maxconn,
+    }
+
+
+def get_environment(root="/", environ=None):
+    """
+    Returns the environment variables of the options of Odoo.
+
+    The environment variables already set are kept.
+    """
+    if environ is None:
+        environ = os.environ
+
+    tuning = get_tuning(
+        get_cpu_count(root),
+        get_memory(root),
+        min_worker_memory=int(
+            environ.get(
+                "ODOO_TUNE_MIN_WORKER_MEMORY",
+                DEFAULT_MIN_WORKER_MEMORY // MB
+            )
+        ) * MB,
+        db_connections=int(
+            environ.get("ODOO_TUNE_DB_CONNECTIONS", DEFAULT_DB_CONNECTIONS)
+        ),
+        max_cron_threads=int(
+            environ.get("ODOO_MAX_CRON_THREADS", DEFAULT_MAX_CRON_THREADS)
+        ),
+        workers=(
+            int(environ["ODOO_WORKERS"]) if "ODOO_WORKERS" in environ
+            else None
+        ),
+    )
+
+    return dict(
+        ("ODOO_{}".format(key.upper()), str(value))
+        for key, value in tuning.items()
+        if "ODOO_{}".format(key.upper()) not in environ
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--root",
+        default="/",
+        help="Root of the filesystem in which the cgroup files are read"
+    )
+    parser.add_argument(
+        "--print",
+        dest="print_only",
+        action="store_true",
+        help="Print the environment variables instead of running a command"
+    )
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+
+    args = parser.parse_args(argv)
+
+    if os.environ.get("ODOO_TUNE", "1") in ("0", "false", "False"):
+        environ = {}
+    else:
+        environ = get_environment(args.root)
+
+    if args.print_only or not args.command:
+        for key, value in sorted(environ.items()):
+            print("{}={}".format(key, value))
+        return 0
+
+    os.environ.update(environ)
+    os.execvp(args.command[0], args.command)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
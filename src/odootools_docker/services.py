@@ -0,0 +1,35 @@
+def load_services(filename):
+    """
+    Load the service manifests of a service file.
+
+    Returns:
+        ServiceManifests: The manifests of all the environments.
+    """
+    import toml
+    from odoo_tools.services.objects import ServiceManifests
+
+    return ServiceManifests.parse(toml.load(filename))
+
+
+def get_service_odoo_context(service, repo, languages):
+    """
+    Returns the odoo context of a service.
+
+    Args:
+      service (ServiceManifest): The resolved service of an environment.
+      repo (Str): The odoo repository used when the service has none.
+      languages (Str): The languages used when the service has none.
+
+    Returns:
+        HashMap<Str, Str>: The odoo context like `get_odoo_context`.
+    """
+    odoo_config = service.odoo
+    repo_config = odoo_config.repo
+
+    return {
+        "version": odoo_config.version,
+        "ref": repo_config.ref,
+        "repo": repo_config.url or repo,
+        "release": "",
+        "languages": getattr(odoo_config, 'languages', None) or languages
+    }
@@ -0,0 +1,121 @@
+import os
+import re
+import subprocess
+
+
+# Strategies used to fetch the sources of Odoo during the build.
+SOURCE_STRATEGIES = [
+    "git",
+    "archive",
+    "prefetch",
+]
+
+# Name of the stage or build context providing the sources and the
+# directory in which it's mounted.
+SOURCE_CONTEXT = "odoo-source"
+SOURCE_MOUNT = "/tmp/odoo-source"
+
+NIGHTLY_URL = "https://nightly.odoo.com"
+
+COMMIT_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+def get_release_archive(version, release, base=NIGHTLY_URL):
+    """
+    Returns the url and file name of a nightly release of Odoo.
+
+    The file name is the one used by `odootools manage setup` to look
+    up the archive in its cache. `base` can point to a mirror of the
+    nightly builds.
+
+    Returns:
+        Tuple<Str, Str>: The url and the file name of the archive.
+    """
+    if '/' in release:
+        path_version = release.split('/', 1)[0]
+    else:
+        path_version = version
+
+    filename = "odoo_{version}.{release}.tar.gz".format(
+        version=version,
+        release=release
+    )
+
+    url = "{base}/{version}/nightly/src/{filename}".format(
+        base=base.rstrip('/'),
+        version=path_version,
+        filename=filename
+    )
+
+    return url, filename
+
+
+def get_prefetch_ref(ref):
+    """
+    Returns the reference storing a prefetched ref in the bare repository.
+
+    Branches and tags are stored as branches so they can be fetched by
+    name. Commits are stored in their own namespace to keep them
+    reachable.
+    """
+    if COMMIT_RE.match(ref):
+        return "refs/prefetch/{}".format(ref)
+
+    return "refs/heads/{}".format(ref)
+
+
+def prefetch_repo(repo, ref, output):
+    """
+    Fetch a ref of a repository into a local bare repository.
+
+    Only the commit of the ref is fetched. The bare repository can be
+    reused for other refs and passed to the build as the `odoo-source`
+    build context.
+
+    Args:
+      repo (Str): The url or path of the repository.
+      ref (Str): The branch, tag or commit to fetch.
+      output (Str): The directory of the bare repository.
+
+    Returns:
+        Str: The commit fetched.
+    """
+    if not os.path.exists(os.path.join(output, 'HEAD')):
+        subprocess.run(
+            ["git", "init", "--quiet", "--bare", output],
+            check=True
+        )
+
+    subprocess.run(
+        ["git", "-C", output, "fetch", "--quiet", "--depth", "1", repo, ref],
+        check=True
+    )
+
+    commit = subprocess.run(
+        ["git", "-C", output, "rev-parse", "FETCH_HEAD"],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True
+    ).stdout.strip()
+
+    subprocess.run(
+        ["git", "-C", output, "update-ref", get_prefetch_ref(ref), commit],
+        check=True
+    )
+
+    return commit
+
+
+def prefetch_archive(version, release, cache_dir=None):
+    """
+    Fetch a nightly release of Odoo into the local cache.
+
+    Returns:
+        Tuple<Str, Str>: The path of the archive and its sha256.
+    """
+    from .fetch import fetch_cached, sha256_file
+
+    url, filename = get_release_archive(version, release)
+    path = fetch_cached(url, "odoo", filename, cache_dir=cache_dir)
+
+    return path, sha256_file(path)
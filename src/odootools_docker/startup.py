@@ -0,0 +1,131 @@
+import sys
+import subprocess
+
+
+DEFAULT_BUDGET = 100
+
+
+def parse_importtime(output):
+    """
+    Parse the output of `python -X importtime`.
+
+    Args:
+      output (Str): The stderr of the python process.
+
+    Returns:
+        List<Tuple<Str, int, int>>: The name, self time and cumulative time
+        in microseconds of each top level import.
+    """
+    imports = []
+
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        parts = line[len('import time:'):].split('|')
+
+        if len(parts) != 3:
+            continue
+
+        self_time, cumulative, name = parts
+
+        if not self_time.strip().isdigit():
+            continue
+
+        if name.startswith('  '):
+            continue
+
+        imports.append((name.strip(), int(self_time), int(cumulative)))
+
+    return imports
+
+
+def measure_imports(modules, python=None):
+    """
+    Measure the time needed to import modules in a new interpreter.
+
+    Imports done by the interpreter at startup, like `site`, are not
+    counted.
+
+    Args:
+      modules (List<Str>): Names of the modules to import.
+      python (Str): The python executable to use.
+
+    Returns:
+        HashMap<Str, Any>: The total time in milliseconds and the top
+        level imports sorted by cumulative time.
+    """
+    python = python or sys.executable
+
+    code = "; ".join(
+        "import {}".format(module)
+        for module in modules
+    ) or "pass"
+
+    def run(source):
+        proc = subprocess.run(
+            [python, "-X", "importtime", "-c", source],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True
+        )
+
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr)
+
+        return parse_importtime(proc.stderr)
+
+    startup = set(name for name, _, _ in run("pass"))
+
+    imports = [
+        (name, cumulative)
+        for name, _, cumulative in run(code)
+        if name not in startup
+    ]
+
+    imports.sort(key=lambda item: item[1], reverse=True)
+
+    return {
+        "total": sum(cumulative for _, cumulative in imports) / 1000.0,
+        "imports": [
+            {"name": name, "time": cumulative / 1000.0}
+            for name, cumulative in imports
+        ]
+    }
+
+
+def check_budget(commands, budget=DEFAULT_BUDGET, repeat=3):
+    """
+    Check the import time of each command against a budget.
+
+    The fastest of `repeat` measurements is kept to reduce the noise.
+
+    Args:
+      commands (HashMap<Str, Str>): Commands to check with the path
+        of the command as `module:attribute`.
+      budget (float): Maximum import time in milliseconds.
+      repeat (int): Number of measurements per command.
+
+    Returns:
+        HashMap<Str, HashMap<Str, Any>>: The result of each command.
+    """
+    results = {}
+
+    for name, path in commands.items():
+        module = path.split(':', 1)[0]
+
+        measures = [
+            measure_imports(["odootools_docker.cli.docker", module])
+            for _ in range(max(repeat, 1))
+        ]
+
+        best = min(measures, key=lambda measure: measure['total'])
+
+        results[name] = {
+            "total": best['total'],
+            "budget": budget,
+            "ok": best['total'] <= budget,
+            "imports": best['imports'][:5],
+        }
+
+    return results
@@ -0,0 +1,183 @@
+import re
+
+
+TIMING_MARKER = "##odootools-timing"
+
+# Lines of BuildKit logs with `--progress=plain` are prefixed by the id
+# of the vertex and the seconds elapsed since it started. Other logs
+# print the marker at the start of the line.
+TIMING_LINE_RE = re.compile(
+    r"^(?:#(?P<vertex>\d+) [\d.]+ )?"
+    + re.escape(TIMING_MARKER)
+    + r" (?P<step>\S+) (?P<phase>\S+) (?P<time>[\d.]+)\s*$"
+)
+
+END_PHASE = "end"
+
+
+def parse_log(lines):
+    """
+    Parse the timing markers printed in a build log.
+
+    Markers are printed by steps rendered with `instrument` enabled.
+    Each marker tells when a phase of a step started. The `end` phase
+    tells when the last phase ended.
+
+    Args:
+      lines (Iterable<Str>): The lines of the build log.
+
+    Returns:
+        List<HashMap<Str, Any>>: The vertex, step, phase and time of
+        each marker in the order of the log.
+    """
+    markers = []
+
+    for line in lines:
+        match = TIMING_LINE_RE.match(line.strip())
+
+        if not match:
+            continue
+
+        markers.append({
+            "vertex": match.group('vertex'),
+            "step": match.group('step'),
+            "phase": match.group('phase'),
+            "time": float(match.group('time')),
+        })
+
+    return markers
+
+
+def get_timings(markers):
+    """
+    Compute the time spent in each phase of each step.
+
+    The duration of a phase is the time until the next marker of the same
+    step in the same vertex. When a step is built more than once in the
+    same log, durations are added.
+
+    Returns:
+        HashMap<Str, Any>: The total time and the time of each step with
+        the time of each of its phases.
+    """
+    runs = {}
+
+    for marker in markers:
+        key = (marker['vertex'], marker['step'])
+        runs.setdefault(key, []).append(marker)
+
+    steps = {}
+
+    for (_, step), run in runs.items():
+        run = sorted(run, key=lambda marker: marker['time'])
+        step_timing = steps.setdefault(step, {"total": 0.0, "phases": {}})
+
+        for marker, next_marker in zip(run, run[1:]):
+            if marker['phase'] == END_PHASE:
+                continue
+
+            duration = next_marker['time'] - marker['time']
+
+            phase = marker['phase']
+            phases = step_timing['phases']
+            phases[phase] = phases.get(phase, 0.0) + duration
+            step_timing['total'] += duration
+
+    return {
+        "total": sum(step['total'] for step in steps.values()),
+        "steps": steps,
+    }
+
+
+def compare_timings(old, new, threshold=0.2, min_delta=1.0):
+    """
+    Find the steps and phases that got slower between two reports.
+
+    The reference can also be the output of `timing --compare`, its
+    report is used.
+
+    Args:
+      old (HashMap<Str, Any>): The reference report of `get_timings`.
+      new (HashMap<Str, Any>): The report to check.
+      threshold (float): The relative slowdown tolerated.
+      min_delta (float): The slowdown in seconds ignored as noise.
+
+    Returns:
+        List<HashMap<Str, Any>>: The regressions found.
+    """
+    def check(step, phase, old_time, new_time):
+        delta = new_time - old_time
+
+        if delta < min_delta or new_time <= old_time * (1 + threshold):
+            return
+
+        regressions.append({
+            "step": step,
+            "phase": phase,
+            "old": old_time,
+            "new": new_time,
+            "delta": delta,
+        })
+
+    regressions = []
+
+    old = old.get('report', old)
+
+    for step, new_step in new['steps'].items():
+        old_step = old['steps'].get(step)
+
+        if old_step is None:
+            continue
+
+        check(step, None, old_step['total'], new_step['total'])
+
+        for phase, new_time in new_step['phases'].items():
+            if phase in old_step['phases']:
+                check(step, phase, old_step['phases'][phase], new_time)
+
+    return regressions
+
+
+def format_timings(report):
+    """
+    Format a timing report as text.
+
+    Returns:
+        Str: The time of each step followed by the time of its phases.
+    """
+    lines = []
+
+    for step, step_timing in report['steps'].items():
+        lines.append("{:<50} {:>9.2f}s".format(step, step_timing['total']))
+
+        for phase, duration in step_timing['phases'].items():
+            lines.append("  {:<48} {:>9.2f}s".format(phase, duration))
+
+    lines.append("{:<50} {:>9.2f}s".format("total", report['total']))
+
+    return "\n".join(lines)
+
+
+def format_regressions(regressions):
+    """
+    Format the regressions found by `compare_timings` as text.
+
+    Returns:
+        Str: One line per regression.
+    """
+    lines = []
+
+    for regression in regressions:
+        name = regression['step']
+
+        if regression['phase']:
+            name = "{}/{}".format(name, regression['phase'])
+
+        lines.append("{:<50} {:>9.2f}s -> {:>9.2f}s (+{:.2f}s)".format(
+            name,
+            regression['old'],
+            regression['new'],
+            regression['delta'],
+        ))
+
+    return "\n".join(lines)
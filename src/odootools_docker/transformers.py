@@ -0,0 +1,308 @@
+from importlib import import_module
+
+
+ENTRY_POINT_GROUP = "odootools_docker.transformers"
+
+DEFAULT_WKHTMLTOPDF_VERSION = "0.12.6-1"
+
+BUILTIN_TRANSFORMERS = {
+    "wkhtmltopdf": "odootools_docker.transformers:wkhtmltopdf",
+    "keys": "odootools_docker.transformers:keys",
+    "debs": "odootools_docker.transformers:debs",
+    "wheelhouse": "odootools_docker.transformers:wheelhouse",
+    "plan": "odootools_docker.transformers:plan",
+    "resolve": "odootools_docker.transformers:resolve",
+}
+
+
+def wkhtmltopdf(context, version=DEFAULT_WKHTMLTOPDF_VERSION, sha256=None):
+    """
+    Add the wkhtmltopdf package to the deb_files of a context.
+
+    The package matches the Debian architecture of `os_arch`, in multi
+    arch mode the url contains `${TARGETARCH}` that is expanded during
+    the build so it's only possible when Docker and Debian name the
+    architectures the same way.
+
+    When a sha256 is passed, the package is fetched by the `debs` stage
+    and verified by BuildKit. A single sha256 can't match the package
+    of every arch so it isn't accepted in multi arch mode.
+
+    Args:
+      context (HashMap<str, Any>): The context to transform.
+      version (Str): The version of wkhtmltopdf to install.
+      sha256 (Str): The sha256 of the package.
+
+    Returns:
+        HashMap<str, Any>: The transformed context.
+
+    Raises:
+        ValueError: When a sha256 is passed in multi arch mode or an
+        architecture has a different Debian name in multi arch mode.
+    """
+    from .renderer import get_arch, get_deb_arch
+    from .debs import ensure_debs_stage
+
+    multi_arch = context.get('multi_arch')
+
+    if sha256 and multi_arch:
+        raise ValueError(
+            "The sha256 of wkhtmltopdf can't be pinned in multi arch mode"
+        )
+
+    if isinstance(multi_arch, dict):
+        renamed = [
+            arch for arch in multi_arch.get('arches', [])
+            if get_deb_arch(arch) != arch
+        ]
+
+        if renamed:
+            raise ValueError(
+                "wkhtmltopdf can't be installed in multi arch mode for "
+                "{}, build one image per architecture instead".format(
+                    ", ".join(renamed)
+                )
+            )
+
+    deb_files = context.setdefault('deb_files', [])
+
+    base_repo = "https://github.com/wkhtmltopdf/packaging/releases/download"
+
+    url_format = (
+        "{base_repo}/{version}/wkhtmltox_{version}.{os_version}_{os_arch}.deb"
+    )
+
+    url = url_format.format(
+        base_repo=base_repo,
+        version=version,
+        os_version=context['os_version'],
+        os_arch=get_deb_arch(context.get('os_arch') or get_arch())
+    )
+
+    deb = {
+        "url": url,
+        "name": "wkhtmltox"
+    }
+
+    if sha256:
+        deb['sha256'] = sha256
+
+    deb_files.append(deb)
+
+    return ensure_debs_stage(context)
+
+
+def keys(context, output="keys", keyserver=None, cache_dir=None):
+    """
+    Vendor the signing keys of the deb repositories.
+
+    See `keys.vendor_keys`.
+    """
+    from .keys import vendor_keys, DEFAULT_KEYSERVER
+
+    return vendor_keys(
+        context,
+        output,
+        keyserver=keyserver or DEFAULT_KEYSERVER,
+        cache_dir=cache_dir
+    )
+
+
+def debs(context, output="debs", mode="copy", cache_dir=None):
+    """
+    Pin the deb files of a context with their sha256.
+
+    See `debs.vendor_debs`.
+    """
+    from .debs import vendor_debs
+
+    return vendor_debs(context, output, mode=mode, cache_dir=cache_dir)
+
+
+def wheelhouse(
+    context,
+    output="wheelhouse",
+    requirements=None,
+    python=None,
+    index_url=None
+):
+    """
+    Collect the wheels of a context and install them from the wheelhouse.
+
+    See `wheelhouse.build_wheelhouse`. The wheelhouse is mounted from
+    the build context so it must be under the current directory.
+    """
+    from .fetch import get_context_path
+    from .wheelhouse import build_wheelhouse
+
+    if isinstance(requirements, str):
+        requirements = [requirements]
+
+    path = get_context_path(output)
+
+    build_wheelhouse(
+        context,
+        output,
+        requirements=requirements,
+        python=python,
+        index_url=index_url
+    )
+
+    context['wheelhouse'] = {
+        "path": path
+    }
+
+    return context
+
+
+def plan(context):
+    """
+    Reorder the steps of a context to maximize cache hits.
+
+    See `planner.plan_steps`.
+    """
+    from .planner import plan_steps
+
+    context, _ = plan_steps(context)
+
+    return context
+
+
+def resolve(
+    context,
+    ttl=None,
+    concurrency=None,
+    cache_dir=None,
+    checksums=None
+):
+    """
+    Resolve the refs, releases, checksums and keys of a context.
+
+    The options override the defaults of `renderer.get_resolve_config`,
+    they can be passed as strings by `apply_transformers`. See
+    `resolver.resolve_contexts`.
+    """
+    from .renderer import get_resolve_config
+    from .resolver import resolve_contexts
+
+    options = {}
+
+    if ttl is not None:
+        options['ttl'] = int(ttl)
+
+    if concurrency is not None:
+        options['concurrency'] = int(concurrency)
+
+    if cache_dir is not None:
+        options['cache_dir'] = cache_dir
+
+    if checksums is not None:
+        options['checksums'] = checksums not in (False, "0", "false", "no")
+
+    config = get_resolve_config({"resolve": options or True})
+    resolve_contexts([context], **config)
+
+    return context
+
+
+def iter_entry_points(group):
+    """
+    Returns the entry points of a group.
+
+    Returns:
+        List<EntryPoint>: Entry points with a name and a load method.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        import pkg_resources
+        return list(pkg_resources.iter_entry_points(group))
+
+    eps = entry_points()
+
+    if hasattr(eps, 'select'):
+        return list(eps.select(group=group))
+
+    return list(eps.get(group, []))
+
+
+def get_transformers():
+    """
+    Returns the available transformers.
+
+    Transformers are the builtin transformers and the ones registered
+    by other packages in the `odootools_docker.transformers` entry
+    point group. A transformer is a callable receiving a context and
+    keyword options and returning the transformed context.
+
+    Returns:
+        HashMap<Str, Callable>: A loader for each transformer by name.
+    """
+    def load_path(path):
+        module_name, attr = path.split(':', 1)
+        return getattr(import_module(module_name), attr)
+
+    transformers = {
+        name: (lambda path=path: load_path(path))
+        for name, path in BUILTIN_TRANSFORMERS.items()
+    }
+
+    for entry_point in iter_entry_points(ENTRY_POINT_GROUP):
+        transformers[entry_point.name] = entry_point.load
+
+    return transformers
+
+
+def parse_transformer(spec):
+    """
+    Parse a transformer specification.
+
+    A transformer is specified as `name` or `name:key=value,key=value`.
+
+    Returns:
+        Tuple<Str, HashMap<Str, Str>>: The name and options.
+    """
+    if ':' not in spec:
+        return spec, {}
+
+    name, raw_options = spec.split(':', 1)
+
+    options = {}
+
+    for option in raw_options.split(','):
+        if not option:
+            continue
+
+        key, _, value = option.partition('=')
+        options[key.strip().replace('-', '_')] = value
+
+    return name, options
+
+
+def apply_transformers(context, specs):
+    """
+    Apply transformers to a context in the order given.
+
+    Args:
+      context (HashMap<str, Any>): The context to transform.
+      specs (List<Str>): Transformers as parsed by `parse_transformer`.
+
+    Returns:
+        HashMap<str, Any>: The transformed context.
+
+    Raises:
+        ValueError: When a transformer doesn't exist or fails on an
+        invalid context.
+    """
+    transformers = get_transformers()
+
+    for spec in specs:
+        name, options = parse_transformer(spec)
+
+        if name not in transformers:
+            raise ValueError("Unknown transformer {}".format(name))
+
+        transformer = transformers[name]()
+        context = transformer(context, **options)
+
+    return context
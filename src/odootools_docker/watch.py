@@ -0,0 +1,350 @@
+import os
+import json
+import time
+
+from .fingerprint import get_fingerprints, diff_fingerprints
+from .renderer import get_environment, render
+
+
+DEFAULT_INTERVAL = 0.2
+
+# Time in seconds during which events are merged so the few writes
+# done by an editor to save a file trigger a single render.
+DEBOUNCE = 0.02
+
+
+def get_snapshot(paths):
+    """
+    Returns the modification time of the files watched.
+
+    Directories are walked recursively.
+
+    Args:
+      paths (List<Str>): Files and directories to watch.
+
+    Returns:
+        HashMap<Str, int>: The modification time in ns of each file.
+    """
+    snapshot = {}
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                for filename in filenames:
+                    filename = os.path.join(root, filename)
+                    try:
+                        snapshot[filename] = os.stat(filename).st_mtime_ns
+                    except OSError:
+                        pass
+        else:
+            try:
+                snapshot[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+
+    return snapshot
+
+
+def diff_snapshots(old, new):
+    """
+    Returns the files added, removed or modified between two snapshots.
+
+    Returns:
+        Set<Str>: The paths that changed.
+    """
+    return set(
+        path
+        for path in set(old) | set(new)
+        if old.get(path) != new.get(path)
+    )
+
+
+def get_template_names(template_dirs):
+    """
+    Returns the names of the templates found in the template dirs.
+
+    Returns:
+        Set<Str>: The names relative to their template dir.
+    """
+    names = set()
+
+    for dirname in template_dirs:
+        for path in get_snapshot([dirname]):
+            names.add(
+                os.path.relpath(path, dirname).replace(os.path.sep, '/')
+            )
+
+    return names
+
+
+def evict_templates(env, names):
+    """
+    Remove templates from the cache of an environment.
+
+    The other templates stay compiled.
+    """
+    if env.cache is None:
+        return
+
+    for key in list(env.cache.keys()):
+        if key[1] in names:
+            del env.cache[key]
+
+
+class PollingWatcher(object):
+    """
+    Watch files by comparing their modification time periodically.
+    """
+
+    def __init__(self, paths, interval=DEFAULT_INTERVAL):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = get_snapshot(paths)
+
+    def wait(self):
+        """
+        Block until a file changes.
+
+        Returns:
+            Set<Str>: The paths that changed.
+        """
+        while True:
+            time.sleep(self.interval)
+
+            snapshot = get_snapshot(self.paths)
+            changed = diff_snapshots(self.snapshot, snapshot)
+            self.snapshot = snapshot
+
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(object):
+    """
+    Watch files with inotify.
+
+    Directories are watched recursively and files are watched through
+    their directory, so files replaced by editors are still watched.
+    The events only wake up the watcher, the paths that changed are
+    found by comparing the snapshots.
+    """
+
+    def __init__(self, paths):
+        from inotify_simple import INotify, flags
+
+        self.paths = paths
+        self.inotify = INotify()
+        self.mask = (
+            flags.CLOSE_WRITE | flags.MODIFY | flags.CREATE |
+            flags.DELETE | flags.MOVED_TO | flags.MOVED_FROM
+        )
+        self.watched = set()
+        self.add_watches()
+        self.snapshot = get_snapshot(paths)
+
+    def add_watches(self):
+        dirnames = set()
+
+        for path in self.paths:
+            if os.path.isdir(path):
+                dirnames.update(root for root, _, _ in os.walk(path))
+            else:
+                dirnames.add(os.path.dirname(os.path.abspath(path)))
+
+        for dirname in dirnames - self.watched:
+            try:
+                self.inotify.add_watch(dirname, self.mask)
+                self.watched.add(dirname)
+            except OSError:
+                pass
+
+    def wait(self):
+        """
+        Block until a file changes.
+
+        Returns:
+            Set<Str>: The paths that changed.
+        """
+        while True:
+            self.inotify.read()
+
+            while self.inotify.read(timeout=int(DEBOUNCE * 1000)):
+                pass
+
+            self.add_watches()
+
+            snapshot = get_snapshot(self.paths)
+            changed = diff_snapshots(self.snapshot, snapshot)
+            self.snapshot = snapshot
+
+            if changed:
+                return changed
+
+    def close(self):
+        self.inotify.close()
+
+
+def make_watcher(paths, polling=False, interval=DEFAULT_INTERVAL):
+    """
+    Returns a watcher of the paths.
+
+    inotify is used when the optional `inotify_simple` package is
+    installed, the files are polled otherwise.
+
+    Args:
+      paths (List<Str>): Files and directories to watch.
+      polling (bool): Poll the files even if inotify is available.
+      interval (float): Time in seconds between two polls.
+
+    Returns:
+        PollingWatcher|InotifyWatcher: The watcher.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (ImportError, OSError):
+            pass
+
+    return PollingWatcher(paths, interval=interval)
+
+
+class Renderer(object):
+    """
+    Render a context again when its file or its templates change.
+
+    The context and the jinja environment are kept in memory. Jinja
+    checks if the templates loaded are up to date before using them,
+    so only the templates changed are compiled again. The output is
+    only written when the Dockerfile changed.
+    """
+
+    def __init__(self, context=None, context_file=None, output=None):
+        self.context = context
+        self.context_file = context_file
+        self.output = output
+        self.env = None
+        self.dockerfile = None
+        self.fingerprints = None
+        self.templates = None
+
+    def get_paths(self):
+        """
+        Returns the paths to watch.
+        """
+        paths = list((self.context or {}).get('template_dirs') or [])
+
+        if self.context_file:
+            paths.append(self.context_file)
+
+        return paths
+
+    def load_context(self):
+        with open(self.context_file) as fin:
+            self.context = json.load(fin)
+
+    def update(self, changed=None):
+        """
+        Reload what changed and render the context.
+
+        Args:
+          changed (Set<Str>): The paths that changed, everything is
+            loaded when not passed.
+
+        Returns:
+            HashMap<Str, Any>: The time in ms, the first invalidated
+            step and the steps changed or removed.
+        """
+        start = time.perf_counter()
+
+        if self.context_file and (
+            changed is None or
+            self.context is None or
+            self.context_file in changed
+        ):
+            self.load_context()
+
+        template_dirs = self.context.get('template_dirs') or []
+        env = get_environment(template_dirs)
+
+        # Templates are cached by name, a template added in a template
+        # dir wouldn't replace the one already loaded from the package.
+        templates = get_template_names(template_dirs)
+
+        if env is self.env and templates != self.templates:
+            evict_templates(env, templates ^ self.templates)
+
+        self.env = env
+        self.templates = templates
+
+        dockerfile = render(self.context, env=env)
+        fingerprints = get_fingerprints(self.context, env=env)
+
+        if self.output and dockerfile != self.dockerfile:
+            with open(self.output + ".tmp", "w") as fout:
+                fout.write(dockerfile)
+            os.replace(self.output + ".tmp", self.output)
+
+        if self.fingerprints is None:
+            result = {
+                "changed": True,
+                "first_invalidated": None,
+                "steps": [step['name'] for step in fingerprints['steps']],
+                "removed": [],
+            }
+        else:
+            result = diff_fingerprints(self.fingerprints, fingerprints)
+
+        self.fingerprints = fingerprints
+        self.dockerfile = dockerfile
+
+        result['time'] = round((time.perf_counter() - start) * 1000.0, 3)
+
+        return result
+
+    def watch(self, callback, polling=False, interval=DEFAULT_INTERVAL):
+        """
+        Render the context and render it again on every change.
+
+        Errors raised while rendering, like syntax errors in templates
+        being edited, are passed to the callback and the files are still
+        watched. The watcher is kept between renders so the changes done
+        while rendering aren't missed, it's only replaced when the
+        template dirs of the context change.
+
+        Args:
+          callback (Callable): Called with the result of `update` or a
+            hashmap with the `error`.
+          polling (bool): Poll the files even if inotify is available.
+          interval (float): Time in seconds between two polls.
+        """
+        from jinja2 import TemplateError
+
+        changed = None
+        watcher = None
+        paths = None
+
+        try:
+            while True:
+                try:
+                    callback(self.update(changed))
+                except (OSError, ValueError, TemplateError) as exc:
+                    callback({"error": str(exc)})
+
+                if self.get_paths() != paths:
+                    if watcher is not None:
+                        watcher.close()
+
+                    paths = self.get_paths()
+                    watcher = make_watcher(
+                        paths,
+                        polling=polling,
+                        interval=interval
+                    )
+
+                changed = watcher.wait()
+        finally:
+            if watcher is not None:
+                watcher.close()
@@ -0,0 +1,452 @@
+import os
+import re
+import sys
+import json
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import subprocess
+from importlib.util import find_spec
+
+from .fetch import sha256_file
+
+
+WHEELHOUSE_MOUNT = "/tmp/wheelhouse"
+
+# Version of the glibc of each distribution used to select manylinux
+# wheels compatible with the image.
+GLIBC_VERSIONS = {
+    "bionic": "2_27",
+    "focal": "2_31",
+    "jammy": "2_35",
+}
+
+ARCH_MACHINES = {
+    "amd64": "x86_64",
+    "arm64": "aarch64",
+    "arm": "armv7l",
+}
+
+SDIST_EXTENSIONS = (".tar.gz", ".zip")
+
+# Project name at the start of a requirement, empty for pip options.
+REQUIREMENT_NAME = re.compile(r"[A-Za-z0-9._-]*")
+
+
+def get_odoo_requirements(context):
+    """
+    Returns the requirement file used by `odootools manage setup`.
+
+    odoo-tools ships pinned requirements for each version of Odoo. The
+    file is looked up in the locally installed odoo-tools package.
+
+    Returns:
+        Str: The path of the requirement file or None if not found.
+    """
+    spec = find_spec('odoo_tools')
+
+    if spec is None or not spec.submodule_search_locations:
+        return None
+
+    major = str(context['odoo']['version']).split('.')[0]
+
+    path = os.path.join(
+        list(spec.submodule_search_locations)[0],
+        'requirements',
+        'requirements-{}.0.txt'.format(major)
+    )
+
+    return path if os.path.exists(path) else None
+
+
+def get_platforms(context):
+    """
+    Returns the pip platform tags compatible with the image.
+
+    pip only accepts wheels whose tag is in the list passed with
+    `--platform`, so every manylinux tag supported by the glibc of the
+    image is listed down to manylinux2014 and, on x86_64, the older
+    manylinux1 and manylinux2010 tags.
+
+    Returns:
+        List<Str>: Manylinux platform tags like manylinux_2_31_x86_64
+        from the most to the least specific.
+
+    Raises:
+        ValueError: In multi arch mode as wheels differ by architecture.
+    """
+    if context.get('multi_arch'):
+        raise ValueError(
+            "A wheelhouse can't be built for a multi arch context, "
+            "build one per architecture instead."
+        )
+
+    arch = context['os_arch']
+    machine = ARCH_MACHINES.get(arch, arch)
+    glibc = int(GLIBC_VERSIONS.get(context['os_version'], "2_17")[2:])
+
+    platforms = [
+        "manylinux_2_{}_{}".format(minor, machine)
+        for minor in range(glibc, 16, -1)
+    ]
+    platforms.append("manylinux2014_{}".format(machine))
+
+    if machine == "x86_64":
+        platforms += [
+            "manylinux_2_12_x86_64",
+            "manylinux2010_x86_64",
+            "manylinux_2_5_x86_64",
+            "manylinux1_x86_64",
+        ]
+
+    return platforms
+
+
+def get_pip_args(context, target, python=None, index_url=None, binary=True):
+    """
+    Returns the pip command used to collect wheels.
+
+    When a python interpreter is provided, wheels are built with
+    `pip wheel` by this interpreter. It should run on the same
+    distribution as the image. Otherwise, wheels matching the python
+    version and platform of the image are downloaded.
+
+    pip only resolves dependencies for another platform when restricted
+    to binary wheels. With `binary` disabled, source distributions are
+    accepted when no wheel matches but dependencies aren't downloaded.
+
+    Returns:
+        List<Str>: The pip command.
+    """
+    if python:
+        args = [python, "-m", "pip", "wheel", "--wheel-dir", target]
+    else:
+        args = [
+            sys.executable, "-m", "pip", "download",
+            "--dest", target,
+            "--implementation", "cp",
+            "--python-version", context['python_bin'].replace('python', ''),
+        ]
+
+        if binary:
+            args += ["--only-binary", ":all:"]
+        else:
+            args += ["--no-deps", "--prefer-binary"]
+
+        for platform in get_platforms(context):
+            args += ["--platform", platform]
+
+    if index_url:
+        args += ["--index-url", index_url]
+
+    return args
+
+
+def canonicalize_name(name):
+    """
+    Returns the normalized name of a project as defined by PEP 503.
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def get_sdists(target):
+    """
+    Returns the source distributions downloaded in a directory.
+
+    Returns:
+        HashMap<Str, Str>: The path of each sdist by project name.
+    """
+    sdists = {}
+
+    for filename in os.listdir(target):
+        for ext in SDIST_EXTENSIONS:
+            if filename.endswith(ext):
+                name = filename[:-len(ext)].rsplit('-', 1)[0]
+                sdists[canonicalize_name(name)] = os.path.join(
+                    target, filename
+                )
+
+    return sdists
+
+
+def read_sdist_file(path, suffix):
+    """
+    Returns the content of the first file of an sdist ending with suffix.
+
+    Returns:
+        Str: The decoded content or None if not found.
+    """
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist(), key=len):
+                if name.endswith(suffix):
+                    return archive.read(name).decode('utf-8')
+    else:
+        with tarfile.open(path) as archive:
+            for member in sorted(archive.getmembers(),
+                                 key=lambda member: len(member.name)):
+                if member.isfile() and member.name.endswith(suffix):
+                    fin = archive.extractfile(member)
+                    return fin.read().decode('utf-8')
+
+    return None
+
+
+def get_sdist_requirements(path):
+    """
+    Returns the requirements of a source distribution.
+
+    Requirements are read from the `Requires-Dist` fields of PKG-INFO
+    or from the `requires.txt` of the egg-info written by setuptools.
+    Optional requirements are ignored.
+
+    Returns:
+        List<Str>: The requirements.
+    """
+    pkg_info = read_sdist_file(path, '/PKG-INFO') or ''
+
+    requirements = [
+        line.split(':', 1)[1].strip()
+        for line in pkg_info.splitlines()
+        if line.startswith('Requires-Dist:') and 'extra ==' not in line
+    ]
+
+    if requirements:
+        return requirements
+
+    requires = read_sdist_file(path, '.egg-info/requires.txt') or ''
+
+    for line in requires.splitlines():
+        line = line.strip()
+
+        if line.startswith('['):
+            break
+
+        if line:
+            requirements.append(line)
+
+    return requirements
+
+
+def read_requirements(filename):
+    """
+    Returns the lines of a requirement file and of the files it includes.
+
+    Returns:
+        List<Str>: The lines without comments.
+    """
+    lines = []
+
+    with open(filename) as fin:
+        for line in fin:
+            line = line.split(' #', 1)[0].strip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            included = re.match(r"^(-r|--requirement)[\s=]+(.+)$", line)
+
+            if included:
+                lines += read_requirements(os.path.join(
+                    os.path.dirname(filename), included.group(2)
+                ))
+            else:
+                lines.append(line)
+
+    return lines
+
+
+def download_packages(context, target, packages, requirements, index_url):
+    """
+    Download the wheels of packages and requirements for the image.
+
+    Packages are first downloaded without their dependencies allowing
+    source distributions when no wheel matches the image, like psycopg2
+    or python-ldap. The dependencies are then resolved in binary mode
+    for every requirement that isn't an sdist and for the requirements
+    of the sdists, along with setuptools and wheel to build them in the
+    image.
+
+    Raises:
+        subprocess.CalledProcessError: When pip fails, for example when
+        a dependency is only available as a source distribution.
+    """
+    args = get_pip_args(context, target, index_url=index_url, binary=False)
+    args += packages
+
+    for requirement in requirements:
+        args += ["-r", requirement]
+
+    subprocess.run(args, check=True, stdout=sys.stderr)
+
+    sdists = get_sdists(target)
+
+    lines = list(packages)
+
+    for requirement in requirements:
+        lines += read_requirements(requirement)
+
+    lines = [
+        line for line in lines
+        if canonicalize_name(REQUIREMENT_NAME.match(line).group(0))
+        not in sdists
+    ]
+
+    if sdists:
+        lines += ["setuptools", "wheel"]
+
+    for path in sorted(sdists.values()):
+        lines += get_sdist_requirements(path)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'requirements.txt')
+
+        with open(filename, 'w') as fout:
+            fout.write("\n".join(lines) + "\n")
+
+        args = get_pip_args(context, target, index_url=index_url)
+        args += ["-r", filename]
+
+        subprocess.run(args, check=True, stdout=sys.stderr)
+
+
+def load_index(output):
+    """
+    Load the index of a wheelhouse.
+
+    Returns:
+        HashMap<Str, HashMap<Str, Str>>: The sha256 and path of each file.
+    """
+    filename = os.path.join(output, 'index.json')
+
+    if not os.path.exists(filename):
+        return {}
+
+    with open(filename) as fin:
+        return json.load(fin)
+
+
+def write_index(output, index):
+    """
+    Write the index of a wheelhouse.
+
+    The index is written as `index.json` and as `index.html` that
+    can be used by pip with `--find-links`. uv only finds the wheels
+    at the top level of a directory, so each file is also linked at
+    the top level of the wheelhouse.
+    """
+    with open(os.path.join(output, 'index.json'), 'w') as fout:
+        json.dump(index, fout, indent=2, sort_keys=True)
+
+    links = [
+        '<a href="{path}#sha256={sha256}">{filename}</a><br/>'.format(
+            path=entry['path'],
+            sha256=entry['sha256'],
+            filename=filename
+        )
+        for filename, entry in sorted(index.items())
+    ]
+
+    with open(os.path.join(output, 'index.html'), 'w') as fout:
+        fout.write("<html><body>\n{}\n</body></html>\n".format(
+            "\n".join(links)
+        ))
+
+    for filename, entry in index.items():
+        link = os.path.join(output, filename)
+
+        if os.path.islink(link) and os.readlink(link) == entry['path']:
+            continue
+
+        if os.path.lexists(link):
+            os.remove(link)
+
+        os.symlink(entry['path'], link)
+
+
+def add_to_wheelhouse(source, output):
+    """
+    Add the files of a directory to a wheelhouse.
+
+    Files are stored by content in `blobs/<sha256>/<filename>` so
+    identical wheels collected for different contexts are stored
+    once.
+
+    Returns:
+        HashMap<Str, HashMap<Str, Str>>: The updated index.
+    """
+    index = load_index(output)
+
+    for filename in sorted(os.listdir(source)):
+        path = os.path.join(source, filename)
+        checksum = sha256_file(path)
+
+        relpath = "blobs/{}/{}".format(checksum, filename)
+        target = os.path.join(output, relpath)
+
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(path, target)
+
+        index[filename] = {
+            "sha256": checksum,
+            "path": relpath,
+        }
+
+    write_index(output, index)
+
+    return index
+
+
+def build_wheelhouse(
+    context,
+    output,
+    requirements=None,
+    python=None,
+    index_url=None
+):
+    """
+    Collect the wheels needed to install Odoo for a context.
+
+    The wheelhouse contains pip, the packages in `odoo_pip_packages`,
+    the requirements of Odoo from odoo-tools and the requirement files
+    passed. It also contains uv when it's the installer of the context.
+
+    Args:
+      context (HashMap<str, Any>): The context of the image.
+      output (Str): The directory of the wheelhouse.
+      requirements (List<Str>): Additional requirement files.
+      python (Str): Interpreter used to build wheels.
+      index_url (Str): The index to use instead of PyPI.
+
+    Returns:
+        HashMap<Str, HashMap<Str, Str>>: The index of the wheelhouse.
+    """
+    requirements = list(requirements or [])
+
+    odoo_requirements = get_odoo_requirements(context)
+
+    if odoo_requirements:
+        requirements.append(odoo_requirements)
+
+    packages = ["pip"] + context.get('odoo_pip_packages', [])
+
+    if context.get('installer', {}).get('name') == "uv":
+        packages.append("uv")
+
+    with tempfile.TemporaryDirectory() as target:
+        if python:
+            args = get_pip_args(context, target, python, index_url)
+            args += packages
+
+            for requirement in requirements:
+                args += ["-r", requirement]
+
+            subprocess.run(args, check=True, stdout=sys.stderr)
+        else:
+            download_packages(
+                context, target, packages, requirements, index_url
+            )
+
+        return add_to_wheelhouse(target, output)
@@ -0,0 +1,88 @@
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler
+
+try:
+    from http.server import ThreadingHTTPServer
+except ImportError:
+    from socketserver import ThreadingMixIn
+    from http.server import HTTPServer
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+import pytest
+
+
+class StandIn(object):
+    """
+    A local http server standing in for the remote services.
+
+    Files written in `root` are served as is and every request is
+    recorded in `requests`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.requests = []
+
+        server = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            def send_head(self):
+                server.requests.append(
+                    (self.path, dict(self.headers.items()))
+                )
+                return super().send_head()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            partial(Handler, directory=str(root))
+        )
+        self.url = "http://127.0.0.1:{}".format(self.httpd.server_port)
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+
+    def write(self, path, data):
+        filename = os.path.join(str(self.root), path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        mode = "wb" if isinstance(data, bytes) else "w"
+
+        with open(filename, mode) as fout:
+            fout.write(data)
+
+        return "{}/{}".format(self.url, path)
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+
+@pytest.fixture
+def standin(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+
+    server = StandIn(root)
+    server.thread.start()
+
+    yield server
+
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "cache")
+
+
+@pytest.fixture
+def context():
+    from odootools_docker.renderer import get_odoo_context, make_context
+
+    return make_context({"odoo": get_odoo_context("15.0")})
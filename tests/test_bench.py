@@ -0,0 +1,33 @@
+import pytest
+
+from odootools_docker.bench import docker_available, run_benchmarks
+
+
+def test_slow_benchmarks_not_run_by_default():
+    results = run_benchmarks(
+        versions=["15.0"],
+        benchmarks=[],
+        repeat=1
+    )
+
+    assert "render.warm[15.0]" in results["benchmarks"]
+    assert not any(
+        name.startswith("cold_start")
+        for name in results["benchmarks"]
+    )
+
+
+@pytest.mark.skipif(not docker_available(), reason="docker is unavailable")
+def test_cold_start():
+    # The fastest of 3 runs is kept so a slow container start doesn't
+    # fail the comparison.
+    results = run_benchmarks(
+        versions=["15.0"],
+        benchmarks=["cold_start"],
+        repeat=3
+    )["benchmarks"]
+
+    assert (
+        results["cold_start.precompile[15.0]"]["value"] <
+        results["cold_start.default[15.0]"]["value"]
+    )
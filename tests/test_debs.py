@@ -0,0 +1,47 @@
+import pytest
+
+from odootools_docker.debs import DEBS_STAGE, vendor_debs
+from odootools_docker.renderer import render
+
+
+def test_vendor_debs_copy(standin, context, cache_dir, tmp_path,
+                          monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    context["deb_files"] = [
+        {"name": "demo", "url": standin.write("demo.deb", b"deb")},
+    ]
+
+    vendor_debs(context, str(tmp_path / "debs"), cache_dir=cache_dir)
+
+    deb = context["deb_files"][0]
+
+    assert deb["file"]["path"] == "debs/demo.deb"
+    assert context["stages"][0] == DEBS_STAGE
+
+    with open(str(tmp_path / "debs" / "demo.deb"), "rb") as fin:
+        assert fin.read() == b"deb"
+
+    # The deb file is copied from the build context
+    assert "COPY debs/demo.deb /demo.deb" in render(context)
+
+
+def test_vendor_debs_outside_context(standin, context, cache_dir, tmp_path,
+                                     monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    context["deb_files"] = [
+        {"name": "demo", "url": standin.write("demo.deb", b"deb")},
+    ]
+
+    with pytest.raises(ValueError):
+        vendor_debs(
+            context,
+            str(tmp_path / ".." / "debs"),
+            cache_dir=cache_dir
+        )
+
+    assert standin.requests == []
+
+    # Deb files downloaded by BuildKit aren't stored in the build context
+    vendor_debs(context, "/debs", mode="add", cache_dir=cache_dir)
+
+    assert "file" not in context["deb_files"][0]
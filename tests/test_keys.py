@@ -0,0 +1,93 @@
+import pytest
+
+from odootools_docker.keys import vendor_keys
+from odootools_docker.renderer import render
+
+KEY = (
+    "-----BEGIN PGP PUBLIC KEY BLOCK-----\n"
+    "\n"
+    "mQINBE6XR8IBEACVdDKT2HEH1IyHzXkb4nIWAY7echjRxo7MTcj4vbXAyBKOfjja\n"
+    "-----END PGP PUBLIC KEY BLOCK-----\n"
+)
+
+
+def test_vendor_keys(standin, context, cache_dir, tmp_path, monkeypatch):
+    standin.write("pks/lookup", KEY)
+    monkeypatch.chdir(tmp_path)
+    output = str(tmp_path / "keys")
+
+    vendor_keys(context, output, keyserver=standin.url, cache_dir=cache_dir)
+
+    repo = context["deb_repos"][0]
+    path = "keys/{}.asc".format(repo["name"])
+
+    assert repo["key_file"]["path"] == path
+
+    with open(str(tmp_path / path)) as fin:
+        assert fin.read() == KEY
+
+    assert standin.paths() == [
+        "/pks/lookup?op=get&options=mr&search=0x{}".format(repo["key"]),
+    ]
+
+    dockerfile = render(context)
+
+    # The key is copied from the build context
+    assert "COPY {} /etc/apt/trusted.gpg.d/{}.gpg.asc".format(
+        path,
+        repo["name"]
+    ) in dockerfile
+    assert "keyserver" not in dockerfile
+
+    # Keys are fetched once in the cache
+    vendor_keys(context, output, keyserver=standin.url, cache_dir=cache_dir)
+
+    assert len(standin.requests) == 1
+
+
+def test_vendor_keys_outside_context(context, cache_dir, tmp_path,
+                                     monkeypatch):
+    monkeypatch.chdir(tmp_path / "..")
+
+    with pytest.raises(ValueError):
+        vendor_keys(context, "/keys", cache_dir=cache_dir)
+
+
+def test_vendor_keys_url(standin, cache_dir, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    context = {
+        "deb_repos": [
+            {"name": "vendor", "key_url": standin.write("key.asc", KEY)},
+            {"name": "nokey"},
+        ],
+    }
+
+    vendor_keys(context, str(tmp_path / "keys"), cache_dir=cache_dir)
+
+    assert context["deb_repos"][0]["key_file"]["path"].endswith("vendor.asc")
+    assert "key_file" not in context["deb_repos"][1]
+
+
+def test_vendor_invalid_key(standin, context, cache_dir, tmp_path,
+                            monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    standin.write("pks/lookup", "<html>Not found</html>")
+
+    with pytest.raises(ValueError):
+        vendor_keys(
+            context,
+            str(tmp_path / "keys"),
+            keyserver=standin.url,
+            cache_dir=cache_dir
+        )
+
+    # The invalid response isn't kept in the cache
+    standin.write("pks/lookup", KEY)
+    vendor_keys(
+        context,
+        str(tmp_path / "keys"),
+        keyserver=standin.url,
+        cache_dir=cache_dir
+    )
+
+    assert len(standin.requests) == 2
@@ -0,0 +1,135 @@
+import gzip
+import io
+import json
+import tarfile
+import zlib
+
+from click.testing import CliRunner
+
+from odootools_docker.cli.layers import inspect_layers
+from odootools_docker.layers import inspect_image
+
+
+def make_tar(files):
+    data = io.BytesIO()
+
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+
+    return data.getvalue()
+
+
+def tar_size(files):
+    # Header and content padded to blocks, without the end of archive
+    return sum(
+        512 + (len(content) + 511) // 512 * 512
+        for content in files.values()
+    )
+
+
+def make_image(layers, history):
+    config = {"history": history}
+    manifest = [{
+        "Config": "config.json",
+        "Layers": ["layer{}/layer.tar".format(index)
+                   for index in range(len(layers))],
+    }]
+
+    blobs = {
+        "manifest.json": json.dumps(manifest).encode("utf-8"),
+        "config.json": json.dumps(config).encode("utf-8"),
+    }
+
+    for index, layer in enumerate(layers):
+        blobs["layer{}/layer.tar".format(index)] = layer
+
+    return make_tar(blobs)
+
+
+FILES = [
+    {
+        "usr/lib/libbig.so": b"\x00" * 5000,
+        "usr/lib/libsmall.so": b"small",
+    },
+    {
+        "opt/odoo/addons/web.js": b"web" * 1000,
+        "opt/odoo/odoo.py": b"import odoo\n",
+    },
+    {
+        "etc/odoo.conf": b"[options]\n",
+    },
+]
+
+HISTORY = [
+    {"created_by": "ARG ODOOTOOLS_STEP=base", "empty_layer": True},
+    {"created_by": "RUN apt-get install"},
+    {"created_by": "ARG ODOOTOOLS_STEP=odoo", "empty_layer": True},
+    {"created_by": "RUN odootools manage setup"},
+    {"created_by": "ENV ODOO_RC=/etc/odoo.conf", "empty_layer": True},
+    {"created_by": "COPY odoo.conf /etc/odoo.conf"},
+]
+
+
+def test_inspect_image():
+    layers = [make_tar(files) for files in FILES]
+    # Layers are stored compressed by recent versions of docker
+    layers[1] = gzip.compress(layers[1])
+
+    report = inspect_image(io.BytesIO(make_image(layers, HISTORY)), top=1)
+
+    base, odoo, conf = report["layers"]
+
+    # Uncompressed layers are compressed to estimate their size
+    assert base["step"] == "base"
+    assert base["created_by"] == "RUN apt-get install"
+    assert base["uncompressed"] == len(layers[0])
+    assert base["compressed"] == len(zlib.compress(layers[0], 6))
+    assert base["files_count"] == 2
+    assert base["files"] == [{"path": "usr/lib/libbig.so", "size": 5000}]
+
+    assert odoo["step"] == "odoo"
+    assert odoo["compressed"] == len(layers[1])
+    assert odoo["uncompressed"] == tar_size(FILES[1])
+    assert odoo["files"] == [
+        {"path": "opt/odoo/addons/web.js", "size": 3000},
+    ]
+
+    assert conf["step"] == "odoo"
+
+    assert report["steps"] == {
+        "base": {
+            "compressed": base["compressed"],
+            "uncompressed": base["uncompressed"],
+        },
+        "odoo": {
+            "compressed": odoo["compressed"] + conf["compressed"],
+            "uncompressed": odoo["uncompressed"] + conf["uncompressed"],
+        },
+    }
+
+
+def test_inspect_layers(tmp_path):
+    image = tmp_path / "image.tar"
+    image.write_bytes(make_image([make_tar(FILES[0])], HISTORY[:2]))
+
+    result = CliRunner().invoke(inspect_layers, [str(image), "--top", "5"])
+
+    assert result.exit_code == 0
+
+    report = json.loads(result.output)
+
+    assert [item["path"] for item in report["layers"][0]["files"]] == [
+        "usr/lib/libbig.so",
+        "usr/lib/libsmall.so",
+    ]
+
+    # Archives that aren't saved images are reported as errors
+    image.write_bytes(make_tar({"file.txt": b"text"}))
+
+    result = CliRunner().invoke(inspect_layers, [str(image)])
+
+    assert result.exit_code == 1
+    assert "manifest.json" in json.loads(result.output)["error"]
@@ -0,0 +1,197 @@
+import io
+import os
+import re
+import shutil
+import stat
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from odootools_docker.proxy import (
+    PROXY_SECRETS,
+    get_secret_args,
+    write_secrets,
+)
+from odootools_docker.renderer import get_odoo_context, make_context, render
+
+APT_HELPER = "/usr/lib/apt/apt-helper"
+
+
+def make_wheel(name, version):
+    data = io.BytesIO()
+    dist_info = "{}-{}.dist-info".format(name, version)
+
+    with zipfile.ZipFile(data, "w") as wheel:
+        wheel.writestr("{}/__init__.py".format(name), "")
+        wheel.writestr(
+            "{}/METADATA".format(dist_info),
+            "Metadata-Version: 2.1\nName: {}\nVersion: {}\n".format(
+                name, version
+            )
+        )
+        wheel.writestr(
+            "{}/WHEEL".format(dist_info),
+            "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n"
+        )
+        wheel.writestr("{}/RECORD".format(dist_info), "")
+
+    return data.getvalue()
+
+
+def make_proxy_context(installer="pip", **proxy):
+    return make_context({
+        "odoo": get_odoo_context("15.0"),
+        "installer": installer,
+        "proxy": proxy or True,
+    })
+
+
+def test_write_secrets(tmp_path):
+    secrets = write_secrets(
+        str(tmp_path / "secrets"),
+        apt_proxy="http://localhost:3142",
+        index_url="http://mirror:8080/simple"
+    )
+
+    assert sorted(secrets) == ["apt-proxy", "pip-index", "uv-index"]
+
+    for filename in secrets.values():
+        assert stat.S_IMODE(os.stat(filename).st_mode) == 0o600
+
+    with open(secrets["apt-proxy"]) as fin:
+        assert fin.read() == (
+            'Acquire::http::Proxy "http://localhost:3142";\n'
+        )
+
+    with open(secrets["pip-index"]) as fin:
+        assert "trusted-host = mirror" in fin.read()
+
+    assert get_secret_args(secrets)[:2] == [
+        "--secret",
+        "id=apt-proxy,src={}".format(secrets["apt-proxy"]),
+    ]
+
+
+def test_pip_index_mirror(standin, tmp_path):
+    standin.write(
+        "packages/demo_pkg-1.0-py3-none-any.whl",
+        make_wheel("demo_pkg", "1.0")
+    )
+    standin.write(
+        "simple/demo-pkg/index.html",
+        '<a href="../../packages/demo_pkg-1.0-py3-none-any.whl">'
+        'demo_pkg-1.0-py3-none-any.whl</a>\n'
+    )
+
+    secrets = write_secrets(
+        str(tmp_path / "secrets"),
+        index_url="{}/simple".format(standin.url)
+    )
+
+    env = dict(
+        (key, value)
+        for key, value in os.environ.items()
+        if not key.startswith("PIP_")
+    )
+    env["PIP_CONFIG_FILE"] = secrets["pip-index"]
+
+    subprocess.run(
+        [
+            sys.executable, "-m", "pip", "download", "--quiet",
+            "--no-deps", "--dest", str(tmp_path / "dest"), "demo_pkg",
+        ],
+        check=True,
+        env=env
+    )
+
+    assert os.listdir(str(tmp_path / "dest")) == [
+        "demo_pkg-1.0-py3-none-any.whl",
+    ]
+    assert "/simple/demo-pkg/" in standin.paths()
+
+
+@pytest.mark.skipif(
+    not shutil.which("apt-config") or not os.path.exists(APT_HELPER),
+    reason="apt is unavailable"
+)
+def test_apt_proxy(standin, tmp_path):
+    url = "http://deb.example.invalid/pool/demo.deb"
+
+    # The proxy receives the absolute url, the stand-in serves it from
+    # the file at the same path.
+    standin.write("http:/deb.example.invalid/pool/demo.deb", b"deb")
+
+    secrets = write_secrets(str(tmp_path / "secrets"), apt_proxy=standin.url)
+
+    dump = subprocess.run(
+        ["apt-config", "-c", secrets["apt-proxy"], "dump"],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True
+    ).stdout
+
+    assert 'Acquire::http::Proxy "{}";'.format(standin.url) in dump
+
+    subprocess.run(
+        [
+            APT_HELPER, "-c", secrets["apt-proxy"],
+            "-o", "APT::Sandbox::User=root",
+            "download-file", url, str(tmp_path / "demo.deb"),
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL
+    )
+
+    with open(str(tmp_path / "demo.deb"), "rb") as fin:
+        assert fin.read() == b"deb"
+
+    assert standin.paths() == [url]
+
+
+def test_proxy_not_in_layers():
+    for installer in ["pip", "uv"]:
+        context = make_proxy_context(installer)
+        dockerfile = render(context)
+
+        assert "--mount=type=secret,id=apt-proxy" in dockerfile
+        assert "--mount=type=secret,id=pip-index" in dockerfile
+        assert (
+            ("id=uv-index" in dockerfile) == (installer == "uv")
+        )
+
+        for secret in PROXY_SECRETS.values():
+            assert "COPY" not in [
+                line.split(" ", 1)[0]
+                for line in dockerfile.splitlines()
+                if secret["target"] in line
+            ]
+
+        assert not any(
+            "proxy" in key.lower() or "index" in key.lower()
+            for key in context["environments"]
+        )
+
+
+def normalize(dockerfile):
+    """
+    Returns the instructions of a Dockerfile without the secret mounts.
+    """
+    dockerfile = re.sub(r"\s*\\\n\s*", " ", dockerfile)
+    dockerfile = re.sub(r" --mount=type=secret,\S+", "", dockerfile)
+
+    return [
+        line
+        for line in dockerfile.splitlines()
+        if not line.startswith("# syntax=")
+    ]
+
+
+def test_proxy_dockerfile_stable():
+    context = make_context({"odoo": get_odoo_context("15.0")})
+
+    # The proxy only adds the secret mounts to the instructions
+    assert normalize(render(make_proxy_context())) == normalize(
+        render(context)
+    )
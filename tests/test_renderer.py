@@ -0,0 +1,73 @@
+import os
+
+from odootools_docker import renderer
+from odootools_docker.renderer import (
+    COMPILED_HASH_FILE,
+    compile_templates,
+    get_environment,
+    get_odoo_context,
+    make_context,
+    make_environment,
+    render,
+    warm_environment,
+)
+
+
+def get_loaders(env):
+    return [type(loader).__name__ for loader in env.loader.loaders]
+
+
+def test_compiled_templates(tmp_path, monkeypatch):
+    compiled_dir = str(tmp_path / "compiled")
+    compile_templates(compiled_dir)
+
+    monkeypatch.setenv("ODOOTOOLS_DOCKER_COMPILED_DIR", compiled_dir)
+    env = get_environment()
+
+    assert get_loaders(env) == ["ModuleLoader", "PackageLoader"]
+    assert warm_environment(env) is env
+
+    context = make_context({
+        "odoo": get_odoo_context(
+            "15.0",
+            ref="",
+            release="",
+            repo="https://github.com/odoo/odoo.git",
+            languages="all"
+        ),
+    })
+
+    assert render(context, env=env) == render(
+        context,
+        env=make_environment()
+    )
+
+
+def test_outdated_compiled_templates(tmp_path):
+    compiled_dir = str(tmp_path / "compiled")
+    compile_templates(compiled_dir)
+
+    with open(os.path.join(compiled_dir, COMPILED_HASH_FILE), "w") as fout:
+        fout.write("outdated")
+
+    env = make_environment(compiled_dir=compiled_dir)
+
+    assert get_loaders(env) == ["PackageLoader"]
+
+    os.remove(os.path.join(compiled_dir, COMPILED_HASH_FILE))
+    env = make_environment(compiled_dir=compiled_dir)
+
+    assert get_loaders(env) == ["PackageLoader"]
+
+
+def test_templates_hash_changes(tmp_path, monkeypatch):
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    (templates_dir / "a.jinja").write_text("a")
+
+    monkeypatch.setattr(renderer, "TEMPLATES_DIR", str(templates_dir))
+    before = renderer.get_templates_hash()
+
+    (templates_dir / "a.jinja").write_text("b")
+
+    assert renderer.get_templates_hash() != before
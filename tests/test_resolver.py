@@ -0,0 +1,148 @@
+import json
+import hashlib
+import os
+
+import pytest
+
+from odootools_docker.debs import DEBS_STAGE, fetch_deb
+from odootools_docker.resolver import cached_get, parse_refs, resolve_contexts
+
+COMMIT = "a" * 40
+TAG_COMMIT = "b" * 40
+
+
+def pkt_line(line):
+    data = line.encode('utf-8')
+    return "{:04x}".format(len(data) + 4).encode('utf-8') + data
+
+
+def make_refs():
+    return b"".join([
+        pkt_line("# service=git-upload-pack\n"),
+        b"0000",
+        pkt_line("{} HEAD\0multi_ack\n".format(COMMIT)),
+        pkt_line("{} refs/heads/main\n".format(COMMIT)),
+        pkt_line("{} refs/tags/v1\n".format("c" * 40)),
+        pkt_line("{} refs/tags/v1^{{}}\n".format(TAG_COMMIT)),
+        b"0000",
+    ])
+
+
+def make_context(repo, ref, debs):
+    return {
+        "odoo": {
+            "version": "16.0",
+            "repo": repo,
+            "ref": ref,
+        },
+        "deb_files": [
+            {"name": name, "url": url}
+            for name, url in debs
+        ],
+        "labels": {},
+        "stages": [],
+    }
+
+
+def test_parse_refs():
+    refs = parse_refs(make_refs())
+
+    assert refs["HEAD"] == COMMIT
+    assert refs["refs/heads/main"] == COMMIT
+    assert refs["refs/tags/v1^{}"] == TAG_COMMIT
+
+
+def test_resolve_refs(standin, cache_dir):
+    standin.write("odoo.git/info/refs", make_refs())
+    repo = "{}/odoo.git".format(standin.url)
+
+    contexts = [
+        make_context(repo, "main", []),
+        make_context(repo, "v1", []),
+    ]
+
+    resolve_contexts(contexts, cache_dir=cache_dir)
+
+    assert contexts[0]["odoo"]["commit"] == COMMIT
+    assert contexts[1]["odoo"]["commit"] == TAG_COMMIT
+    assert contexts[0]["labels"] == {
+        "org.opencontainers.image.revision": COMMIT,
+    }
+    # The refs shared by both contexts are fetched once
+    assert standin.paths() == [
+        "/odoo.git/info/refs?service=git-upload-pack",
+    ]
+
+
+def test_resolve_unknown_ref(standin, cache_dir):
+    standin.write("odoo.git/info/refs", make_refs())
+    repo = "{}/odoo.git".format(standin.url)
+
+    with pytest.raises(ValueError):
+        resolve_contexts(
+            [make_context(repo, "missing", [])],
+            cache_dir=cache_dir
+        )
+
+
+def test_resolve_debs_concurrently(standin, cache_dir):
+    debs = []
+    checksums = {}
+
+    for index in range(12):
+        data = "deb {}".format(index).encode('utf-8')
+        url = standin.write("debs/pkg{}.deb".format(index), data)
+        debs.append(("pkg{}".format(index), url))
+        checksums[url] = hashlib.sha256(data).hexdigest()
+
+    contexts = [
+        make_context("/odoo", "main", debs),
+        make_context("/odoo", "main", debs[:6]),
+    ]
+
+    resolve_contexts(contexts, cache_dir=cache_dir, concurrency=8)
+
+    for context in contexts:
+        assert context["stages"] == [DEBS_STAGE]
+
+        for deb in context["deb_files"]:
+            assert deb["sha256"] == checksums[deb["url"]]
+
+    with open(os.path.join(cache_dir, "debs", "index.json")) as fin:
+        assert json.load(fin) == checksums
+
+    # Each deb file is downloaded once and no temporary file is left
+    assert sorted(standin.paths()) == sorted(
+        url[len(standin.url):] for url in checksums
+    )
+    assert sorted(os.listdir(os.path.join(cache_dir, "debs"))) == sorted(
+        ["index.json"] + ["{}.deb".format(sha) for sha in checksums.values()]
+    )
+
+    # The index is used by the next fetches
+    path, checksum = fetch_deb(debs[0][1], cache_dir=cache_dir)
+
+    assert checksum == checksums[debs[0][1]]
+    assert len(standin.requests) == 12
+
+
+def test_fetch_deb_checksum_mismatch(standin, cache_dir):
+    url = standin.write("pkg.deb", b"deb")
+
+    with pytest.raises(ValueError):
+        fetch_deb(url, sha256="0" * 64, cache_dir=cache_dir)
+
+    assert os.listdir(os.path.join(cache_dir, "debs")) == []
+
+
+def test_cached_get_revalidates(standin, cache_dir):
+    url = standin.write("data.txt", b"v1")
+
+    assert cached_get(url, cache_dir=cache_dir) == b"v1"
+    assert cached_get(url, cache_dir=cache_dir) == b"v1"
+    assert len(standin.requests) == 1
+
+    # Expired responses are revalidated with their date
+    assert cached_get(url, ttl=0, cache_dir=cache_dir) == b"v1"
+    assert len(standin.requests) == 2
+    assert "If-Modified-Since" in standin.requests[1][1]
@@ -0,0 +1,62 @@
+import subprocess
+
+import pytest
+
+from odootools_docker.source import get_prefetch_ref, prefetch_repo
+
+
+def git(*args):
+    return subprocess.run(
+        [
+            "git",
+            "-c", "user.name=odootools",
+            "-c", "user.email=odootools@example.com",
+        ] + list(args),
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def origin(tmp_path):
+    path = str(tmp_path / "origin")
+
+    git("init", "--quiet", "--initial-branch", "16.0", path)
+
+    for index in range(3):
+        (tmp_path / "origin" / "file").write_text(str(index))
+        git("-C", path, "add", "file")
+        git("-C", path, "commit", "--quiet", "-m", "commit {}".format(index))
+
+    git("-C", path, "tag", "v1", "HEAD~1")
+    git("-C", path, "config", "uploadpack.allowReachableSHA1InWant", "true")
+
+    return path
+
+
+def test_prefetch_branch(origin, tmp_path):
+    output = str(tmp_path / "prefetch.git")
+    commit = prefetch_repo("file://" + origin, "16.0", output)
+
+    assert commit == git("-C", origin, "rev-parse", "16.0")
+    assert git("-C", output, "rev-parse", "refs/heads/16.0") == commit
+    # Only the commit of the ref is fetched
+    assert git("-C", output, "rev-list", "--count", commit) == "1"
+
+
+def test_prefetch_tag_and_commit(origin, tmp_path):
+    output = str(tmp_path / "prefetch.git")
+    url = "file://" + origin
+
+    tag = prefetch_repo(url, "v1", output)
+    first = git("-C", origin, "rev-parse", "16.0~2")
+    commit = prefetch_repo(url, first, output)
+
+    assert tag == git("-C", origin, "rev-parse", "v1")
+    assert commit == first
+    assert get_prefetch_ref(first) == "refs/prefetch/{}".format(first)
+
+    # The bare repository is reused and keeps the refs fetched before
+    assert git("-C", output, "rev-parse", "refs/heads/v1") == tag
+    assert git("-C", output, "rev-parse", get_prefetch_ref(first)) == first
@@ -0,0 +1,88 @@
+import json
+
+from click.testing import CliRunner
+
+from odootools_docker.cli.timing import timing
+from odootools_docker.timing import compare_timings, get_timings, parse_log
+
+LOG = """
+#5 [base 2/4] RUN apt-get update
+#5 0.201 ##odootools-timing base update 100.0
+#5 3.102 ##odootools-timing base install 103.0
+#5 9.950 ##odootools-timing base end 110.0
+#5 DONE 10.1s
+##odootools-timing odoo setup 200.0
+##odootools-timing odoo end 230.5
+#7 0.100 ##odootools-timing base update 300.0
+#7 1.100 ##odootools-timing base end 301.0
+"""
+
+
+def test_parse_log():
+    markers = parse_log(LOG.splitlines())
+
+    assert len(markers) == 7
+    assert markers[0] == {
+        "vertex": "5",
+        "step": "base",
+        "phase": "update",
+        "time": 100.0,
+    }
+    assert markers[3]["vertex"] is None
+
+
+def test_get_timings():
+    report = get_timings(parse_log(LOG.splitlines()))
+
+    # The runs of a step in different vertexes are added
+    assert report["steps"]["base"] == {
+        "total": 11.0,
+        "phases": {"update": 4.0, "install": 7.0},
+    }
+    assert report["steps"]["odoo"] == {
+        "total": 30.5,
+        "phases": {"setup": 30.5},
+    }
+    assert report["total"] == 41.5
+
+
+def test_compare_timings():
+    old = get_timings(parse_log(LOG.splitlines()))
+    new = get_timings(parse_log(
+        LOG.replace("230.5", "260.5").replace("110.0", "110.5").splitlines()
+    ))
+
+    regressions = compare_timings(old, new)
+
+    # The install phase is 0.5s slower, below the minimum delta
+    assert [
+        (regression["step"], regression["phase"])
+        for regression in regressions
+    ] == [("odoo", None), ("odoo", "setup")]
+    assert regressions[0]["delta"] == 30.0
+
+    assert compare_timings(old, new, threshold=1.0) == []
+
+    # The output of --compare can be used as the reference
+    assert compare_timings({"report": old, "regressions": []}, new) == (
+        regressions
+    )
+
+
+def test_timing_save(tmp_path):
+    runner = CliRunner()
+    log = tmp_path / "build.log"
+    log.write_text(LOG)
+    baseline = str(tmp_path / "timings.json")
+
+    result = runner.invoke(timing, [str(log), "--save", baseline])
+
+    assert result.exit_code == 0
+
+    with open(baseline) as fin:
+        assert json.load(fin) == json.loads(result.output)
+
+    result = runner.invoke(timing, [str(log), "--compare", baseline])
+
+    assert result.exit_code == 0
+    assert json.loads(result.output)["regressions"] == []
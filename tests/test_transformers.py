@@ -0,0 +1,109 @@
+import json
+import subprocess
+from urllib.error import URLError
+
+import pytest
+from click.testing import CliRunner
+
+from odootools_docker import transformers
+from odootools_docker.cli.pipeline import pipeline
+from odootools_docker.debs import DEBS_STAGE
+from odootools_docker.transformers import apply_transformers, wkhtmltopdf
+
+
+def test_wkhtmltopdf_sha256():
+    context = wkhtmltopdf(
+        {"os_version": "focal", "os_arch": "amd64"},
+        sha256="0" * 64
+    )
+
+    assert context["deb_files"][0]["sha256"] == "0" * 64
+    assert context["stages"] == [DEBS_STAGE]
+
+
+def test_wkhtmltopdf_multi_arch():
+    context = {
+        "os_version": "focal",
+        "os_arch": "${TARGETARCH}",
+        "multi_arch": True,
+    }
+
+    with pytest.raises(ValueError):
+        wkhtmltopdf(context, sha256="0" * 64)
+
+    context = wkhtmltopdf(context)
+
+    assert "${TARGETARCH}" in context["deb_files"][0]["url"]
+    assert context["stages"] == []
+
+
+def test_wkhtmltopdf_deb_arch():
+    context = wkhtmltopdf({"os_version": "focal", "os_arch": "arm"})
+
+    # Docker names armhf arm
+    assert context["deb_files"][0]["url"].endswith("focal_armhf.deb")
+
+    with pytest.raises(ValueError):
+        wkhtmltopdf({
+            "os_version": "focal",
+            "os_arch": "${TARGETARCH}",
+            "multi_arch": {"arches": ["amd64", "arm"]},
+        })
+
+
+def test_apply_transformers(monkeypatch):
+    def label(context, name="x", value=""):
+        context.setdefault("labels", {})[name] = value
+        return context
+
+    def broken(context):
+        return context["missing"]
+
+    monkeypatch.setattr(transformers, "get_transformers", lambda: {
+        "label": lambda: label,
+        "broken": lambda: broken,
+    })
+
+    context = apply_transformers({}, ["label:name=a,value=1", "label"])
+
+    assert context == {"labels": {"a": "1", "x": ""}}
+
+    with pytest.raises(ValueError):
+        apply_transformers({}, ["unknown"])
+
+    # Errors raised by a transformer aren't reported as unknown names
+    with pytest.raises(KeyError):
+        apply_transformers({}, ["broken"])
+
+
+def test_pipeline_errors(monkeypatch):
+    runner = CliRunner()
+
+    result = runner.invoke(
+        pipeline, ["-v", "15.0", "--source-strategy", "archive"]
+    )
+
+    assert result.exit_code == 1
+    assert json.loads(result.output) == {
+        "error": "The archive source strategy needs a release",
+    }
+
+    def failing(exc):
+        def transformer(context):
+            raise exc
+
+        return lambda: transformer
+
+    monkeypatch.setattr(transformers, "get_transformers", lambda: {
+        "wheelhouse": failing(
+            subprocess.CalledProcessError(1, ["pip", "download"])
+        ),
+        "keys": failing(URLError("unreachable")),
+    })
+
+    # Errors of the transformers are reported instead of a traceback
+    for name in ["wheelhouse", "keys"]:
+        result = runner.invoke(pipeline, ["-v", "15.0", "-t", name])
+
+        assert result.exit_code == 1
+        assert "error" in json.loads(result.output)
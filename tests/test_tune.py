@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+from odootools_docker.renderer import SCRIPTS_DIR
+
+MB = 1024 * 1024
+
+
+def write(root, path, data):
+    filename = os.path.join(str(root), path)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    with open(filename, "w") as fout:
+        fout.write(data)
+
+
+def tune(root, **environ):
+    env = dict(
+        (key, value)
+        for key, value in os.environ.items()
+        if not key.startswith("ODOO_")
+    )
+    env.update(environ)
+
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            os.path.join(SCRIPTS_DIR, "tune.py"),
+            "--root", str(root),
+            "--print",
+        ],
+        env=env
+    )
+
+    return dict(
+        line.split("=", 1)
+        for line in output.decode("utf-8").splitlines()
+    )
+
+
+def test_cgroup_v2(tmp_path):
+    write(tmp_path, "sys/fs/cgroup/cpu.max", "200000 100000\n")
+    write(tmp_path, "sys/fs/cgroup/memory.max", "{}\n".format(2048 * MB))
+
+    # 5 workers for 2 cpus, reduced to 3 as each process needs 384 MB
+    assert tune(tmp_path) == {
+        "ODOO_WORKERS": "3",
+        "ODOO_LIMIT_MEMORY_HARD": str(2048 * MB // 5),
+        "ODOO_LIMIT_MEMORY_SOFT": str(2048 * MB // 5 * 4 // 5),
+        "ODOO_DB_MAXCONN": "16",
+    }
+
+
+def test_cgroup_v1(tmp_path):
+    write(tmp_path, "sys/fs/cgroup/cpu/cpu.cfs_quota_us", "150000\n")
+    write(tmp_path, "sys/fs/cgroup/cpu/cpu.cfs_period_us", "100000\n")
+    write(
+        tmp_path,
+        "sys/fs/cgroup/memory/memory.limit_in_bytes",
+        "{}\n".format(8192 * MB)
+    )
+
+    assert tune(tmp_path) == {
+        "ODOO_WORKERS": "4",
+        "ODOO_LIMIT_MEMORY_HARD": str(8192 * MB // 6),
+        "ODOO_LIMIT_MEMORY_SOFT": str(8192 * MB // 6 * 4 // 5),
+        "ODOO_DB_MAXCONN": "14",
+    }
+
+
+def test_unlimited(tmp_path):
+    write(tmp_path, "sys/fs/cgroup/cpu.max", "max 100000\n")
+    write(tmp_path, "sys/fs/cgroup/memory.max", "max\n")
+    write(tmp_path, "proc/meminfo", "MemTotal: {} kB\n".format(1024 * 1024))
+
+    environ = tune(tmp_path)
+
+    # The memory of the host limits the workers
+    assert environ["ODOO_WORKERS"] == "1"
+    assert environ["ODOO_LIMIT_MEMORY_HARD"] == str(1024 * MB // 3)
+
+
+def test_environment_kept(tmp_path):
+    write(tmp_path, "sys/fs/cgroup/cpu.max", "400000 100000\n")
+    write(tmp_path, "sys/fs/cgroup/memory.max", "{}\n".format(4096 * MB))
+
+    assert tune(tmp_path, ODOO_WORKERS="2", ODOO_DB_MAXCONN="8") == {
+        "ODOO_LIMIT_MEMORY_HARD": str(4096 * MB // 4),
+        "ODOO_LIMIT_MEMORY_SOFT": str(4096 * MB // 4 * 4 // 5),
+    }
+
+    assert tune(tmp_path, ODOO_TUNE="0") == {}
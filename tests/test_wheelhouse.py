@@ -0,0 +1,215 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from odootools_docker import transformers, wheelhouse
+from odootools_docker.renderer import get_odoo_context, make_context
+from odootools_docker.wheelhouse import (
+    add_to_wheelhouse,
+    build_wheelhouse,
+    get_platforms,
+    load_index,
+)
+
+# PEP 517 backend shipped in the test sdist so pip can prepare its
+# metadata without downloading a build backend.
+BACKEND = """
+import os
+
+
+def get_requires_for_build_wheel(config_settings=None):
+    return []
+
+
+def prepare_metadata_for_build_wheel(directory, config_settings=None):
+    dist_info = os.path.join(directory, "srcpkg-1.0.dist-info")
+    os.makedirs(dist_info)
+
+    with open("PKG-INFO") as fin:
+        metadata = fin.read()
+
+    with open(os.path.join(dist_info, "METADATA"), "w") as fout:
+        fout.write(metadata)
+
+    return "srcpkg-1.0.dist-info"
+"""
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "w") as fout:
+        fout.write(data)
+
+
+def make_wheel(name, version, tag="py3-none-any", requires=()):
+    data = io.BytesIO()
+    dist_info = "{}-{}.dist-info".format(name, version)
+    metadata = "Metadata-Version: 2.1\nName: {}\nVersion: {}\n".format(
+        name, version
+    )
+
+    for requirement in requires:
+        metadata += "Requires-Dist: {}\n".format(requirement)
+
+    with zipfile.ZipFile(data, "w") as wheel:
+        wheel.writestr("{}/__init__.py".format(name), "")
+        wheel.writestr("{}/METADATA".format(dist_info), metadata)
+        wheel.writestr(
+            "{}/WHEEL".format(dist_info),
+            "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: {}\n".format(
+                tag
+            )
+        )
+        wheel.writestr("{}/RECORD".format(dist_info), "")
+
+    return data.getvalue()
+
+
+def make_sdist(name, version, requires=()):
+    data = io.BytesIO()
+    root = "{}-{}".format(name, version)
+    pkg_info = "Metadata-Version: 2.2\nName: {}\nVersion: {}\n".format(
+        name, version
+    )
+
+    for requirement in requires:
+        pkg_info += "Requires-Dist: {}\n".format(requirement)
+
+    files = {
+        "PKG-INFO": pkg_info,
+        "backend.py": BACKEND,
+        "pyproject.toml": (
+            "[build-system]\n"
+            "requires = []\n"
+            "build-backend = \"backend\"\n"
+            "backend-path = [\".\"]\n"
+        ),
+    }
+
+    with tarfile.open(fileobj=data, mode="w:gz") as sdist:
+        for filename, content in files.items():
+            content = content.encode("utf-8")
+            info = tarfile.TarInfo("{}/{}".format(root, filename))
+            info.size = len(content)
+            sdist.addfile(info, io.BytesIO(content))
+
+    return data.getvalue()
+
+
+def publish(standin, name, filename, data):
+    standin.write("packages/{}".format(filename), data)
+    standin.write(
+        "simple/{}/index.html".format(name),
+        '<a href="../../packages/{0}">{0}</a>\n'.format(filename)
+    )
+
+
+def test_get_platforms():
+    context = make_context({"odoo": get_odoo_context("15.0")})
+    context["os_arch"] = "arm64"
+
+    platforms = get_platforms(context)
+
+    assert platforms[0] == "manylinux_2_31_aarch64"
+    assert platforms[-2:] == [
+        "manylinux_2_17_aarch64",
+        "manylinux2014_aarch64",
+    ]
+
+
+def test_build_wheelhouse(standin, tmp_path, monkeypatch):
+    context = make_context({"odoo": get_odoo_context("15.0")})
+    context["os_arch"] = "amd64"
+    python_tag = "cp{}".format(
+        context["python_bin"].replace("python", "").replace(".", "")
+    )
+    binary = "binpkg-1.0-{0}-{0}-manylinux2014_x86_64.whl".format(python_tag)
+
+    publish(
+        standin,
+        "binpkg",
+        binary,
+        make_wheel(
+            "binpkg", "1.0", "{0}-{0}-manylinux2014_x86_64".format(python_tag),
+            requires=["puredep"]
+        )
+    )
+    publish(standin, "srcpkg", "srcpkg-1.0.tar.gz", make_sdist(
+        "srcpkg", "1.0", requires=["srcdep"]
+    ))
+
+    for name in ["puredep", "srcdep", "pip", "odoo-tools", "setuptools",
+                 "wheel"]:
+        filename = "{}-1.0-py3-none-any.whl".format(name.replace("-", "_"))
+        publish(standin, name, filename, make_wheel(
+            name.replace("-", "_"), "1.0"
+        ))
+
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("binpkg==1.0  # binary\nsrcpkg\n")
+
+    for key in list(os.environ):
+        if key.startswith("PIP_"):
+            monkeypatch.delenv(key)
+
+    monkeypatch.setenv("PIP_CONFIG_FILE", os.devnull)
+    monkeypatch.setattr(wheelhouse, "get_odoo_requirements", lambda c: None)
+
+    index = build_wheelhouse(
+        context,
+        str(tmp_path / "wheelhouse"),
+        requirements=[str(requirements)],
+        index_url="{}/simple".format(standin.url)
+    )
+
+    assert sorted(index) == sorted([
+        binary,
+        "srcpkg-1.0.tar.gz",
+        "puredep-1.0-py3-none-any.whl",
+        "srcdep-1.0-py3-none-any.whl",
+        "pip-1.0-py3-none-any.whl",
+        "odoo_tools-1.0-py3-none-any.whl",
+        "setuptools-1.0-py3-none-any.whl",
+        "wheel-1.0-py3-none-any.whl",
+    ])
+
+
+def test_add_to_wheelhouse(tmp_path):
+    source = str(tmp_path / "source")
+    output = str(tmp_path / "wheelhouse")
+    filename = "pkg-1.0-py3-none-any.whl"
+
+    write(os.path.join(source, filename), "v1")
+    index = add_to_wheelhouse(source, output)
+
+    assert index == load_index(output)
+    assert index[filename]["path"].startswith("blobs/")
+
+    # uv finds the wheels linked at the top level
+    with open(os.path.join(output, filename)) as fin:
+        assert fin.read() == "v1"
+
+    with open(os.path.join(output, "index.html")) as fin:
+        assert index[filename]["path"] in fin.read()
+
+    # A rebuilt wheel replaces the link
+    write(os.path.join(source, filename), "v2")
+    add_to_wheelhouse(source, output)
+
+    assert os.readlink(os.path.join(output, filename)) == (
+        load_index(output)[filename]["path"]
+    )
+
+    with open(os.path.join(output, filename)) as fin:
+        assert fin.read() == "v2"
+
+
+def test_wheelhouse_outside_context(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(ValueError):
+        transformers.wheelhouse({}, str(tmp_path / ".." / "wheelhouse"))